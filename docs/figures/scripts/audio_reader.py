@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Audio Reader
+Overlapping analysis frames from long WAV or raw PCM recordings
+Mambo Whistle Technical Report
+
+The sample data of the file is memory-mapped, never read as a whole:
+
+    int16      '<i2' view of the mapping, scaled by 1 / 32768
+    int24      (n, channels, 3) byte view, sign-extended through an int32 view
+    float32    '<f4' view of the mapping, used as it is
+
+Frames are produced CHUNK_FRAMES at a time. A chunk decodes only the samples
+its frames cover (chunk_frames * hop + frame_length - hop) to float32, and
+its frames are a sliding_window_view of that buffer: overlapping frames
+share memory, and the working set is one chunk however long the file is.
+Mono float32 files are not decoded at all; their chunks are views of the
+mapping, and the operating system pages in what the analysis touches.
+Multichannel files are mixed down to mono per chunk, or one channel is
+picked with `channel=`.
+
+frame_blocks() gives the same (first frame, frames) blocks for an in-memory
+array, so yin.track_pitch(), spectral_features.track_features() and
+PitchDetector.track() take either a 1-D signal or an AudioReader.
+
+Usage:
+    python audio_reader.py recording.wav [--hop 512] [--detector YIN]
+    python audio_reader.py test.wav --write-test --minutes 10 --format int24
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+CHUNK_FRAMES = 2048                 # Analysis frames decoded per chunk
+
+# sample format -> (bytes per sample, little-endian dtype, scale to [-1, 1))
+SAMPLE_FORMATS = {
+    'int16': (2, '<i2', 1 / 32768),
+    'int24': (3, None, 1 / 8388608),
+    'float32': (4, '<f4', None),
+}
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+# ============================================================================
+#  HEADER PARSING
+# ============================================================================
+
+def _sample_format(format_tag, bits, path):
+    if format_tag == WAVE_FORMAT_PCM and bits in (16, 24):
+        return f'int{bits}'
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        return 'float32'
+    raise ValueError(f'{path}: unsupported WAV encoding (format {format_tag}, {bits} bits)')
+
+
+def parse_wav_header(path):
+    """(sample format, channels, fs, data offset, data bytes) of a RIFF/WAVE file."""
+    size = Path(path).stat().st_size
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f'{path} is not a RIFF/WAVE file')
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f'{path}: no data chunk')
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                format_tag, channels, fs, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                    # The sub-format GUID starts with the actual format tag
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                fmt = (_sample_format(format_tag, bits, path), channels, fs)
+                f.seek(chunk_size % 2, 1)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f'{path}: data chunk before fmt chunk')
+                offset = f.tell()
+                # Recorders that never finalized the header leave 0 or 0xFFFFFFFF
+                if chunk_size in (0, 0xFFFFFFFF) or offset + chunk_size > size:
+                    chunk_size = size - offset
+                return fmt + (offset, chunk_size)
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+
+# ============================================================================
+#  READER
+# ============================================================================
+
+class AudioReader:
+    """
+    Memory-mapped recording. WAV files describe themselves; raw PCM needs
+    sample_format, fs and channels (and the header size as `offset`).
+    """
+
+    def __init__(self, path, sample_format=None, fs=None, channels=1, offset=0):
+        self.path = Path(path)
+        if sample_format is None:
+            sample_format, channels, fs, offset, n_bytes = parse_wav_header(self.path)
+        else:
+            if sample_format not in SAMPLE_FORMATS:
+                raise ValueError(f'unknown sample format {sample_format!r}; '
+                                 f'choose from {", ".join(SAMPLE_FORMATS)}')
+            if fs is None:
+                raise ValueError('raw PCM needs a sample rate')
+            n_bytes = self.path.stat().st_size - offset
+        self.sample_format = sample_format
+        self.fs = fs
+        self.channels = channels
+
+        width, dtype, self.scale = SAMPLE_FORMATS[sample_format]
+        self.n_samples = n_bytes // (width * channels)
+        if self.n_samples == 0:
+            self._samples = np.zeros((0, channels), dtype=np.float32)
+            return
+        raw = np.memmap(self.path, dtype=np.uint8, mode='r', offset=offset,
+                        shape=(self.n_samples * width * channels,))
+        # (n_samples, channels) of the stored type, or (n_samples, channels, 3) bytes
+        self._samples = (raw.view(dtype).reshape(-1, channels) if dtype
+                         else raw.reshape(-1, channels, 3))
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def duration(self):
+        return self.n_samples / self.fs
+
+    def read(self, start, stop, channel=None):
+        """
+        Samples [start, stop) as float32 mono: one channel, or the mean of
+        all channels. A view of the mapping for float32 input, else a copy
+        of just this range.
+        """
+        raw = self._samples[start:stop]
+        if channel is not None:
+            raw = raw[:, channel:channel + 1]
+        if self.sample_format == 'int24':
+            words = np.zeros(raw.shape[:2] + (4,), dtype=np.uint8)
+            words[..., 1:] = raw
+            # Bytes 1..3 of a little-endian int32, shifted back down with sign
+            samples = (words.view('<i4')[..., 0] >> 8).astype(np.float32)
+        else:
+            samples = raw.astype(np.float32, copy=False)
+        if self.scale is not None:
+            samples *= np.float32(self.scale)
+        if samples.shape[1] == 1:
+            return samples[:, 0]
+        return samples.mean(axis=1, dtype=np.float32)
+
+    def n_frames(self, frame_length, hop):
+        return count_frames(self.n_samples, frame_length, hop)
+
+    def frames(self, frame_length, hop, chunk_frames=CHUNK_FRAMES, channel=None):
+        """
+        Yield (first frame index, frames) with frames a read-only
+        (count, frame_length) strided view of one decoded chunk.
+        """
+        n_frames = self.n_frames(frame_length, hop)
+        for first in range(0, n_frames, chunk_frames):
+            count = min(chunk_frames, n_frames - first)
+            start = first * hop
+            samples = self.read(start, start + (count - 1) * hop + frame_length, channel)
+            yield first, np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop]
+
+
+def count_frames(n_samples, frame_length, hop):
+    """Whole frames in n_samples (trailing samples are dropped)."""
+    return max(0, (n_samples - frame_length) // hop + 1)
+
+
+def frame_blocks(source, frame_length, hop, block_frames=CHUNK_FRAMES):
+    """
+    (first frame index, frames) blocks of a 1-D array or an AudioReader
+    (anything with a frames() method); frames are strided views in both cases.
+    """
+    if hasattr(source, 'frames'):
+        yield from source.frames(frame_length, hop, block_frames)
+        return
+    signal = np.asarray(source)
+    n_frames = count_frames(len(signal), frame_length, hop)
+    if n_frames == 0:
+        return
+    windows = np.lib.stride_tricks.sliding_window_view(signal, frame_length)[::hop]
+    for first in range(0, n_frames, block_frames):
+        yield first, windows[first:first + block_frames]
+
+
+# ============================================================================
+#  TEST FILES
+# ============================================================================
+
+def write_wav(path, blocks, fs, sample_format='int16'):
+    """
+    Write blocks of float samples in [-1, 1), each (n,) or (n, channels),
+    as one WAV file; the sizes in the header are filled in at the end, so
+    long test files never exist in memory as a whole. Returns the file size.
+    """
+    width, dtype, scale = SAMPLE_FORMATS[sample_format]
+    format_tag = WAVE_FORMAT_IEEE_FLOAT if sample_format == 'float32' else WAVE_FORMAT_PCM
+    n_bytes, channels = 0, None
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 44)
+        for block in blocks:
+            block = np.asarray(block).reshape(len(block), -1)
+            channels = block.shape[1]
+            if scale is None:
+                data = block.astype('<f4').tobytes()
+            else:
+                peak = 1 / scale
+                ints = np.clip(np.round(block * peak), -peak, peak - 1).astype('<i4')
+                data = (ints.astype(dtype).tobytes() if dtype
+                        else ints.view(np.uint8).reshape(-1, 4)[:, :3].tobytes())
+            f.write(data)
+            n_bytes += len(data)
+        channels = channels or 1
+        f.seek(0)
+        f.write(struct.pack('<4sI4s', b'RIFF', 36 + n_bytes, b'WAVE'))
+        f.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, format_tag, channels, fs,
+                            fs * channels * width, channels * width, 8 * width))
+        f.write(struct.pack('<4sI', b'data', n_bytes))
+    return 44 + n_bytes
+
+
+def test_recording(seconds, fs, block_seconds=60, seed=0):
+    """Blocks of a long hummed test recording (worklet_sim.test_signal per block)."""
+    import worklet_sim
+    for k, start in enumerate(np.arange(0, seconds, block_seconds)):
+        yield worklet_sim.test_signal(min(block_seconds, seconds - start), fs, seed=seed + k)
+
+
+def main():
+    import detectors
+    import spectral_features
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--frame-length', type=int, default=1024)
+    parser.add_argument('--hop', type=int, default=512)
+    parser.add_argument('--detector', default='YIN', choices=list(detectors.DETECTORS))
+    parser.add_argument('--write-test', action='store_true',
+                        help='first write a hummed test recording to PATH')
+    parser.add_argument('--minutes', type=float, default=10.0, help='length of the test file')
+    parser.add_argument('--format', default='int16', choices=list(SAMPLE_FORMATS),
+                        help='sample format of the test file')
+    args = parser.parse_args()
+
+    if args.write_test:
+        size = write_wav(args.path, test_recording(args.minutes * 60, 44100), 44100, args.format)
+        print(f'Wrote {size / 1e6:.0f} MB to {args.path}')
+
+    reader = AudioReader(args.path)
+    print(f'{args.path}: {reader.sample_format}, {reader.channels} ch, {reader.fs} Hz, '
+          f'{reader.duration / 60:.1f} min, {reader.n_frames(args.frame_length, args.hop)} frames')
+    chunk_mb = (CHUNK_FRAMES * args.hop + args.frame_length) * 4 / 1e6
+    print(f'Chunk: {CHUNK_FRAMES} frames, {chunk_mb:.1f} MB of float32 samples')
+
+    start = time.perf_counter()
+    f0, _ = detectors.create(args.detector).track(reader, args.frame_length, args.hop)
+    seconds = time.perf_counter() - start
+    print(f'{args.detector}: {np.mean(f0 > 0) * 100:.1f}% voiced, '
+          f'{reader.duration / seconds:.0f}x real time')
+
+    start = time.perf_counter()
+    features = spectral_features.track_features(reader, args.hop)
+    seconds = time.perf_counter() - start
+    print(f'Spectral features: mean brightness {np.mean(features.brightness):.3f}, '
+          f'{reader.duration / seconds:.0f}x real time')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Benchmark History
+Columnar store of detector benchmark runs, with bootstrap regression checks
+Mambo Whistle Technical Report
+
+Every `record` appends one run per detector to data/benchmark_history.npz,
+keyed by commit (git describe --dirty), machine fingerprint (hash of the
+hardware only: processor, architecture and CPU count), detector and
+parameters. Python, NumPy and OS versions are stored with each run but are
+not part of the key, so a slowdown caused by a software upgrade is compared
+against the runs before it rather than starting a new series. The file is
+two tables of typed columns, so a run costs a few bytes of keys plus its
+samples:
+
+    runs       commit, machine, detector, params (canonical JSON), python,
+               numpy, platform, time
+    samples    run (int32), metric (int8), value (float32)
+
+A run keeps its raw samples rather than summaries: per-frame wall times of
+the per-frame latency measurement (latency_ms) and per-frame raw pitch
+accuracy, 100 or 0 (rpa). The comparator resamples them:
+
+    compare    median latency and mean RPA of the newest commit against the
+               runs of the previous commits on the same machine, detector and
+               parameters. Runs are resampled first and frames within each run
+               second, so the interval also covers run-to-run noise once there
+               are two or more baseline runs; a single candidate run is given
+               the run effects seen between them. A change is a regression
+               when its whole 95% interval is worse than MIN_EFFECT, and
+               nothing is flagged against a single baseline run.
+
+Usage:
+    python benchmark_history.py record [--detectors YIN OneBitPitch] [--param threshold=0.1]
+    python benchmark_history.py compare [--baseline-runs 5]     # exit status 1 on regression
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import benchmark_pitch_detectors
+import detectors
+import pitch_eval
+
+DEFAULT_HISTORY = Path(__file__).parent.parent / 'data' / 'benchmark_history.npz'
+
+# metric -> (statistic, direction of improvement, smallest change reported)
+METRICS = {
+    'latency_ms': (np.median, -1, 0.05),       # relative change of the median
+    'rpa': (np.mean, +1, 0.5),                 # percentage points
+}
+METRIC_NAMES = list(METRICS)
+
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+MIN_BASELINE_RUNS = 2               # Below this run-to-run noise is unknown: nothing is flagged
+
+SOFTWARE_COLUMNS = ('python', 'numpy', 'platform')
+RUN_COLUMNS = ('commit', 'machine', 'detector', 'params') + SOFTWARE_COLUMNS
+
+
+# ============================================================================
+#  STORE
+# ============================================================================
+
+def git_commit():
+    """Abbreviated commit of the working tree, '-dirty' when it has changes."""
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=Path(__file__).parent,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def hardware_info():
+    return {
+        'processor': platform.processor() or platform.machine(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def software_info():
+    info = benchmark_pitch_detectors.machine_info()
+    return {name: info[name] for name in SOFTWARE_COLUMNS}
+
+
+def machine_fingerprint():
+    info = json.dumps(hardware_info(), sort_keys=True)
+    return hashlib.sha1(info.encode()).hexdigest()[:12]
+
+
+def params_key(params):
+    return json.dumps(params or {}, sort_keys=True)
+
+
+class History:
+    """Run and sample columns of a history file (empty when it does not exist)."""
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        self.path = Path(path)
+        if self.path.exists():
+            with np.load(self.path) as data:
+                self.run_time = data['run_time']
+                # Files written before the software columns existed read as ''
+                self.runs = {name: data[f'run_{name}'].astype(str) if f'run_{name}' in data.files
+                             else np.full(len(self.run_time), '') for name in RUN_COLUMNS}
+                self.sample_run = data['sample_run']
+                self.sample_metric = data['sample_metric']
+                self.sample_value = data['sample_value']
+        else:
+            self.runs = {name: np.array([], dtype=str) for name in RUN_COLUMNS}
+            self.run_time = np.array([], dtype=np.float64)
+            self.sample_run = np.array([], dtype=np.int32)
+            self.sample_metric = np.array([], dtype=np.int8)
+            self.sample_value = np.array([], dtype=np.float32)
+
+    def __len__(self):
+        return len(self.run_time)
+
+    def append(self, commit, machine, detector, params, metrics, timestamp=None, software=None):
+        """Add one run; `metrics` maps METRICS names to sample arrays."""
+        run = len(self)
+        key = {'commit': commit, 'machine': machine, 'detector': detector,
+               'params': params_key(params), **(software or software_info())}
+        for name in RUN_COLUMNS:
+            self.runs[name] = np.append(self.runs[name], key[name])
+        self.run_time = np.append(self.run_time, time.time() if timestamp is None else timestamp)
+        for metric, values in metrics.items():
+            values = np.asarray(values, dtype=np.float32).ravel()
+            self.sample_run = np.append(self.sample_run, np.full(len(values), run, np.int32))
+            self.sample_metric = np.append(self.sample_metric,
+                                           np.full(len(values), METRIC_NAMES.index(metric), np.int8))
+            self.sample_value = np.append(self.sample_value, values)
+        return run
+
+    def save(self):
+        """Rewrite the file through a temporary one, so a crash never truncates it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp.npz')
+        np.savez_compressed(temporary, run_time=self.run_time, sample_run=self.sample_run,
+                            sample_metric=self.sample_metric, sample_value=self.sample_value,
+                            **{f'run_{name}': self.runs[name] for name in RUN_COLUMNS})
+        os.replace(temporary, self.path)
+
+    def values(self, run, metric):
+        mask = (self.sample_run == run) & (self.sample_metric == METRIC_NAMES.index(metric))
+        return self.sample_value[mask].astype(np.float64)
+
+    def select(self, **key):
+        """Runs matching every given column, oldest first."""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in key.items():
+            mask &= self.runs[name] == (params_key(value) if name == 'params' else value)
+        runs = np.flatnonzero(mask)
+        return runs[np.argsort(self.run_time[runs], kind='stable')]
+
+    def series(self):
+        """Distinct (machine, detector, params) keys."""
+        keys = zip(self.runs['machine'], self.runs['detector'], self.runs['params'])
+        return list(dict.fromkeys(keys))
+
+
+# ============================================================================
+#  BOOTSTRAP COMPARISON
+# ============================================================================
+
+def bootstrap(runs, statistic, n_boot=BOOTSTRAP_SAMPLES, rng=None):
+    """
+    Bootstrap distribution of `statistic` over a list of sample arrays:
+    each replicate draws the runs with replacement, then the values of each
+    drawn run with replacement.
+    """
+    rng = np.random.default_rng(0) if rng is None else rng
+    if len(runs) == 1:
+        values = runs[0]
+        return statistic(values[rng.integers(len(values), size=(n_boot, len(values)))], axis=1)
+    replicates = np.empty(n_boot)
+    for b in range(n_boot):
+        chosen = rng.integers(len(runs), size=len(runs))
+        replicates[b] = statistic(np.concatenate(
+            [runs[k][rng.integers(len(runs[k]), size=len(runs[k]))] for k in chosen]))
+    return replicates
+
+
+def compare(baseline, candidate, metric, n_boot=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE,
+            seed=0):
+    """
+    Change of `metric` from the baseline runs to the candidate runs (lists
+    of sample arrays), with its bootstrap interval: relative for latency,
+    in percentage points for accuracy.
+    """
+    statistic, direction, min_effect = METRICS[metric]
+    rng = np.random.default_rng(seed)
+    base = bootstrap(baseline, statistic, n_boot, rng)
+    cand = bootstrap(candidate, statistic, n_boot, rng)
+    base_value = statistic(np.concatenate(baseline))
+    cand_value = statistic(np.concatenate(candidate))
+    relative = metric != 'rpa'
+    if len(candidate) == 1 and len(baseline) > 1:
+        # A single candidate run says nothing about its own run-to-run noise;
+        # it gets the run effects seen between the baseline runs
+        run_values = np.array([statistic(values) for values in baseline])
+        effects = run_values / run_values.mean() if relative else run_values - run_values.mean()
+        drawn = effects[rng.integers(len(effects), size=n_boot)]
+        cand = cand * drawn if relative else cand + drawn
+    if relative:
+        change, replicates = cand_value / base_value - 1, cand / base - 1
+    else:
+        change, replicates = cand_value - base_value, cand - base
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(replicates, [tail, 100 - tail])
+    # Worse means a positive change for latency, a negative one for accuracy
+    worse_low, worse_high = sorted((-direction * low, -direction * high))
+    return {
+        'baseline': float(base_value), 'candidate': float(cand_value),
+        'change': float(change), 'ci': (float(low), float(high)),
+        'baseline_runs': len(baseline), 'candidate_runs': len(candidate),
+        'regression': bool(worse_low > min_effect and len(baseline) >= MIN_BASELINE_RUNS),
+        'improvement': bool(worse_high < -min_effect and len(baseline) >= MIN_BASELINE_RUNS),
+    }
+
+
+def compare_latest(history, baseline_runs=5, commit=None, **options):
+    """
+    compare() for every series with runs of `commit` (default: the commit of
+    the newest run) against up to baseline_runs runs of earlier commits.
+    """
+    if not len(history):
+        return []
+    commit = commit or history.runs['commit'][np.argmax(history.run_time)]
+    rows = []
+    for machine, detector, params in history.series():
+        runs = history.select(machine=machine, detector=detector)
+        runs = runs[history.runs['params'][runs] == params]
+        is_candidate = history.runs['commit'][runs] == commit
+        candidate = runs[is_candidate]
+        if not len(candidate):
+            continue
+        earlier = runs[~is_candidate & (history.run_time[runs] < history.run_time[candidate].min())]
+        if not len(earlier):
+            continue
+        baseline = earlier[-baseline_runs:]
+        # Software that differs between the baseline and the candidate runs
+        software = {name: (sorted(set(history.runs[name][baseline])),
+                           sorted(set(history.runs[name][candidate])))
+                    for name in SOFTWARE_COLUMNS}
+        software = {name: versions for name, versions in software.items()
+                    if versions[0] != versions[1]}
+        for metric in METRICS:
+            result = compare([history.values(r, metric) for r in baseline],
+                             [history.values(r, metric) for r in candidate], metric, **options)
+            rows.append({'machine': machine, 'detector': detector, 'params': params,
+                         'metric': metric, 'commit': commit,
+                         'baseline_commits': sorted(set(history.runs['commit'][baseline])),
+                         'software_changes': software, **result})
+    return rows
+
+
+def trend(history, machine, detector, params='{}', baseline_runs=5, n_boot=200):
+    """
+    Per commit of one series, oldest first: the statistic of every metric
+    with its bootstrap interval, and compare() against the runs before it.
+    """
+    runs = history.select(machine=machine, detector=detector)
+    runs = runs[history.runs['params'][runs] == params]
+    commits = list(dict.fromkeys(history.runs['commit'][runs]))
+    points = []
+    for commit in commits:
+        at_commit = runs[history.runs['commit'][runs] == commit]
+        earlier = runs[history.run_time[runs] < history.run_time[at_commit].min()]
+        point = {'commit': commit, 'time': float(history.run_time[at_commit].min())}
+        for metric, (statistic, _, _) in METRICS.items():
+            samples = [history.values(r, metric) for r in at_commit]
+            replicates = bootstrap(samples, statistic, n_boot)
+            tail = (1 - CONFIDENCE) / 2 * 100
+            point[metric] = {'value': float(statistic(np.concatenate(samples))),
+                             'ci': tuple(np.percentile(replicates, [tail, 100 - tail]))}
+            if len(earlier):
+                point[metric]['compare'] = compare(
+                    [history.values(r, metric) for r in earlier[-baseline_runs:]], samples,
+                    metric, n_boot)
+        points.append(point)
+    return points
+
+
+# ============================================================================
+#  RECORDING
+# ============================================================================
+
+def measure_run(name, params, frames, f0_true, fs, repeats, warmup, latency_frames):
+    """{metric: samples} of one detector, measured as benchmark_pitch_detectors does."""
+    detect = detectors.create(name, **params)
+    detect(frames[:warmup], fs)
+    f0_est, _ = detect(frames, fs)
+    wall, _ = benchmark_pitch_detectors.measure_latency(detect, frames[:latency_frames], fs,
+                                                        repeats, warmup)
+    correct = benchmark_pitch_detectors.correct_frames(f0_est, f0_true)
+    return {'latency_ms': wall * 1000, 'rpa': correct * 100.0}
+
+
+def record(history, names, params, frames, f0_true, commit=None, repeats=3, warmup=20,
+           latency_frames=300):
+    """Measure every detector and append its run; returns the new run indices."""
+    commit = commit or git_commit()
+    machine = machine_fingerprint()
+    fs = benchmark_pitch_detectors.FS
+    runs = []
+    for name in names:
+        metrics = measure_run(name, params, frames, f0_true, fs, repeats, warmup,
+                              min(latency_frames, len(frames)))
+        runs.append(history.append(commit, machine, name, params, metrics))
+    return runs
+
+
+def parse_params(specs):
+    """['threshold=0.1', 'decimation=4'] -> {'threshold': 0.1, 'decimation': 4}."""
+    params = {}
+    for spec in specs:
+        name, _, value = spec.partition('=')
+        params[name] = pitch_eval.parse_value(value)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['record', 'compare'])
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument('--detectors', nargs='+', default=['YIN'],
+                        choices=benchmark_pitch_detectors.FRAME_DETECTORS)
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                        help='detector parameter (applied to every detector given)')
+    parser.add_argument('--commit', help='commit label (default: git describe --dirty)')
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--latency-frames', type=int, default=300)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--baseline-runs', type=int, default=5)
+    args = parser.parse_args()
+
+    history = History(args.history)
+    if args.command == 'record':
+        frames, f0_true = benchmark_pitch_detectors.synthetic_corpus(args.frames)
+        params = parse_params(args.param)
+        runs = record(history, args.detectors, params, frames, f0_true, args.commit,
+                      args.repeats, latency_frames=args.latency_frames)
+        history.save()
+        for run in runs:
+            latency = np.median(history.values(run, 'latency_ms'))
+            rpa = np.mean(history.values(run, 'rpa'))
+            print(f'{history.runs["detector"][run]:<16} {history.runs["commit"][run]:<16} '
+                  f'p50 {latency:.4f} ms, RPA {rpa:.2f}%')
+        print(f'{len(history)} runs in {args.history} ({args.history.stat().st_size / 1024:.0f} KB)')
+        return
+
+    rows = compare_latest(history, args.baseline_runs, args.commit)
+    if not rows:
+        print('Nothing to compare: record runs of at least two commits first')
+        return
+    print(f'Commit {rows[0]["commit"]} against up to {args.baseline_runs} earlier runs '
+          f'({CONFIDENCE * 100:.0f}% bootstrap intervals)')
+    print(f'{"Detector":<16} {"Params":<22} {"Metric":<11} {"baseline":>9} {"now":>9} '
+          f'{"change":>9} {"interval":>21} {"runs":>5}')
+    for row in rows:
+        unit = ' pp' if row['metric'] == 'rpa' else '%'
+        scale = 1 if row['metric'] == 'rpa' else 100
+        low, high = (v * scale for v in row['ci'])
+        flag = 'REGRESSION' if row['regression'] else 'improved' if row['improvement'] else ''
+        print(f'{row["detector"]:<16} {row["params"]:<22} {row["metric"]:<11} '
+              f'{row["baseline"]:>9.4f} {row["candidate"]:>9.4f} '
+              f'{row["change"] * scale:>+7.2f}{unit:<2} [{low:>+8.2f}, {high:>+8.2f}]{unit:<2} '
+              f'{row["baseline_runs"]:>5}  {flag}')
+    changes = {name: versions for row in rows for name, versions in row['software_changes'].items()}
+    for name, (before, after) in changes.items():
+        print(f'Note: {name} changed since the baseline: {", ".join(before) or "unknown"} -> '
+              f'{", ".join(after) or "unknown"}')
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
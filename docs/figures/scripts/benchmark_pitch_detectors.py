@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pitch Detector Benchmark Harness
+Measures latency and accuracy of real detector implementations for Figure 1
+Mambo Whistle Technical Report
+
+Every detector is run on a labelled corpus: either a generated corpus
+(corpus.py, streamed from its memory maps) or, by default, an in-memory set
+of harmonic test frames with known F0. Latency is measured per frame (one
+detector call per frame, as in the real-time path) after a warm-up phase,
+repeated several times, with both wall-clock and CPU time recorded. Results are written to
+data/pitch_detector_benchmark.json, which Figure 1 loads.
+
+Usage:
+    python benchmark_pitch_detectors.py [--frames 2000] [--repeats 5]
+    python benchmark_pitch_detectors.py --corpus ../data/corpus
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import corpus
+import detectors
+
+FS = 44100
+FRAME_LENGTH = 1024
+F0_RANGE = (80.0, 800.0)        # Worklet minFrequency / maxFrequency
+CENTS_TOLERANCE = 50            # Raw pitch accuracy tolerance
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'pitch_detector_benchmark.json'
+
+
+# Registered detectors that work on independent frames; sequential ones
+# (PYIN) need whole recordings and are evaluated with pitch_eval.py
+FRAME_DETECTORS = [name for name, cls in detectors.DETECTORS.items() if not cls.sequential]
+
+
+# ============================================================================
+#  LABELLED CORPUS
+# ============================================================================
+
+def synthetic_corpus(n_frames, frame_length=FRAME_LENGTH, fs=FS, snr_db=30.0, seed=0):
+    """
+    Harmonic frames (8 partials with 1/h^0.8 roll-off, as in Figure 5) at
+    log-uniform random F0s, with white noise at the given SNR.
+    Returns (frames, f0_true).
+    """
+    rng = np.random.default_rng(seed)
+    f0 = np.exp(rng.uniform(np.log(F0_RANGE[0]), np.log(F0_RANGE[1]), n_frames))
+    t = np.arange(frame_length) / fs
+
+    frames = np.zeros((n_frames, frame_length))
+    for h in range(1, 9):
+        phase = rng.uniform(0, 2 * np.pi, (n_frames, 1))
+        partial = np.sin(2 * np.pi * h * f0[:, np.newaxis] * t + phase) / h ** 0.8
+        # Drop partials above Nyquist
+        frames += partial * (h * f0[:, np.newaxis] < fs / 2)
+
+    power = np.mean(frames ** 2, axis=1, keepdims=True)
+    noise = rng.standard_normal(frames.shape) * np.sqrt(power / 10 ** (snr_db / 10))
+    frames += noise
+    frames /= np.max(np.abs(frames), axis=1, keepdims=True)
+    return frames * 0.9, f0
+
+
+def correct_frames(f0_est, f0_true, tolerance=CENTS_TOLERANCE):
+    """Mask of frames whose estimate is within `tolerance` cents."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cents = np.abs(1200 * np.log2(f0_est / f0_true))
+    return cents <= tolerance
+
+
+def raw_pitch_accuracy(f0_est, f0_true, tolerance=CENTS_TOLERANCE):
+    """Percentage of frames whose estimate is within `tolerance` cents."""
+    return float(np.mean(correct_frames(f0_est, f0_true, tolerance)) * 100)
+
+
+# ============================================================================
+#  MEASUREMENT
+# ============================================================================
+
+def measure_latency(detect, frames, fs, repeats, warmup):
+    """Per-frame wall and CPU time (seconds) over `repeats` passes."""
+    for i in range(warmup):
+        detect(frames[i % len(frames)][np.newaxis], fs)
+
+    wall = np.empty((repeats, len(frames)))
+    cpu_total = 0.0
+    for r in range(repeats):
+        cpu_start = time.process_time()
+        for i in range(len(frames)):
+            start = time.perf_counter()
+            detect(frames[i:i + 1], fs)
+            wall[r, i] = time.perf_counter() - start
+        cpu_total += time.process_time() - cpu_start
+
+    return wall.ravel(), cpu_total / wall.size
+
+
+def benchmark_detector(detect, frames, f0_true, fs, repeats, warmup, latency_frames):
+    detect(frames[:warmup], fs)
+    start = time.perf_counter()
+    f0_est, _ = detect(frames, fs)
+    batch_time = (time.perf_counter() - start) / len(frames)
+
+    wall, cpu = measure_latency(detect, frames[:latency_frames], fs, repeats, warmup)
+    p50, p95, p99 = np.percentile(wall * 1000, [50, 95, 99])
+
+    return {
+        'latency': round(float(p50), 4),
+        'latency_p95': round(float(p95), 4),
+        'latency_p99': round(float(p99), 4),
+        'cpu_time': round(cpu * 1000, 4),
+        'batch_time': round(batch_time * 1000, 4),
+        'accuracy': round(raw_pitch_accuracy(f0_est, f0_true), 2),
+    }
+
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=2000, help='labelled frames for accuracy')
+    parser.add_argument('--latency-frames', type=int, default=500,
+                        help='frames timed individually per repeat')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--snr', type=float, default=30.0, help='in-memory corpus SNR in dB')
+    parser.add_argument('--corpus', type=Path, help='generated corpus directory (corpus.py)')
+    parser.add_argument('--hop', type=int, default=FRAME_LENGTH,
+                        help='frame hop when sampling frames from --corpus')
+    parser.add_argument('--detectors', nargs='+', default=FRAME_DETECTORS,
+                        choices=list(detectors.DETECTORS))
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    if args.corpus:
+        frames, f0_true = corpus.Corpus(args.corpus).labelled_frames(
+            FRAME_LENGTH, args.hop, args.frames)
+        corpus_name = str(args.corpus)
+    else:
+        frames, f0_true = synthetic_corpus(args.frames, snr_db=args.snr)
+        corpus_name = f'synthetic (SNR {args.snr:.0f} dB)'
+    print(f'Corpus: {corpus_name}, {len(frames)} voiced frames x {FRAME_LENGTH} samples')
+    print(f'{"Detector":<16} {"p50 (ms)":>9} {"p95 (ms)":>9} {"p99 (ms)":>9} '
+          f'{"CPU (ms)":>9} {"RPA (%)":>8}')
+
+    results = {}
+    for name in args.detectors:
+        detect = detectors.create(name)
+        stats = benchmark_detector(detect, frames, f0_true, FS, args.repeats,
+                                   args.warmup, min(args.latency_frames, len(frames)))
+        results[name] = {**stats, 'category': detect.category}
+        print(f'{name:<16} {stats["latency"]:>9.3f} {stats["latency_p95"]:>9.3f} '
+              f'{stats["latency_p99"]:>9.3f} {stats["cpu_time"]:>9.3f} {stats["accuracy"]:>8.2f}')
+
+    report = {
+        'generated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'config': {
+            'fs': FS,
+            'frame_length': FRAME_LENGTH,
+            'frames': len(frames),
+            'corpus': corpus_name,
+            'repeats': args.repeats,
+            'warmup': args.warmup,
+            'cents_tolerance': CENTS_TOLERANCE,
+        },
+        'algorithms': results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
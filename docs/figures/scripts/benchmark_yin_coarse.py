@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-Fine YIN Benchmark
+Cost and accuracy of the decimated lag search against full-rate YIN
+Mambo Whistle Technical Report
+
+Harmonic test frames (benchmark_pitch_detectors.synthetic_corpus model) are
+placed on a log grid of F0 over the whole 80 .. 800 Hz range, with random
+phases at each noise level. Frames are 2048 samples: with minFrequency 80
+at 44.1 kHz the lag search must reach 551 samples, past the W = 512 of a
+1024-sample frame.
+
+For each decimation factor the benchmark reports:
+
+    us/frame       NumPy time of yin.detect_pitch_batch, best of --repeats
+    loop madds     multiply-adds of the time-domain search per frame, the
+                   form of Figure 5 and js/pitch-worklet.js: full rate
+                   sum_{tau<W} (N - tau); coarse-to-fine the decimation
+                   filter, the same search on N/q samples and W/q lags,
+                   and B N for the full-rate band
+    agreement      frames whose lag equals the full-rate lag
+    max diff       largest F0 difference (cents) on agreeing frames
+    GPE            gross pitch errors (> 20 % off the true F0)
+
+per F0 octave and overall. Results go to data/yin_coarse.json.
+
+Usage:
+    python benchmark_yin_coarse.py [--factors 2 4 8] [--snr 30 10] [--repeats 3]
+                                   [--frame-length 2048]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import pitch_metrics
+import yin
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'yin_coarse.json'
+
+FS = 44100
+FRAME_LENGTH = 2048
+F0_RANGE = (80.0, 800.0)
+OCTAVES = [(80, 160), (160, 320), (320, 640), (640, 800)]
+
+
+def test_frames(n_f0, per_f0, frame_length=FRAME_LENGTH, fs=FS, snr_db=30.0, seed=0):
+    """Harmonic frames (8 partials, 1/h^0.8) on a log F0 grid; returns (frames, f0)."""
+    rng = np.random.default_rng(seed)
+    f0 = np.repeat(np.geomspace(*F0_RANGE, n_f0), per_f0)
+    t = np.arange(frame_length) / fs
+    frames = np.zeros((len(f0), frame_length))
+    for h in range(1, 9):
+        phase = rng.uniform(0, 2 * np.pi, (len(f0), 1))
+        frames += (np.sin(2 * np.pi * h * f0[:, np.newaxis] * t + phase) / h ** 0.8
+                   * (h * f0[:, np.newaxis] < fs / 2))
+    power = np.mean(frames ** 2, axis=1, keepdims=True)
+    frames += rng.standard_normal(frames.shape) * np.sqrt(power / 10 ** (snr_db / 10))
+    return 0.9 * frames / np.max(np.abs(frames), axis=1, keepdims=True), f0
+
+
+def loop_madds(N, W, factor=1):
+    """Multiply-adds per frame of the time-domain lag search."""
+    if factor == 1:
+        return sum(N - tau for tau in range(1, W))
+    taps = len(yin.decimation_filter(factor))
+    N_coarse = (N - taps) // factor + 1
+    W_coarse = min(-(-W // factor) + 1, N_coarse - 1)
+    band = 2 * (factor + yin.BAND_MARGIN) + 4
+    return (N_coarse * taps + sum(N_coarse - tau for tau in range(1, W_coarse))
+            + band * N + 4 * N)
+
+
+def best_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def accuracy(f0_est, tau, f0_true, tau_full, f0_full):
+    agree = tau == tau_full
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff = np.abs(1200 * np.log2(f0_est / f0_full))
+    gross = np.abs(f0_est / f0_true - 1) > pitch_metrics.GROSS_ERROR
+    return {'agreement': float(np.mean(agree)),
+            'max_diff_cents': float(np.max(diff[agree], initial=0.0)),
+            'gpe': float(np.mean(gross))}
+
+
+def run(frames, f0_true, factors, repeats):
+    """Rows per factor (1 = full rate), each with overall and per-octave accuracy."""
+    N = frames.shape[1]
+    W = N // 2
+    results = {}
+    for factor in [1] + list(factors):
+        yin.detect_pitch_batch(frames[:16], FS, decimation=factor)
+        seconds = best_time(lambda: yin.detect_pitch_batch(frames, FS, decimation=factor), repeats)
+        f0, _, tau, _ = yin.detect_pitch_batch(frames, FS, decimation=factor)
+        if factor == 1:
+            f0_full, tau_full = f0, tau
+        row = {'us_per_frame': seconds / len(frames) * 1e6, 'loop_madds': loop_madds(N, W, factor)}
+        row.update(accuracy(f0, tau, f0_true, tau_full, f0_full))
+        row['octaves'] = {}
+        for low, high in OCTAVES:
+            band = (f0_true >= low) & (f0_true <= high)
+            row['octaves'][f'{low}-{high}'] = accuracy(f0[band], tau[band], f0_true[band],
+                                                       tau_full[band], f0_full[band])
+        results[factor] = row
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--factors', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--snr', type=float, nargs='+', default=[30.0, 10.0])
+    parser.add_argument('--f0-count', type=int, default=400, help='F0 grid points')
+    parser.add_argument('--per-f0', type=int, default=10, help='random-phase frames per F0')
+    parser.add_argument('--frame-length', type=int, default=FRAME_LENGTH)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    report = {'fs': FS, 'frame_length': args.frame_length, 'f0_range': F0_RANGE, 'snr': {}}
+    for snr in args.snr:
+        frames, f0_true = test_frames(args.f0_count, args.per_f0, args.frame_length, snr_db=snr)
+        results = run(frames, f0_true, args.factors, args.repeats)
+        report['snr'][str(snr)] = results
+
+        full = results[1]
+        print(f'SNR {snr:.0f} dB, {len(frames)} frames of {args.frame_length} samples, '
+              f'{F0_RANGE[0]:.0f}-{F0_RANGE[1]:.0f} Hz')
+        print(f'{"factor":>6} {"us/frame":>9} {"speedup":>8} {"loop madds":>11} {"saved":>6} '
+              f'{"agree (%)":>10} {"max diff":>9} {"GPE (%)":>8}   agreement per octave (%)')
+        for factor, row in results.items():
+            octaves = ' '.join(f'{o["agreement"] * 100:6.2f}' for o in row['octaves'].values())
+            print(f'{factor:>6} {row["us_per_frame"]:>9.1f} '
+                  f'{full["us_per_frame"] / row["us_per_frame"]:>7.2f}x {row["loop_madds"]:>11,} '
+                  f'{full["loop_madds"] / row["loop_madds"]:>5.1f}x '
+                  f'{row["agreement"] * 100:>10.2f} {row["max_diff_cents"]:>9.1e} '
+                  f'{row["gpe"] * 100:>8.2f}   {octaves}')
+        print(f'{"":>75}' + ' '.join(f'{f"{lo}-{hi}":>6}' for lo, hi in OCTAVES))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
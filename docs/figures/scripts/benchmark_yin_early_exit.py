@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Early-Exit YIN Benchmark
+Work saved by stopping the lag search at the first confirmed dip
+Mambo Whistle Technical Report
+
+yin.detect_pitch_early_exit evaluates d(tau) and the running CMNDF in
+blocks of LAG_BLOCK lags and drops a frame once its first dip below the
+threshold has a computed successor. The result equals the full search; the
+work is what the benchmark measures, on worklet frames (1024 samples, hop
+512, frames below minVolumeThreshold skipped) of:
+
+    whistle    corpus.py whistle clips (500 .. 2000 Hz, near-pure sines)
+    voice      corpus.py voice and glide clips (80 .. 800 Hz, 8 harmonics)
+    <name>     WAV recordings given with --wav (audio_reader.py)
+
+Per material, per band of the detected F0 and for frames without a dip
+(which search every lag) it reports the lags evaluated (% of W), the
+multiply-adds saved by the time-domain loop of Figure 5 and
+js/pitch-worklet.js (sum of N - tau over the lags evaluated), the frames
+that exit early, and the agreement with full-rate YIN. NumPy times are
+given for the FFT kernel and for the blocked search with and without the
+exit; only the last two are comparable. Results go to
+data/yin_early_exit.json.
+
+Usage:
+    python benchmark_yin_early_exit.py [--clips 300] [--wav whistle.wav voice.wav]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import audio_reader
+import corpus
+import yin
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'yin_early_exit.json'
+
+FS = 44100
+FRAME_LENGTH = 1024
+HOP = 512
+F0_BANDS = [(0, 200), (200, 500), (500, 1000), (1000, 2000), (2000, FS / 2)]    # Hz
+
+
+# ============================================================================
+#  MATERIAL
+# ============================================================================
+
+def analysed_frames(audio, frame_length=FRAME_LENGTH, hop=HOP):
+    """Worklet frames of each clip (rows of `audio`) that pass the volume gate."""
+    windows = np.lib.stride_tricks.sliding_window_view(audio, frame_length, axis=-1)
+    frames = np.asarray(windows[..., ::hop, :], dtype=np.float64).reshape(-1, frame_length)
+    return frames[np.sqrt(np.mean(frames ** 2, axis=1)) >= yin.MIN_VOLUME]
+
+
+def corpus_material(n_clips, duration=1.0, fs=FS, seed=0):
+    """{'whistle': frames, 'voice': frames} from synthesized corpus clips."""
+    rng = np.random.default_rng(seed)
+    audio, _, metadata = corpus.synthesize_batch(rng, n_clips, int(duration * fs), fs,
+                                                 (10.0, 20.0, 30.0))
+    whistle = np.array([clip['kind'] == 'whistle' for clip in metadata])
+    return {'whistle': analysed_frames(audio[whistle]), 'voice': analysed_frames(audio[~whistle])}
+
+
+def wav_material(paths, max_seconds):
+    """{file stem: frames} of WAV recordings, read through the memory map."""
+    material = {}
+    for path in paths:
+        reader = audio_reader.AudioReader(path)
+        if reader.fs != FS:
+            print(f'Note: {path} is {reader.fs} Hz; lags are counted at that rate')
+        samples = reader.read(0, min(len(reader), int(max_seconds * reader.fs)))
+        material[Path(path).stem] = analysed_frames(samples[np.newaxis])
+    return material
+
+
+# ============================================================================
+#  MEASUREMENT
+# ============================================================================
+
+def loop_madds(lags, N, W):
+    """Time-domain multiply-adds for the first `lags` lags (d(tau) sums N - tau products)."""
+    lags = np.minimum(lags, W)
+    return (lags - 1) * N - (lags - 1) * lags / 2
+
+
+def best_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def work_summary(lags, f0, tau, tau_full, N, W):
+    full = loop_madds(W, N, W)
+    return {
+        'frames': int(len(lags)),
+        'lags_pct': float(np.mean(lags) / W * 100),
+        'madds_saved_pct': float((1 - np.mean(loop_madds(lags, N, W)) / full) * 100),
+        'early_exit_pct': float(np.mean(lags < W) * 100),
+        'agreement_pct': float(np.mean(tau == tau_full) * 100),
+        'median_f0': float(np.median(f0)) if len(f0) else 0.0,
+    }
+
+
+def measure(frames, fs=FS, repeats=3):
+    """Work saved overall and per detected-F0 band, and NumPy times (us/frame)."""
+    N = frames.shape[1]
+    W = N // 2
+    f0, confidence, tau, _, lags = yin.detect_pitch_early_exit(frames, fs)
+    _, _, tau_full, _ = yin.detect_pitch_batch(frames, fs)
+    result = work_summary(lags, f0, tau, tau_full, N, W)
+    # Frames without a dip below the threshold search every lag
+    dip = confidence > 1 - yin.DEFAULT_THRESHOLD
+    groups = {f'F0 {low:.0f}-{high:.0f} Hz': dip & (f0 >= low) & (f0 < high)
+              for low, high in F0_BANDS}
+    groups['no dip'] = ~dip
+    result['groups'] = {name: work_summary(lags[group], f0[group], tau[group],
+                                           tau_full[group], N, W)
+                        for name, group in groups.items() if group.any()}
+
+    sample = frames[:2000]
+    timings = {
+        'fft': lambda: yin.detect_pitch_batch(sample, fs),
+        'blocked': lambda: yin.detect_pitch_early_exit(sample, fs, threshold=0.0),
+        'early_exit': lambda: yin.detect_pitch_early_exit(sample, fs),
+    }
+    result['us_per_frame'] = {name: best_time(fn, repeats) / len(sample) * 1e6
+                              for name, fn in timings.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clips', type=int, default=300, help='corpus clips to synthesize')
+    parser.add_argument('--wav', type=Path, nargs='*', default=[], help='recordings to add')
+    parser.add_argument('--max-seconds', type=float, default=600.0,
+                        help='audio read from each recording')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    material = corpus_material(args.clips)
+    material.update(wav_material(args.wav, args.max_seconds))
+
+    report = {'fs': FS, 'frame_length': FRAME_LENGTH, 'hop': HOP, 'lag_block': yin.LAG_BLOCK,
+              'threshold': yin.DEFAULT_THRESHOLD, 'material': {}}
+    header = (f'{"":<16} {"frames":>7} {"lags (%W)":>10} {"madds saved":>12} '
+              f'{"exit (%)":>9} {"agree (%)":>10}')
+    for name, frames in material.items():
+        result = measure(frames, repeats=args.repeats)
+        report['material'][name] = result
+        times = result['us_per_frame']
+        print(f'{name}: {result["frames"]} frames, median F0 {result["median_f0"]:.0f} Hz; '
+              f'us/frame FFT {times["fft"]:.0f}, blocked {times["blocked"]:.0f}, '
+              f'early exit {times["early_exit"]:.0f}')
+        print(header)
+        rows = [('all', result)] + list(result['groups'].items())
+        for label, row in rows:
+            print(f'{label:<16} {row["frames"]:>7} {row["lags_pct"]:>10.1f} '
+                  f'{row["madds_saved_pct"]:>11.1f}% {row["early_exit_pct"]:>9.1f} '
+                  f'{row["agreement_pct"]:>10.2f}')
+        print()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
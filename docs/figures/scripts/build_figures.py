@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Figure Build Runner
+Rebuilds only the figures whose inputs changed, in parallel
+Mambo Whistle Technical Report
+
+Every figureN_*.py script is fingerprinted with a content hash of
+    - the script itself and the local modules it imports (transitively),
+      which includes the shared style/export helpers,
+    - the data files listed in its FIGURE_INPUTS,
+    - the matplotlib and NumPy versions.
+Figures whose fingerprint matches the last successful build (and whose
+outputs still exist) are skipped; the rest render in a process pool.
+
+Usage:
+    python build_figures.py [--jobs 4] [--force] [figure1 figure7 ...]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import local_modules
+
+SCRIPTS_PATH = Path(__file__).parent
+FIGURES_PATH = SCRIPTS_PATH.parent
+OUTPUT_PATH = FIGURES_PATH / 'output'
+CACHE_FILE = OUTPUT_PATH / '.build-cache.json'
+OUTPUT_FORMATS = ('png', 'pdf', 'svg')
+
+
+# ============================================================================
+#  DEPENDENCY DISCOVERY
+# ============================================================================
+
+def find_figures(names=None):
+    """figureN_*.py scripts, optionally filtered by stem prefix (e.g. 'figure5')."""
+    scripts = sorted(SCRIPTS_PATH.glob('figure[0-9]*_*.py'),
+                     key=lambda p: int(p.stem[6:].split('_')[0]))
+    if names:
+        scripts = [s for s in scripts if any(s.stem.split('_')[0] == n or s.stem == n
+                                             for n in names)]
+    return scripts
+
+
+def figure_inputs(path):
+    """Data files named by the script's module-level FIGURE_INPUTS list."""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    for node in tree.body:
+        if (isinstance(node, ast.Assign)
+                and any(isinstance(t, ast.Name) and t.id == 'FIGURE_INPUTS' for t in node.targets)):
+            return [FIGURES_PATH / p for p in ast.literal_eval(node.value)]
+    return []
+
+
+def dependencies(script):
+    """Every file whose content affects the figure, sorted for stable hashing."""
+    return sorted({*local_modules.closure(script), *figure_inputs(script)})
+
+
+def _hash_file(digest, path):
+    digest.update(str(path.relative_to(FIGURES_PATH)).encode())
+    if not path.exists():
+        digest.update(b'<missing>')
+        return
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+
+def fingerprint(script):
+    import matplotlib
+    import numpy
+
+    digest = hashlib.sha256()
+    digest.update(f'matplotlib {matplotlib.__version__} numpy {numpy.__version__}'.encode())
+    for path in dependencies(script):
+        _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+def outputs_exist(script):
+    return all((OUTPUT_PATH / f'{script.stem}.{fmt}').exists() for fmt in OUTPUT_FORMATS)
+
+
+# ============================================================================
+#  RENDERING
+# ============================================================================
+
+def render(script):
+    """Run one figure script in this (worker) process; returns (stem, seconds, error)."""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    if str(SCRIPTS_PATH) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_PATH))
+
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    try:
+        runpy.run_path(str(script), run_name='__main__')
+        error = None
+    except Exception as exc:        # Report and keep building the other figures
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        plt.close('all')
+    return script.stem, time.perf_counter() - start, error
+
+
+def load_cache():
+    if CACHE_FILE.exists():
+        return json.loads(CACHE_FILE.read_text())
+    return {}
+
+
+def save_cache(cache):
+    OUTPUT_PATH.mkdir(exist_ok=True)
+    CACHE_FILE.write_text(json.dumps(cache, indent=2, sort_keys=True) + '\n')
+
+
+def build(names=None, jobs=None, force=False):
+    """Build stale figures. Returns the list of figures that failed."""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    cache = load_cache()
+
+    stale = {}
+    for script in find_figures(names):
+        digest = fingerprint(script)
+        if not force and cache.get(script.stem) == digest and outputs_exist(script):
+            print(f'  up to date  {script.stem}')
+        else:
+            stale[script] = digest
+
+    failed = []
+    if stale:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=jobs or min(len(stale), os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(render, script): script for script in stale}
+            for future in as_completed(futures):
+                script = futures[future]
+                stem, seconds, error = future.result()
+                if error:
+                    failed.append(stem)
+                    cache.pop(stem, None)
+                    print(f'  FAILED      {stem}: {error}')
+                else:
+                    cache[stem] = stale[script]
+                    print(f'  built       {stem} ({seconds:.1f} s)')
+        print(f'Rebuilt {len(stale) - len(failed)} figure(s) in '
+              f'{time.perf_counter() - start:.1f} s')
+    else:
+        print('Nothing to rebuild')
+
+    save_cache(cache)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('figures', nargs='*', help='figure names, e.g. figure1 (default: all)')
+    parser.add_argument('--jobs', type=int, help='worker processes (default: one per figure)')
+    parser.add_argument('--force', action='store_true', help='rebuild even if up to date')
+    args = parser.parse_args()
+
+    failed = build(args.figures, args.jobs, args.force)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
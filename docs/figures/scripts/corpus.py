@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Synthetic Vocal Corpus Generator
+Seeded, memory-mapped test corpus built on the Figure 5 harmonic model
+Mambo Whistle Technical Report
+
+Each clip is one of three kinds:
+    voice    8 harmonics with 1/h^0.8 roll-off (as in Figure 5) plus vibrato
+    glide    the same harmonic model sweeping between two pitches
+    whistle  near-pure sine tone in the whistling range, light vibrato
+with breath noise at a chosen SNR and optional silence gaps. A per-sample
+ground-truth F0 contour (0 where unvoiced) is stored next to the audio.
+
+Clips are synthesized in vectorized batches and written to float32 .npy
+files opened as memory maps, so neither generation nor reading needs the
+whole corpus in RAM:
+
+    <corpus>/audio.npy    float32 (n_clips, clip_length)
+    <corpus>/f0.npy       float32 (n_clips, clip_length)
+    <corpus>/index.json   generation settings and per-clip metadata
+
+Usage:
+    python corpus.py --output ../data/corpus --clips 2000 --duration 1.0
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'corpus'
+
+KINDS = ('voice', 'glide', 'whistle')
+KIND_PROBABILITIES = (0.5, 0.25, 0.25)
+
+# Pitch ranges in Hz (voice range follows the worklet's min/maxFrequency)
+VOICE_RANGE = (80.0, 800.0)
+WHISTLE_RANGE = (500.0, 2000.0)
+
+NUM_HARMONICS = 8
+GAP_PROBABILITY = 0.5           # Chance that a clip contains silence gaps
+MAX_GAPS = 2
+GAP_LENGTH = (0.05, 0.3)        # Seconds
+
+
+# ============================================================================
+#  BATCH SYNTHESIS
+# ============================================================================
+
+def _log_uniform(rng, low, high, size):
+    return np.exp(rng.uniform(np.log(low), np.log(high), size))
+
+
+def f0_contours(rng, kind, n_samples, fs):
+    """Per-sample F0 (Hz) for a batch of clips, shape (batch, n_samples)."""
+    n = len(kind)
+    t = np.arange(n_samples) / fs
+    is_whistle = kind == 'whistle'
+    is_glide = kind == 'glide'
+
+    base = np.where(is_whistle,
+                    _log_uniform(rng, *WHISTLE_RANGE, n),
+                    _log_uniform(rng, *VOICE_RANGE, n))
+
+    # Vibrato: 4-7 Hz, up to 50 cents on voice, 15 cents on whistles
+    rate = rng.uniform(4.0, 7.0, n)
+    depth = rng.uniform(0.0, 50.0, n) * np.where(is_whistle, 0.3, 1.0)
+    vibrato_phase = rng.uniform(0, 2 * np.pi, n)
+    cents = depth[:, np.newaxis] * np.sin(
+        2 * np.pi * rate[:, np.newaxis] * t + vibrato_phase[:, np.newaxis])
+
+    # Glides: smoothstep in log-frequency to a target up to an octave away
+    interval = rng.uniform(-1200.0, 1200.0, n) * is_glide
+    ramp = t / t[-1] if n_samples > 1 else t
+    ramp = ramp * ramp * (3 - 2 * ramp)
+    cents = cents * ~is_glide[:, np.newaxis] + interval[:, np.newaxis] * ramp
+
+    f0 = base[:, np.newaxis] * 2 ** (cents / 1200)
+    low, high = VOICE_RANGE[0], WHISTLE_RANGE[1]
+    return np.clip(f0, low, high), base
+
+
+def gap_mask(rng, n, n_samples, fs):
+    """Boolean (batch, n_samples) mask that is True inside silence gaps."""
+    count = rng.integers(1, MAX_GAPS + 1, n) * (rng.random(n) < GAP_PROBABILITY)
+    length = (rng.uniform(*GAP_LENGTH, (n, MAX_GAPS)) * fs).astype(int)
+    start = (rng.random((n, MAX_GAPS)) * np.maximum(n_samples - length, 1)).astype(int)
+    used = np.arange(MAX_GAPS) < count[:, np.newaxis]
+
+    idx = np.arange(n_samples)
+    inside = ((idx >= start[:, :, np.newaxis])
+              & (idx < (start + length)[:, :, np.newaxis])
+              & used[:, :, np.newaxis])
+    return inside.any(axis=1)
+
+
+def breath_noise(rng, shape):
+    """High-tilted noise (first difference of white noise), unit RMS."""
+    white = rng.standard_normal((shape[0], shape[1] + 1))
+    noise = np.diff(white, axis=1)
+    return noise / np.sqrt(np.mean(noise ** 2, axis=1, keepdims=True))
+
+
+def synthesize_batch(rng, n, n_samples, fs, snr_choices):
+    """
+    Synthesize n clips at once.
+    Returns (audio, f0, metadata) with audio/f0 of shape (n, n_samples).
+    """
+    kind = rng.choice(KINDS, n, p=KIND_PROBABILITIES)
+    f0, base = f0_contours(rng, kind, n_samples, fs)
+    phase = 2 * np.pi * np.cumsum(f0, axis=1) / fs
+
+    audio = np.zeros((n, n_samples))
+    is_whistle = (kind == 'whistle')[:, np.newaxis]
+    for h in range(1, NUM_HARMONICS + 1):
+        amplitude = 1 / h ** 0.8
+        # Whistles are close to sinusoidal: keep only a faint second partial
+        amplitude = np.where(is_whistle, 0.05 if h == 2 else float(h == 1), amplitude)
+        offset = rng.uniform(0, 2 * np.pi, (n, 1))
+        partial = np.sin(h * phase + offset) * (h * f0 < fs / 2)
+        audio += amplitude * partial
+
+    silent = gap_mask(rng, n, n_samples, fs)
+    audio[silent] = 0
+    f0 = np.where(silent, 0.0, f0)
+
+    # Breath noise relative to the power of the voiced part
+    snr_db = rng.choice(snr_choices, n)
+    voiced = ~silent
+    power = (np.sum(audio ** 2, axis=1) / np.maximum(voiced.sum(axis=1), 1))
+    audio += breath_noise(rng, audio.shape) * np.sqrt(power / 10 ** (snr_db / 10))[:, np.newaxis]
+
+    peak = np.max(np.abs(audio), axis=1, keepdims=True)
+    audio *= 0.9 / np.maximum(peak, 1e-12)
+
+    metadata = [
+        {'kind': str(k), 'f0': round(float(b), 3), 'snr_db': float(s),
+         'voiced_fraction': round(float(v), 4)}
+        for k, b, s, v in zip(kind, base, snr_db, voiced.mean(axis=1))
+    ]
+    return audio, f0, metadata
+
+
+def generate(output, n_clips, duration, fs=44100, snr_choices=(10.0, 20.0, 30.0),
+             seed=0, batch_size=64):
+    """Write a corpus of n_clips clips to the directory `output`."""
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    n_samples = int(round(duration * fs))
+
+    audio_map = open_memmap(output / 'audio.npy', mode='w+', dtype=np.float32,
+                            shape=(n_clips, n_samples))
+    f0_map = open_memmap(output / 'f0.npy', mode='w+', dtype=np.float32,
+                         shape=(n_clips, n_samples))
+
+    clips = []
+    for batch_index, start in enumerate(range(0, n_clips, batch_size)):
+        # One independent stream per batch keeps clips reproducible from the seed
+        rng = np.random.default_rng([seed, batch_index])
+        n = min(batch_size, n_clips - start)
+        audio, f0, metadata = synthesize_batch(rng, n, n_samples, fs, np.asarray(snr_choices))
+        audio_map[start:start + n] = audio
+        f0_map[start:start + n] = f0
+        clips.extend(metadata)
+
+    audio_map.flush()
+    f0_map.flush()
+    del audio_map, f0_map
+
+    index = {
+        'fs': fs,
+        'clip_length': n_samples,
+        'seed': seed,
+        'batch_size': batch_size,
+        'snr_choices': list(map(float, snr_choices)),
+        'clips': clips,
+    }
+    (output / 'index.json').write_text(json.dumps(index, indent=1) + '\n')
+    return Corpus(output)
+
+
+# ============================================================================
+#  READING
+# ============================================================================
+
+class Corpus:
+    """Read-only, memory-mapped view of a generated corpus."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index = json.loads((self.path / 'index.json').read_text())
+        self.fs = self.index['fs']
+        self.clips = self.index['clips']
+        self.audio = np.load(self.path / 'audio.npy', mmap_mode='r')
+        self.f0 = np.load(self.path / 'f0.npy', mmap_mode='r')
+
+    def __len__(self):
+        return len(self.clips)
+
+    def __getitem__(self, i):
+        """(audio, f0) views of clip i; nothing is read until accessed."""
+        return self.audio[i], self.f0[i]
+
+    def iter_batches(self, batch_size=64):
+        """Yield (start, audio, f0) for consecutive blocks of clips."""
+        for start in range(0, len(self), batch_size):
+            yield start, self.audio[start:start + batch_size], self.f0[start:start + batch_size]
+
+    def labelled_frames(self, frame_length, hop, max_frames=None):
+        """
+        Fully voiced analysis frames and their ground-truth F0 (taken at the
+        frame centre), gathered clip block by clip block.
+        """
+        frames, truth = [], []
+        total = 0
+        for _, audio, f0 in self.iter_batches():
+            windows = np.lib.stride_tricks.sliding_window_view(audio, frame_length, axis=1)
+            f0_windows = np.lib.stride_tricks.sliding_window_view(f0, frame_length, axis=1)
+            windows = windows[:, ::hop].reshape(-1, frame_length)
+            f0_windows = f0_windows[:, ::hop].reshape(-1, frame_length)
+
+            voiced = f0_windows.min(axis=1) > 0
+            frames.append(np.asarray(windows[voiced], dtype=np.float64))
+            truth.append(np.asarray(f0_windows[voiced, frame_length // 2], dtype=np.float64))
+            total += int(voiced.sum())
+            if max_frames is not None and total >= max_frames:
+                break
+
+        frames = np.concatenate(frames)[:max_frames]
+        truth = np.concatenate(truth)[:max_frames]
+        return frames, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--clips', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=1.0, help='clip length in seconds')
+    parser.add_argument('--fs', type=int, default=44100)
+    parser.add_argument('--snr', type=float, nargs='+', default=[10.0, 20.0, 30.0],
+                        help='breath-noise SNRs (dB) drawn per clip')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=64, help='clips synthesized per batch')
+    args = parser.parse_args()
+
+    corpus = generate(args.output, args.clips, args.duration, args.fs, args.snr,
+                      args.seed, args.batch)
+    size_mb = (corpus.audio.nbytes + corpus.f0.nbytes) / 1e6
+    kinds = {k: sum(c['kind'] == k for c in corpus.clips) for k in KINDS}
+    print(f'Wrote {len(corpus)} clips ({size_mb:.0f} MB) to {corpus.path}')
+    print('Kinds: ' + ', '.join(f'{k} {n}' for k, n in kinds.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Pitch Detector Registry
+Common batched interface for the detectors compared in the report
+Mambo Whistle Technical Report
+
+Every detector is a class with a `name`, a Figure 1 `category` and
+
+    detect_batch(frames, fs) -> (f0, confidence)
+
+over a (n_frames, N) stack of frames; f0 is 0 for frames judged unvoiced.
+Classes are added to DETECTORS with the @register decorator, and the
+evaluation engine (pitch_eval.py) and the benchmark harness
+(benchmark_pitch_detectors.py) look detectors up there by name.
+
+    YIN              worklet YIN with its voicing rules (yin.py)
+    PYIN             multi-threshold YIN decoded with Viterbi (pyin.py)
+    Autocorrelation  normalized autocorrelation, first major peak
+    OneBitPitch      YIN on sign bits: XOR + popcount over packed uint64 words
+    SWIPE            sawtooth-waveform-inspired estimator (SWIPE')
+
+Detectors with `sequential = True` treat the stack as consecutive frames of
+one recording; callers must not mix clips in one call.
+
+Usage:
+    python detectors.py [--frames 2000]     # accuracy and batch speed on test frames
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import audio_reader
+import pyin
+import yin
+import yin_sweep
+
+F0_RANGE = (80.0, 2000.0)       # Worklet minFrequency .. accepted maximum
+BLOCK_FRAMES = 256              # Frames per block where a detector needs scratch space
+
+# name -> detector class
+DETECTORS = {}
+
+
+def register(cls):
+    """Class decorator adding a detector to DETECTORS under its name."""
+    DETECTORS[cls.name] = cls
+    return cls
+
+
+def create(name, **params):
+    """Instantiate a registered detector with its parameters."""
+    try:
+        return DETECTORS[name](**params)
+    except KeyError:
+        raise ValueError(f'unknown detector {name!r}; choose from {", ".join(DETECTORS)}') from None
+
+
+class PitchDetector:
+    """Base class; subclasses set name and category and implement detect_batch."""
+
+    name = None
+    category = 'Classical'
+    sequential = False
+
+    def detect_batch(self, frames, fs):
+        raise NotImplementedError
+
+    def __call__(self, frames, fs):
+        return self.detect_batch(frames, fs)
+
+    def track(self, source, frame_length=1024, hop=512, fs=None,
+              block_frames=audio_reader.CHUNK_FRAMES):
+        """
+        (f0, confidence) for every frame of a 1-D signal or an
+        audio_reader.AudioReader (whose sample rate is used), one block of
+        frames at a time. Sequential detectors decode each block separately.
+        """
+        fs = getattr(source, 'fs', fs)
+        n_frames = audio_reader.count_frames(len(source), frame_length, hop)
+        f0, confidence = np.empty(n_frames), np.empty(n_frames)
+        for start, frames in audio_reader.frame_blocks(source, frame_length, hop, block_frames):
+            block = slice(start, start + len(frames))
+            f0[block], confidence[block] = self.detect_batch(frames, fs)
+        return f0, confidence
+
+
+def _volume_gate(frames, f0):
+    """Zero f0 where the frame RMS is below the worklet minVolumeThreshold."""
+    rms = np.sqrt(np.mean(np.square(frames), axis=-1))
+    return np.where(rms >= yin.MIN_VOLUME, f0, 0.0)
+
+
+def _popcount(words):
+    """Set bits per uint64 word (np.bitwise_count needs numpy >= 2.0)."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    counts = _POPCOUNT8[words.view(np.uint8)].reshape(words.shape + (8,))
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(
+    axis=1).astype(np.uint8)
+
+
+# ============================================================================
+#  YIN FAMILY
+# ============================================================================
+
+@register
+class Yin(PitchDetector):
+    """Batched YIN with the worklet's voicing rules."""
+
+    name = 'YIN'
+
+    def __init__(self, threshold=yin.DEFAULT_THRESHOLD, decimation=1, early_exit=False):
+        self.threshold = threshold
+        self.decimation = decimation        # > 1: coarse-to-fine lag search
+        self.early_exit = early_exit        # Blocked lag search, stops at the first dip
+
+    def detect_batch(self, frames, fs):
+        f0, confidence, _, _ = yin.detect_pitch_batch(frames, fs, self.threshold,
+                                                      decimation=self.decimation,
+                                                      early_exit=self.early_exit)
+        # confidence > 1 - threshold exactly when d' dipped below the threshold
+        voiced = ((confidence > 1 - self.threshold) & (confidence >= yin.MIN_CONFIDENCE)
+                  & (f0 >= 20) & (f0 <= 2000))
+        return _volume_gate(frames, np.where(voiced, f0, 0.0)), confidence
+
+
+@register
+class Pyin(PitchDetector):
+    """PYIN-style candidates and Viterbi decoding; frames form one track."""
+
+    name = 'PYIN'
+    sequential = True
+
+    def __init__(self, min_freq=pyin.F0_RANGE[0], max_freq=pyin.F0_RANGE[1]):
+        self.f0_range = (min_freq, max_freq)
+
+    def detect_batch(self, frames, fs):
+        cand_f0, cand_weight = pyin.frame_candidates(frames, fs, self.f0_range)
+        f0, _, confidence = pyin.viterbi_decode(cand_f0, cand_weight)
+        return f0, confidence
+
+
+@register
+class OneBitPitch(PitchDetector):
+    """
+    YIN on the sign of the signal. d(tau) is the Hamming distance between
+    the first W sign bits and the W bits starting at tau, computed as XOR
+    and popcount over packed uint64 words: 64 samples per operation.
+    The CMNDF, threshold and interpolation steps are YIN's.
+    """
+
+    name = 'OneBitPitch'
+
+    def __init__(self, threshold=0.3, min_freq=F0_RANGE[0], max_freq=F0_RANGE[1]):
+        self.threshold = threshold
+        self.f0_range = (min_freq, max_freq)
+
+    def difference(self, frames):
+        """Hamming distance d(tau) for tau in [0, W), W = 64 * floor(N / 128)."""
+        n_frames, N = frames.shape
+        n_words = N // 128
+        W = 64 * n_words
+        if n_words == 0:
+            raise ValueError(f'OneBitPitch needs frames of at least 128 samples, got {N}')
+
+        # shifted[:, s, q] is the word of bits [64 q + s, 64 q + s + 64): lag
+        # tau = 64 q + s reads words q .. q + n_words - 1 of shift s
+        n_lag_words = (W - 1) // 64 + n_words
+        # Lags reach bit 2W - 1 at most, so samples past the buffer are never read
+        width = min(N, n_lag_words * 64 + 64)
+        bits = np.zeros((n_frames, n_lag_words * 64 + 64), dtype=np.uint8)
+        bits[:, :width] = frames[:, :width] >= 0
+        windows = np.lib.stride_tricks.sliding_window_view(bits, n_lag_words * 64, axis=1)[:, :64]
+        shifted = np.packbits(windows, axis=-1, bitorder='little').view('<u8')
+
+        lags = np.arange(W)
+        words = (lags // 64)[:, np.newaxis] + np.arange(n_words)
+        base = shifted[:, 0, :n_words]
+        xor = shifted[:, (lags % 64)[:, np.newaxis], words] ^ base[:, np.newaxis, :]
+        return _popcount(xor).sum(axis=-1, dtype=np.int64).astype(np.float64)
+
+    def detect_batch(self, frames, fs):
+        frames = np.asarray(frames, dtype=np.float64)
+        f0 = np.zeros(len(frames))
+        confidence = np.zeros(len(frames))
+        for start in range(0, len(frames), BLOCK_FRAMES):
+            block = slice(start, start + BLOCK_FRAMES)
+            d_prime = yin.cumulative_mean_normalized_difference(self.difference(frames[block]))
+            sweep = yin_sweep.sweep_cmndf(d_prime, fs, [self.threshold], [self.f0_range])
+            f0[block] = sweep.f0[:, 0, 0]
+            confidence[block] = sweep.confidence[:, 0, 0]
+        return _volume_gate(frames, f0), confidence
+
+
+# ============================================================================
+#  AUTOCORRELATION
+# ============================================================================
+
+@register
+class Autocorrelation(PitchDetector):
+    """
+    Normalized autocorrelation n(tau) = 2 r(tau) / (E_head + E_tail), whose
+    energies are those of the YIN difference function, so n = 1 at a perfect
+    period. The first local peak within peak_ratio of the highest one in
+    range is taken (avoids the octave-down picks of a plain argmax).
+    """
+
+    name = 'Autocorrelation'
+
+    def __init__(self, min_clarity=0.5, peak_ratio=0.9, min_freq=F0_RANGE[0],
+                 max_freq=F0_RANGE[1]):
+        self.min_clarity = min_clarity
+        self.peak_ratio = peak_ratio
+        self.f0_range = (min_freq, max_freq)
+
+    def detect_batch(self, frames, fs):
+        x = np.asarray(frames, dtype=np.float64)
+        N = x.shape[-1]
+        W = N // 2
+        lo, hi = yin_sweep.lag_bounds(fs, self.f0_range[0], self.f0_range[1], W)
+
+        energy = np.zeros(x.shape[:-1] + (N + 1,))
+        np.cumsum(x * x, axis=-1, out=energy[..., 1:])
+        tau = np.arange(W)
+        norm = energy[..., N - tau] + energy[..., N:] - energy[..., tau]
+        acf = yin.autocorrelation(x, W)
+        nacf = np.divide(2 * acf, norm, out=np.zeros_like(acf), where=norm > 0)
+
+        # Local maxima inside [lo, hi)
+        search = nacf[:, lo - 1:hi + 1]
+        peak = np.zeros(search.shape, dtype=bool)
+        peak[:, 1:-1] = (search[:, 1:-1] > search[:, :-2]) & (search[:, 1:-1] >= search[:, 2:])
+        peak_value = np.where(peak, search, -np.inf)
+        top = peak_value.max(axis=1, keepdims=True)
+        has_peak = np.isfinite(top[:, 0])
+        chosen = np.argmax(peak_value >= self.peak_ratio * top, axis=1) + lo - 1
+
+        tau_refined, _ = yin.parabolic_interpolation(-nacf, chosen)
+        clarity = np.take_along_axis(nacf, chosen[:, np.newaxis], axis=1)[:, 0]
+        voiced = has_peak & (clarity >= self.min_clarity)
+        f0 = np.where(voiced, fs / np.where(voiced, tau_refined, 1.0), 0.0)
+        return _volume_gate(x, f0), np.where(has_peak, clarity, 0.0)
+
+
+# ============================================================================
+#  SWIPE'
+# ============================================================================
+
+def _primes_upto(n):
+    sieve = np.ones(n + 1, dtype=bool)
+    sieve[:2] = False
+    for k in range(2, int(n ** 0.5) + 1):
+        sieve[k * k::k] = False
+    return np.flatnonzero(sieve)
+
+
+@register
+class Swipe(PitchDetector):
+    """
+    Simplified SWIPE' (Camacho & Harris 2008): the square-root magnitude
+    spectrum is matched against one kernel per candidate F0, with a cosine
+    lobe at the fundamental and each prime harmonic (negative lobes halfway
+    between) and a 1/sqrt(f) envelope. Candidates are 1/48 octave apart; the
+    best one is refined by a parabola in log frequency. Kernels are built
+    once per (fs, n_fft) and scoring is one matrix product per block.
+    """
+
+    name = 'SWIPE'
+
+    def __init__(self, min_strength=0.2, min_freq=F0_RANGE[0], max_freq=F0_RANGE[1],
+                 resolution=48, max_harmonic_freq=5000.0, n_fft=4096):
+        self.min_strength = min_strength
+        self.f0_range = (min_freq, max_freq)
+        self.resolution = resolution
+        self.max_harmonic_freq = max_harmonic_freq
+        self.n_fft = n_fft
+        n_octaves = np.log2(max_freq / min_freq)
+        self.candidates = min_freq * 2 ** (np.arange(int(n_octaves * resolution) + 1)
+                                           / resolution)
+        self._kernels = {}
+
+    def kernels(self, fs, n_fft):
+        """Unit-norm kernels, shape (n_candidates, n_fft // 2 + 1)."""
+        key = (fs, n_fft)
+        if key not in self._kernels:
+            freqs = np.fft.rfftfreq(n_fft, 1 / fs)
+            ratio = freqs[np.newaxis, :] / self.candidates[:, np.newaxis]
+            nearest = np.round(ratio)
+            harmonics = np.concatenate([[1], _primes_upto(int(self.max_harmonic_freq
+                                                              / self.candidates[0]) + 1)])
+            lobe = np.cos(2 * np.pi * ratio)
+            lobe = np.where(lobe < 0, lobe / 2, lobe)
+            keep = (np.isin(nearest, harmonics) & (freqs <= self.max_harmonic_freq)
+                    & (ratio >= 0.5))
+            kernel = np.where(keep, lobe / np.sqrt(np.maximum(freqs, 1.0)), 0.0)
+            kernel /= np.linalg.norm(kernel, axis=1, keepdims=True)
+            self._kernels[key] = kernel
+        return self._kernels[key]
+
+    def detect_batch(self, frames, fs):
+        x = np.asarray(frames, dtype=np.float64)
+        n_fft = max(self.n_fft, 1 << int(np.ceil(np.log2(x.shape[-1]))))
+        kernel = self.kernels(fs, n_fft)
+        window = np.hanning(x.shape[-1])
+
+        f0 = np.zeros(len(x))
+        strength = np.zeros(len(x))
+        for start in range(0, len(x), BLOCK_FRAMES):
+            block = slice(start, start + BLOCK_FRAMES)
+            loudness = np.sqrt(np.abs(np.fft.rfft(x[block] * window, n_fft, axis=-1)))
+            norm = np.linalg.norm(loudness, axis=1, keepdims=True)
+            loudness = np.divide(loudness, norm, out=np.zeros_like(loudness), where=norm > 0)
+            scores = loudness @ kernel.T
+
+            best = np.argmax(scores, axis=1)
+            step, _ = yin.parabolic_interpolation(-scores, best)
+            f0[block] = self.f0_range[0] * 2 ** (np.clip(step, 0, len(self.candidates) - 1)
+                                                 / self.resolution)
+            strength[block] = scores[np.arange(len(best)), best]
+
+        f0 = np.where(strength >= self.min_strength, f0, 0.0)
+        return _volume_gate(x, f0), strength
+
+
+# ============================================================================
+#  QUICK CHECK
+# ============================================================================
+
+def main():
+    import benchmark_pitch_detectors
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--snr', type=float, default=30.0)
+    args = parser.parse_args()
+
+    frames, f0_true = benchmark_pitch_detectors.synthetic_corpus(args.frames, snr_db=args.snr)
+    fs = benchmark_pitch_detectors.FS
+    print(f'{"Detector":<16} {"Category":<10} {"RPA (%)":>8} {"voiced (%)":>11} {"us/frame":>9}')
+    for name, cls in DETECTORS.items():
+        detector = cls()
+        detector(frames[:16], fs)
+        start = time.perf_counter()
+        f0, _ = detector(frames, fs)
+        seconds = time.perf_counter() - start
+        accuracy = benchmark_pitch_detectors.raw_pitch_accuracy(f0, f0_true)
+        print(f'{name:<16} {cls.category:<10} {accuracy:>8.2f} {np.mean(f0 > 0) * 100:>11.2f} '
+              f'{seconds / len(frames) * 1e6:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Series Downsampling for Plots
+Reduce long series to the pixel budget of an axes before plotting
+Mambo Whistle Technical Report
+
+A line drawn through more points than its axes has pixel columns only adds
+render time and file size. Two reductions keep what the eye can see:
+
+    minmax_envelope   per pixel column the minimum and maximum (waveforms:
+                      the drawn band is the same as plotting every sample).
+                      minmax_reader() computes it chunk by chunk from an
+                      audio_reader.AudioReader, so the recording is never
+                      decoded as a whole.
+    lttb              Largest-Triangle-Three-Buckets: one point per bucket,
+                      the one spanning the largest triangle with the previous
+                      choice and the next bucket's mean (contours: keeps
+                      peaks and steps). NaN (unvoiced) buckets stay gaps.
+
+Both return at most a fixed number of points, so plotting cost no longer
+depends on the length of the input.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import numpy as np
+
+MINMAX_CHUNK_BINS = 4096            # Envelope bins decoded per reader chunk
+
+
+def pixel_budget(ax, dpi=300):
+    """Pixel columns of `ax` at the given export resolution."""
+    fig = ax.get_figure()
+    return max(int(ax.get_position().width * fig.get_figwidth() * dpi), 2)
+
+
+# ============================================================================
+#  MIN-MAX ENVELOPE
+# ============================================================================
+
+def minmax_envelope(values, n_bins):
+    """
+    (first sample of each bin, minimum, maximum) over n_bins near-equal
+    bins; series shorter than n_bins keep one bin per sample.
+    """
+    values = np.asarray(values)
+    n_bins = max(min(n_bins, len(values)), 1)
+    starts = np.linspace(0, len(values), n_bins + 1).astype(np.int64)[:-1]
+    return starts, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+
+
+def minmax_reader(reader, n_bins, chunk_bins=MINMAX_CHUNK_BINS):
+    """minmax_envelope of a whole AudioReader, decoding chunk_bins bins at a time."""
+    starts = np.unique(np.linspace(0, len(reader), n_bins + 1).astype(np.int64))
+    low = np.empty(len(starts) - 1)
+    high = np.empty(len(starts) - 1)
+    for first in range(0, len(starts) - 1, chunk_bins):
+        edges = starts[first:first + chunk_bins + 1]
+        samples = reader.read(edges[0], edges[-1])
+        offsets = edges[:-1] - edges[0]
+        low[first:first + len(offsets)] = np.minimum.reduceat(samples, offsets)
+        high[first:first + len(offsets)] = np.maximum.reduceat(samples, offsets)
+    return starts[:-1], low, high
+
+
+# ============================================================================
+#  LARGEST-TRIANGLE-THREE-BUCKETS
+# ============================================================================
+
+def lttb(x, y, n_out):
+    """
+    Indices of the LTTB selection of (x, y), at most n_out of them.
+
+    The first and last points are kept; the rest is split into n_out - 2
+    buckets. Buckets where y is all NaN select their first index (a gap);
+    after a gap the point farthest from the next bucket's mean is taken.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    valid = ~np.isnan(y[:-1])
+    # Mean of the valid points of every bucket (and of the last point)
+    counts = np.add.reduceat(valid, edges[:-1])
+    sum_x = np.add.reduceat(np.where(valid, x[:-1], 0), edges[:-1])
+    sum_y = np.add.reduceat(np.where(valid, y[:-1], 0), edges[:-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.append(sum_x / counts, x[-1])
+        mean_y = np.append(sum_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        bx, by = x[start:stop], y[start:stop]
+        if counts[b] == 0:
+            selected[b + 1] = previous = start
+            continue
+        cx, cy = mean_x[b + 1], mean_y[b + 1]
+        if np.isnan(cy):
+            cx, cy = x[stop - 1], np.nanmean(by)
+        if np.isnan(y[previous]):
+            score = np.abs(by - cy)
+        else:
+            px, py = x[previous], y[previous]
+            score = np.abs((px - cx) * (by - py) - (px - bx) * (cy - py))
+        pick = start + int(np.nanargmax(score))
+        selected[b + 1] = previous = pick
+    return selected
@@ -8,35 +8,37 @@ Author: Mambo Whistle Team
 Date: 2025
 """
 
+import json
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from pathlib import Path
+
+import figure_common
+
+# Data files (relative to docs/figures) read by this figure; used by build_figures.py
+FIGURE_INPUTS = ['data/pitch_detector_benchmark.json', 'data/op_counts.json']
 
 # ============================================================================
 #  CONFIGURATION
 # ============================================================================
 
-# Use Times New Roman font
-plt.rcParams['font.family'] = 'Times New Roman'
-plt.rcParams['mathtext.fontset'] = 'stix'
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.linewidth'] = 1.2
-plt.rcParams['axes.unicode_minus'] = False
+# Shared style: Times New Roman, STIX math, 1.2 pt axes (see figure_common.py)
+figure_common.apply_style(axes_linewidth=1.2)
 
 # Google brand colors
-GOOGLE_BLUE = np.array([66, 133, 244]) / 255
-GOOGLE_RED = np.array([234, 67, 53]) / 255
-GOOGLE_YELLOW = np.array([251, 188, 5]) / 255
-GOOGLE_GREEN = np.array([52, 168, 83]) / 255
-GOOGLE_GRAY = np.array([95, 99, 104]) / 255
+GOOGLE_BLUE = figure_common.GOOGLE_BLUE
+GOOGLE_RED = figure_common.GOOGLE_RED
+GOOGLE_YELLOW = figure_common.GOOGLE_YELLOW
+GOOGLE_GREEN = figure_common.GOOGLE_GREEN
+GOOGLE_GRAY = figure_common.GOOGLE_GRAY
 
 # ============================================================================
-#  DATA PREPARATION - Research-based accurate values
+#  DATA PREPARATION - Measured results, published values as fallback
 # ============================================================================
 
-# Algorithm data based on published research and benchmarks
-algorithms = {
+# Published values (ops: thousands per frame), used only for what the harnesses cannot measure
+cited_algorithms = {
     'YIN':              {'latency': 0.5,  'accuracy': 96.2, 'ops': 262,  'category': 'Classical'},
     'Autocorrelation':  {'latency': 0.3,  'accuracy': 89.5, 'ops': 131,  'category': 'Classical'},
     'CREPE':            {'latency': 2.1,  'accuracy': 98.4, 'ops': 4500, 'category': 'Neural'},
@@ -46,6 +48,26 @@ algorithms = {
     'SWIPE':            {'latency': 1.2,  'accuracy': 95.8, 'ops': 520,  'category': 'Classical'},
 }
 
+# Measured values from benchmark_pitch_detectors.py take precedence
+benchmark_file = figure_common.FIGURES_PATH / FIGURE_INPUTS[0]
+measured_algorithms = {}
+if benchmark_file.exists():
+    measured_algorithms = json.loads(benchmark_file.read_text())['algorithms']
+else:
+    print(f'No benchmark results at {benchmark_file}; plotting cited values only')
+
+# Traced operation counts from op_count.py replace the cited ones (thousands per frame)
+op_count_file = figure_common.FIGURES_PATH / FIGURE_INPUTS[1]
+traced_ops = {}
+if op_count_file.exists():
+    traced_ops = {name: {'ops': counts['ops'] / 1000}
+                  for name, counts in json.loads(op_count_file.read_text())['detectors'].items()}
+
+algorithms = {}
+for name in dict.fromkeys([*cited_algorithms, *measured_algorithms]):
+    algorithms[name] = {**cited_algorithms.get(name, {}), **measured_algorithms.get(name, {}),
+                        **traced_ops.get(name, {}), 'measured': name in measured_algorithms}
+
 # Label offsets to avoid overlap [dx_factor, dy]
 label_offsets = {
     'YIN':              (1.5, 0.6),
@@ -96,20 +118,23 @@ for name, data in algorithms.items():
     ops_norm = (ops - ops_min) / (ops_max - ops_min)
     bubble_size = 80 + ops_norm * 520
 
+    # Cited (not reproduced) values get a dashed outline
+    linestyle = '-' if data['measured'] else '--'
+
     # Color and marker based on category
     if name == 'YIN':
         # Special highlight for YIN (our choice)
         ax.scatter(latency, accuracy, s=bubble_size * 1.2,
                    c=[GOOGLE_GREEN], edgecolors=[0.2, 0.2, 0.2],
-                   alpha=0.85, linewidths=2.5, marker='*', zorder=10)
+                   alpha=0.85, linewidths=2.5, marker='*', linestyles=linestyle, zorder=10)
     elif category == 'Classical':
         ax.scatter(latency, accuracy, s=bubble_size,
                    c=[GOOGLE_BLUE], edgecolors=[0.3, 0.3, 0.3],
-                   alpha=0.7, linewidths=1, marker='o', zorder=5)
+                   alpha=0.7, linewidths=1, marker='o', linestyles=linestyle, zorder=5)
     else:  # Neural
         ax.scatter(latency, accuracy, s=bubble_size,
                    c=[GOOGLE_RED], edgecolors=[0.3, 0.3, 0.3],
-                   alpha=0.7, linewidths=1, marker='s', zorder=5)
+                   alpha=0.7, linewidths=1, marker='s', linestyles=linestyle, zorder=5)
 
 # ============================================================================
 #  LABELS FOR EACH ALGORITHM
@@ -118,7 +143,7 @@ for name, data in algorithms.items():
 for name, data in algorithms.items():
     latency = data['latency']
     accuracy = data['accuracy']
-    dx_factor, dy = label_offsets[name]
+    dx_factor, dy = label_offsets.get(name, (1.3, 0.7))
 
     ax.text(latency * dx_factor, accuracy + dy, name,
             fontname='Times New Roman', fontsize=9,
@@ -130,7 +155,8 @@ for name, data in algorithms.items():
 
 ax.set_xscale('log')
 ax.set_xlim(0.03, 15)
-ax.set_ylim(88, 99.5)
+max_accuracy = max(d['accuracy'] for d in algorithms.values())
+ax.set_ylim(88, min(max(99.5, max_accuracy + 0.5), 100.5))
 
 # X-axis ticks
 ax.set_xticks([0.05, 0.1, 0.5, 1, 2, 5, 10])
@@ -171,7 +197,12 @@ h_neural = plt.scatter([], [], s=120, c=[GOOGLE_RED], edgecolors=[0.3, 0.3, 0.3]
 h_yin = plt.scatter([], [], s=180, c=[GOOGLE_GREEN], edgecolors=[0.2, 0.2, 0.2],
                     alpha=0.85, marker='*', linewidths=2, label='YIN (Selected)')
 
-ax.legend(handles=[h_classical, h_neural, h_yin],
+legend_handles = [h_classical, h_neural, h_yin]
+if measured_algorithms and not all(d['measured'] for d in algorithms.values()):
+    legend_handles.append(plt.scatter([], [], s=120, facecolors='none', edgecolors=[0.3, 0.3, 0.3],
+                                      linestyles='--', marker='o', label='Published (not measured)'))
+
+ax.legend(handles=legend_handles,
           loc='lower right', frameon=False,
           prop={'family': 'Times New Roman', 'size': 10})
 
@@ -179,7 +210,7 @@ ax.legend(handles=[h_classical, h_neural, h_yin],
 #  BUBBLE SIZE LEGEND (annotation)
 # ============================================================================
 
-ax.text(0.85, 0.92, 'Bubble Size:\nComputational\nCost (ops/frame)',
+ax.text(0.85, 0.92, 'Bubble Size:\nComputational\nCost (kops/frame)',
         transform=ax.transAxes, fontname='Times New Roman', fontsize=9,
         ha='center', va='top')
 
@@ -189,24 +220,14 @@ ax.text(0.85, 0.92, 'Bubble Size:\nComputational\nCost (ops/frame)',
 
 plt.tight_layout()
 
-# Output paths
-script_path = Path(__file__).parent
-output_path = script_path.parent / 'output'
-output_path.mkdir(exist_ok=True)
-
-# Export as PNG (300 DPI)
-fig.savefig(output_path / 'figure1_pitch_detection_comparison.png',
-            dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as PDF (vector)
-fig.savefig(output_path / 'figure1_pitch_detection_comparison.pdf',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as SVG (vector)
-fig.savefig(output_path / 'figure1_pitch_detection_comparison.svg',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
+# Export as PNG (300 DPI), PDF and SVG (vector)
+output_path = figure_common.save_figure(fig, 'figure1_pitch_detection_comparison')
 
 print('Figure 1 exported successfully!')
+if measured_algorithms:
+    print(f'Measured: {", ".join(measured_algorithms)} ({benchmark_file.name})')
+if traced_ops:
+    print(f'Traced op counts: {", ".join(traced_ops)} ({op_count_file.name})')
 print(f'Output location: {output_path}')
 
 plt.show()
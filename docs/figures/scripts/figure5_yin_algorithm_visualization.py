@@ -10,25 +10,26 @@ Date: 2025
 
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
+
+import figure_common
+import yin
+
+# Data files (relative to docs/figures) read by this figure; used by build_figures.py
+FIGURE_INPUTS = []
 
 # ============================================================================
 #  CONFIGURATION
 # ============================================================================
 
-# Use Times New Roman font
-plt.rcParams['font.family'] = 'Times New Roman'
-plt.rcParams['mathtext.fontset'] = 'stix'
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.linewidth'] = 1.0
-plt.rcParams['axes.unicode_minus'] = False
+# Shared style: Times New Roman, STIX math, 1.0 pt axes (see figure_common.py)
+figure_common.apply_style(axes_linewidth=1.0)
 
 # Google brand colors
-GOOGLE_BLUE = np.array([66, 133, 244]) / 255
-GOOGLE_RED = np.array([234, 67, 53]) / 255
-GOOGLE_YELLOW = np.array([251, 188, 5]) / 255
-GOOGLE_GREEN = np.array([52, 168, 83]) / 255
-GOOGLE_GRAY = np.array([95, 99, 104]) / 255
+GOOGLE_BLUE = figure_common.GOOGLE_BLUE
+GOOGLE_RED = figure_common.GOOGLE_RED
+GOOGLE_YELLOW = figure_common.GOOGLE_YELLOW
+GOOGLE_GREEN = figure_common.GOOGLE_GREEN
+GOOGLE_GRAY = figure_common.GOOGLE_GRAY
 
 # ============================================================================
 #  GENERATE SYNTHETIC VOCAL SIGNAL (F0 = 220 Hz, A3)
@@ -61,56 +62,20 @@ signal = signal / np.max(np.abs(signal)) * 0.9
 # ============================================================================
 
 W = N // 2  # Integration window (half of buffer)
-
-# Step 1: Squared Difference Function
-d = np.zeros(W)
-for tau in range(1, W):
-    for j in range(N - tau):
-        d[tau] += (signal[j] - signal[j + tau]) ** 2
-
-# Step 2: Cumulative Mean Normalized Difference Function
-d_prime = np.ones(W)
-cumsum_d = 0
-for tau in range(1, W):
-    cumsum_d += d[tau]
-    if cumsum_d > 0:
-        d_prime[tau] = d[tau] / (cumsum_d / tau)
-
-# Step 3: Absolute Threshold
 threshold = 0.15
-tau_estimate = 0
-
-for tau in range(2, W):
-    if d_prime[tau] < threshold:
-        # Find local minimum
-        while tau + 1 < W and d_prime[tau + 1] < d_prime[tau]:
-            tau += 1
-        tau_estimate = tau
-        break
 
-# Fallback if no threshold crossing
-if tau_estimate == 0:
-    tau_estimate = np.argmin(d_prime[2:]) + 2
+# Steps 1-4: Difference function, CMNDF, absolute threshold, parabolic interpolation
+yin_result = yin.detect_pitch(signal, fs, threshold, W)
 
-# Step 4: Parabolic Interpolation
-if 1 < tau_estimate < W - 1:
-    y_prev = d_prime[tau_estimate - 1]
-    y_curr = d_prime[tau_estimate]
-    y_next = d_prime[tau_estimate + 1]
-
-    denominator = y_prev - 2 * y_curr + y_next
-    if abs(denominator) > 1e-10:
-        delta = 0.5 * (y_prev - y_next) / denominator
-    else:
-        delta = 0
-    tau_refined = tau_estimate + delta
-else:
-    tau_refined = tau_estimate
-    delta = 0
+d = yin_result.d
+d_prime = yin_result.d_prime
+tau_estimate = yin_result.tau_estimate
+tau_refined = yin_result.tau_refined
+delta = yin_result.delta
 
 # Calculate detected frequency
-f0_detected = fs / tau_refined
-confidence = 1 - d_prime[tau_estimate]
+f0_detected = yin_result.f0
+confidence = yin_result.confidence
 
 # ============================================================================
 #  FIGURE SETUP - 4 PANEL LAYOUT
@@ -296,22 +261,8 @@ ax4.legend(handles=legend_elements, loc='upper right', frameon=False,
 #  EXPORT FIGURE
 # ============================================================================
 
-# Output paths
-script_path = Path(__file__).parent
-output_path = script_path.parent / 'output'
-output_path.mkdir(exist_ok=True)
-
-# Export as PNG (300 DPI)
-fig.savefig(output_path / 'figure5_yin_algorithm_visualization.png',
-            dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as PDF (vector)
-fig.savefig(output_path / 'figure5_yin_algorithm_visualization.pdf',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as SVG (vector)
-fig.savefig(output_path / 'figure5_yin_algorithm_visualization.svg',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
+# Export as PNG (300 DPI), PDF and SVG (vector)
+output_path = figure_common.save_figure(fig, 'figure5_yin_algorithm_visualization')
 
 print('Figure 5 exported successfully!')
 print(f'Detected F0: {f0_detected:.2f} Hz (True: {f0_true} Hz)')
@@ -8,29 +8,34 @@ Author: Mambo Whistle Team
 Date: 2025
 """
 
+import json
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch
-from pathlib import Path
+
+import figure_common
+import karplus_strong
+import latency_trace
+import worklet_sim
+
+# Data files (relative to docs/figures) read by this figure; used by build_figures.py
+FIGURE_INPUTS = ['data/latency_trace.jsonl', 'data/worklet_sim.json', 'data/karplus_strong.json']
 
 # ============================================================================
 #  CONFIGURATION
 # ============================================================================
 
-# Use Times New Roman font
-plt.rcParams['font.family'] = 'Times New Roman'
-plt.rcParams['mathtext.fontset'] = 'stix'
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.linewidth'] = 1.2
-plt.rcParams['axes.unicode_minus'] = False
+# Shared style: Times New Roman, STIX math, 1.2 pt axes (see figure_common.py)
+figure_common.apply_style(axes_linewidth=1.2)
 
 # Google brand colors
-GOOGLE_BLUE = np.array([66, 133, 244]) / 255
-GOOGLE_RED = np.array([234, 67, 53]) / 255
-GOOGLE_YELLOW = np.array([251, 188, 5]) / 255
-GOOGLE_GREEN = np.array([52, 168, 83]) / 255
-GOOGLE_GRAY = np.array([95, 99, 104]) / 255
+GOOGLE_BLUE = figure_common.GOOGLE_BLUE
+GOOGLE_RED = figure_common.GOOGLE_RED
+GOOGLE_YELLOW = figure_common.GOOGLE_YELLOW
+GOOGLE_GREEN = figure_common.GOOGLE_GREEN
+GOOGLE_GRAY = figure_common.GOOGLE_GRAY
 
 # Extended palette for 7 stages (audio thread: blues/greens, main thread: yellows/reds)
 STAGE_COLORS = [
@@ -47,7 +52,7 @@ STAGE_COLORS = [
 #  LATENCY DATA (precise measurements from system)
 # ============================================================================
 
-# Stage data based on actual system measurements
+# Stage means based on actual system measurements (used when no trace exists)
 stages = [
     ('Microphone Capture',   1.5,  'Audio Thread'),
     ('Buffer Accumulation', 12.0,  'Audio Thread'),
@@ -62,8 +67,38 @@ stage_names = [s[0] for s in stages]
 latencies = np.array([s[1] for s in stages])
 thread_types = [s[2] for s in stages]
 
-# Total latency
-total_latency = np.sum(latencies)
+# A per-frame stage-timestamp trace (JSON-lines) replaces the means with
+# p50/p95/p99 bars; it is streamed through fixed-size histograms
+trace_file = latency_trace.DEFAULT_TRACE
+if trace_file.exists():
+    trace_summary = latency_trace.summarize_trace(trace_file, stage_names=stage_names)
+    bar_rows = [(f'p{q}', row) for q, row in
+                zip(trace_summary.quantiles, trace_summary.stage_quantiles)]
+    latencies = trace_summary.stage_quantiles[0]
+else:
+    trace_summary = None
+    bar_rows = [('Mean', latencies)]
+
+# Without a trace, the render-quantum simulator (worklet_sim.py) supplies
+# measured means for the audio-thread stages it replays
+simulation = None
+if trace_summary is None and worklet_sim.DEFAULT_OUTPUT.exists():
+    simulation = json.loads(worklet_sim.DEFAULT_OUTPUT.read_text())
+    for name in worklet_sim.SIMULATED_STAGES:
+        latencies[stage_names.index(name)] = simulation['stages'][name]['mean']
+
+# ... and the offline Karplus-Strong renderer (karplus_strong.py) the
+# synthesis cost per pitch frame
+if trace_summary is None and karplus_strong.DEFAULT_OUTPUT.exists():
+    synthesis = json.loads(karplus_strong.DEFAULT_OUTPUT.read_text())
+    latencies[stage_names.index('Synthesis Processing')] = synthesis['block_ms']['mean']
+
+# Total latency: the p50 of the per-frame end-to-end time when a trace is
+# present (stage p50s do not add up to it), otherwise the sum of the means
+if trace_summary is not None:
+    total_latency = trace_summary.total_quantiles[0]
+else:
+    total_latency = np.sum(latencies)
 
 # Cumulative latencies for positioning
 cumulative = np.cumsum(latencies)
@@ -83,25 +118,46 @@ fig.patch.set_facecolor('white')
 bar_y = 0.5
 bar_height = 0.25
 
-# Draw each segment
-for i, (name, latency) in enumerate(zip(stage_names, latencies)):
-    x_start = cumulative[i]
-
-    # Create rounded rectangle
-    rect = FancyBboxPatch(
-        (x_start, bar_y - bar_height/2), latency, bar_height,
-        boxstyle="round,pad=0,rounding_size=0.02",
-        facecolor=STAGE_COLORS[i],
-        edgecolor=[0.3, 0.3, 0.3],
-        linewidth=1
-    )
-    ax.add_patch(rect)
-
-    # Add latency value inside bar (if wide enough)
-    if latency > 2:
-        ax.text(x_start + latency/2, bar_y, f'{latency:.1f} ms',
-                fontname='Times New Roman', fontsize=9, fontweight='bold',
-                ha='center', va='center', color='white')
+# Percentile bars are stacked above the comparison bars, p50 on top
+if len(bar_rows) == 1:
+    row_height = bar_height
+    row_ys = [bar_y]
+else:
+    row_height = 0.07
+    row_ys = 0.62 - np.arange(len(bar_rows)) * 0.09
+
+for row_index, (row_label, row_latencies) in enumerate(bar_rows):
+    row_y = row_ys[row_index]
+    row_cumulative = np.insert(np.cumsum(row_latencies), 0, 0)
+
+    # Draw each segment
+    for i, (name, latency) in enumerate(zip(stage_names, row_latencies)):
+        x_start = row_cumulative[i]
+
+        # Create rounded rectangle
+        rect = FancyBboxPatch(
+            (x_start, row_y - row_height/2), latency, row_height,
+            boxstyle="round,pad=0,rounding_size=0.02",
+            facecolor=STAGE_COLORS[i],
+            edgecolor=[0.3, 0.3, 0.3],
+            linewidth=1
+        )
+        ax.add_patch(rect)
+
+        # Add latency value inside bar (if wide enough)
+        if latency > 2 * len(bar_rows):
+            ax.text(x_start + latency/2, row_y, f'{latency:.1f} ms',
+                    fontname='Times New Roman', fontsize=9 if len(bar_rows) == 1 else 7,
+                    fontweight='bold', ha='center', va='center', color='white')
+
+    if trace_summary is not None:
+        # Percentile label and end-to-end quantile (not the sum of stage quantiles)
+        ax.text(-1, row_y, row_label, fontname='Times New Roman', fontsize=8,
+                ha='right', va='center', color=[0.2, 0.2, 0.2])
+        ax.text(row_cumulative[-1] + 1, row_y,
+                f'{trace_summary.total_quantiles[row_index]:.1f} ms end-to-end',
+                fontname='Times New Roman', fontsize=7, ha='left', va='center',
+                color=[0.3, 0.3, 0.3])
 
 # ============================================================================
 #  100ms REFERENCE LINE
@@ -112,6 +168,14 @@ ax.text(100, bar_y + 0.38, '100 ms Perceptual Threshold',
         fontname='Times New Roman', fontsize=10, fontweight='bold',
         ha='center', color=GOOGLE_RED)
 
+if simulation is not None:
+    ax.text(0, bar_y + bar_height/2 + 0.04,
+            f'Audio-thread stages simulated over {simulation["quanta"]} render quanta: '
+            f'p99 quantum compute {simulation["quantum_ms"]["p99"]:.2f} ms of '
+            f'{simulation["deadline_ms"]:.1f} ms, {simulation["deadline_misses"]} deadline misses',
+            fontname='Times New Roman', fontsize=7, ha='left', va='center',
+            color=[0.3, 0.3, 0.3])
+
 # ============================================================================
 #  THREAD BOUNDARY INDICATOR
 # ============================================================================
@@ -128,7 +192,7 @@ ax.text(cumulative[4] / 2, 0.18, 'AudioWorklet Thread',
         fontname='Times New Roman', fontsize=9, fontstyle='italic',
         ha='center', color=GOOGLE_BLUE * 0.8)
 
-ax.text(boundary_x + (total_latency - boundary_x) / 2, 0.18, 'Main Thread',
+ax.text(boundary_x + (cumulative[-1] - boundary_x) / 2, 0.18, 'Main Thread',
         fontname='Times New Roman', fontsize=9, fontstyle='italic',
         ha='center', color=GOOGLE_RED * 0.8)
 
@@ -221,13 +285,14 @@ ax.text(80, 0.28, f'{improvement:.1f}× improvement',
 #  PERCENTAGE BREAKDOWN BOX
 # ============================================================================
 
-# Calculate percentages
-audio_thread_latency = np.sum(latencies[:4])
-main_thread_latency = np.sum(latencies[5:])
-audio_pct = audio_thread_latency / total_latency * 100
-main_pct = main_thread_latency / total_latency * 100
+# Calculate percentages of the mean total: stage means add up, stage p50s do not
+share_latencies = trace_summary.stage_means if trace_summary is not None else latencies
+audio_thread_latency = np.sum(share_latencies[:4])
+main_thread_latency = np.sum(share_latencies[5:])
+audio_pct = audio_thread_latency / np.sum(share_latencies) * 100
+main_pct = main_thread_latency / np.sum(share_latencies) * 100
 
-table_str = (f'Latency Distribution:\n'
+table_str = (f'Latency Distribution{" (mean)" if trace_summary is not None else ""}:\n'
              f'Audio Thread: {audio_pct:.1f}% ({audio_thread_latency:.1f} ms)\n'
              f'Main Thread: {main_pct:.1f}% ({main_thread_latency:.1f} ms)')
 
@@ -241,11 +306,12 @@ ax.text(0.88, 0.55, table_str, transform=ax.transAxes,
 #  AXIS CONFIGURATION
 # ============================================================================
 
-ax.set_xlim(0, 120)
+x_max = max(120, max(np.sum(row) for _, row in bar_rows) * 1.15)
+ax.set_xlim(0, x_max)
 ax.set_ylim(0, 1.05)
 
 # X-axis ticks
-ax.set_xticks(np.arange(0, 121, 20))
+ax.set_xticks(np.arange(0, x_max + 1, 20))
 
 # Hide Y-axis (not meaningful for single bar)
 ax.set_yticks([])
@@ -272,24 +338,12 @@ ax.set_title('Audio Processing Pipeline Latency Breakdown',
 
 plt.tight_layout()
 
-# Output paths
-script_path = Path(__file__).parent
-output_path = script_path.parent / 'output'
-output_path.mkdir(exist_ok=True)
-
-# Export as PNG (300 DPI)
-fig.savefig(output_path / 'figure7_latency_breakdown.png',
-            dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as PDF (vector)
-fig.savefig(output_path / 'figure7_latency_breakdown.pdf',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
-
-# Export as SVG (vector)
-fig.savefig(output_path / 'figure7_latency_breakdown.svg',
-            bbox_inches='tight', facecolor='white', edgecolor='none')
+# Export as PNG (300 DPI), PDF and SVG (vector)
+output_path = figure_common.save_figure(fig, 'figure7_latency_breakdown')
 
 print('Figure 7 exported successfully!')
+if trace_summary is not None:
+    print(f'Trace: {trace_summary.frames} frames from {trace_file.name}')
 print(f'Total latency: {total_latency:.1f} ms')
 print(f'Margin below 100ms threshold: {100 - total_latency:.1f} ms')
 print(f'Output location: {output_path}')
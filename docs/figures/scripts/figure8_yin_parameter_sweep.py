@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Figure 8: YIN Parameter Sweep
+Accuracy surface over threshold and frequency range, with buffering latency
+Mambo Whistle Technical Report
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import json
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+
+import figure_common
+import yin_sweep
+
+# Data files (relative to docs/figures) read by this figure; used by build_figures.py
+FIGURE_INPUTS = ['data/yin_sweep.json']
+
+# ============================================================================
+#  CONFIGURATION
+# ============================================================================
+
+# Shared style: Times New Roman, STIX math, 1.0 pt axes (see figure_common.py)
+figure_common.apply_style(axes_linewidth=1.0)
+
+# Google brand colors
+GOOGLE_BLUE = figure_common.GOOGLE_BLUE
+GOOGLE_RED = figure_common.GOOGLE_RED
+GOOGLE_YELLOW = figure_common.GOOGLE_YELLOW
+GOOGLE_GREEN = figure_common.GOOGLE_GREEN
+GOOGLE_GRAY = figure_common.GOOGLE_GRAY
+
+# ============================================================================
+#  SWEEP DATA - written by yin_sweep.py, or a small sweep run here
+# ============================================================================
+
+sweep_file = figure_common.FIGURES_PATH / FIGURE_INPUTS[0]
+if sweep_file.exists():
+    sweep = json.loads(sweep_file.read_text())
+else:
+    sweep = yin_sweep.run_sweep(
+        np.round(np.linspace(0.05, 0.5, 19), 6),
+        [(lo, hi) for hi in (800, 2000) for lo in (60, 70, 80, 100, 120, 150)],
+        clips=16)
+
+thresholds = np.array(sweep['thresholds'])
+ranges = sweep['ranges']
+overall = np.array(sweep['metrics']['OA'])
+
+worklet = sweep['worklet']
+worklet_row = next((k for k, r in enumerate(ranges)
+                    if r['min_freq'] == worklet['min_freq'] and r['max_freq'] == worklet['max_freq']),
+                   None)
+if worklet_row is None:
+    raise ValueError(f"{sweep_file} has no {worklet['min_freq']:g}-{worklet['max_freq']:g} Hz "
+                     f'row; re-run yin_sweep.py')
+worklet_col = int(np.argmin(np.abs(thresholds - worklet['threshold'])))
+best_row, best_col = np.unravel_index(np.argmax(overall), overall.shape)
+
+# ============================================================================
+#  FIGURE SETUP - 2 PANEL LAYOUT
+# ============================================================================
+
+fig, axes = plt.subplots(2, 1, figsize=(16/2.54, 17/2.54), dpi=150,
+                         gridspec_kw={'height_ratios': [1.3, 1]})
+fig.patch.set_facecolor('white')
+plt.subplots_adjust(hspace=0.4, left=0.24, right=0.86, top=0.95, bottom=0.08)
+
+# ============================================================================
+#  PANEL (a): OVERALL ACCURACY SURFACE
+# ============================================================================
+
+ax1 = axes[0]
+step = thresholds[1] - thresholds[0] if len(thresholds) > 1 else 0.05
+extent = [thresholds[0] - step / 2, thresholds[-1] + step / 2, len(ranges) - 0.5, -0.5]
+image = ax1.imshow(overall, aspect='auto', cmap='viridis', extent=extent,
+                   vmin=np.percentile(overall, 5), vmax=overall.max())
+
+ax1.scatter(thresholds[worklet_col], worklet_row, s=120, marker='*', c=[GOOGLE_RED],
+            edgecolors='white', linewidths=1.0, zorder=10)
+ax1.scatter(thresholds[best_col], best_row, s=60, marker='o', facecolors='none',
+            edgecolors='white', linewidths=1.5, zorder=10)
+
+# Range labels carry the buffering latency the range implies
+ax1.set_yticks(np.arange(len(ranges)))
+ax1.set_yticklabels([f"{r['min_freq']:g}–{r['max_freq']:g} Hz ({r['window_ms']:.0f} ms)"
+                     for r in ranges], fontsize=8)
+
+# Colorbar in its own axes so both panels keep the same width
+box = ax1.get_position()
+colorbar = fig.colorbar(image, cax=fig.add_axes([0.88, box.y0, 0.02, box.height]))
+colorbar.set_label('Overall accuracy (%)', fontname='Times New Roman', fontsize=10)
+colorbar.ax.tick_params(labelsize=8)
+
+ax1.set_xlabel(r'Threshold $\theta$', fontname='Times New Roman', fontsize=11)
+ax1.set_ylabel('Range (window latency)', fontname='Times New Roman', fontsize=11)
+ax1.set_title('(a) Accuracy / Latency Surface', fontname='Times New Roman',
+              fontsize=12, fontweight='bold')
+ax1.tick_params(direction='out', length=3)
+
+legend_elements = [
+    Line2D([0], [0], marker='*', color='w', markerfacecolor=GOOGLE_RED, markersize=11,
+           label='Worklet setting'),
+    Line2D([0], [0], marker='o', color='w', markerfacecolor='none', markeredgecolor=GOOGLE_GRAY,
+           markersize=7, label='Best setting'),
+]
+ax1.legend(handles=legend_elements, loc='lower right', ncol=2, framealpha=0.9,
+           edgecolor=tuple(GOOGLE_GRAY), prop={'family': 'Times New Roman', 'size': 8})
+
+# ============================================================================
+#  PANEL (b): METRICS ALONG THE WORKLET RANGE
+# ============================================================================
+
+ax2 = axes[1]
+curves = [
+    ('RPA', 'Raw pitch accuracy', GOOGLE_BLUE, '-'),
+    ('VR', 'Voicing recall', GOOGLE_GREEN, '-'),
+    ('VFA', 'Voicing false alarm', GOOGLE_RED, '--'),
+    ('OA', 'Overall accuracy', GOOGLE_GRAY, ':'),
+]
+for key, label, color, style in curves:
+    ax2.plot(thresholds, sweep['metrics'][key][worklet_row], linestyle=style, color=color,
+             linewidth=1.5, label=label)
+
+ax2.axvline(worklet['threshold'], linestyle=':', color=GOOGLE_RED, linewidth=1.0)
+ax2.text(worklet['threshold'] + 0.005, 50, f"θ = {worklet['threshold']:.2f}",
+         fontname='Times New Roman', fontsize=9, color=GOOGLE_RED)
+
+ax2.set_xlim(thresholds[0], thresholds[-1])
+ax2.set_ylim(0, 102)
+ax2.set_xlabel(r'Threshold $\theta$', fontname='Times New Roman', fontsize=11)
+ax2.set_ylabel('Percent of frames', fontname='Times New Roman', fontsize=11)
+ax2.set_title(f"(b) Worklet Range {worklet['min_freq']:g}–{worklet['max_freq']:g} Hz",
+              fontname='Times New Roman', fontsize=12, fontweight='bold')
+ax2.grid(True, linestyle=':', alpha=0.3)
+ax2.spines['top'].set_visible(False)
+ax2.spines['right'].set_visible(False)
+ax2.tick_params(direction='out', length=3)
+ax2.legend(loc='center right', frameon=False, prop={'family': 'Times New Roman', 'size': 8})
+
+# Sweep cost note
+timing = sweep['timing']
+ax2.text(0.99, 0.3,
+         f"{overall.size} settings in {timing['sweep_s'] / timing['single_pass_s']:.1f}× "
+         f"the time of one detection pass ({sweep['frames']} frames)",
+         transform=ax2.transAxes, ha='right', va='center', fontname='Times New Roman',
+         fontsize=8, color=GOOGLE_GRAY, style='italic')
+
+# ============================================================================
+#  EXPORT FIGURE
+# ============================================================================
+
+# Export as PNG (300 DPI), PDF and SVG (vector)
+output_path = figure_common.save_figure(fig, 'figure8_yin_parameter_sweep')
+
+print('Figure 8 exported successfully!')
+print(f"Worklet setting OA: {overall[worklet_row, worklet_col]:.2f} %")
+print(f"Best setting: θ = {thresholds[best_col]:.3f}, "
+      f"{ranges[best_row]['min_freq']:g}–{ranges[best_row]['max_freq']:g} Hz "
+      f"(OA {overall[best_row, best_col]:.2f} %)")
+print(f'Output location: {output_path}')
+
+plt.show()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Figure 9: Benchmark Trend
+Detector latency and accuracy per commit, with bootstrap intervals and flagged regressions
+Mambo Whistle Technical Report
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+from matplotlib.ticker import FormatStrFormatter
+
+import benchmark_history
+import benchmark_pitch_detectors
+import figure_common
+
+# Data files (relative to docs/figures) read by this figure; used by build_figures.py
+FIGURE_INPUTS = ['data/benchmark_history.npz']
+
+# ============================================================================
+#  CONFIGURATION
+# ============================================================================
+
+# Shared style: Times New Roman, STIX math, 1.0 pt axes (see figure_common.py)
+figure_common.apply_style(axes_linewidth=1.0)
+
+# Google brand colors
+GOOGLE_BLUE = figure_common.GOOGLE_BLUE
+GOOGLE_RED = figure_common.GOOGLE_RED
+GOOGLE_YELLOW = figure_common.GOOGLE_YELLOW
+GOOGLE_GREEN = figure_common.GOOGLE_GREEN
+GOOGLE_GRAY = figure_common.GOOGLE_GRAY
+
+# YIN is the detector the worklet ships; the others are drawn for context
+SERIES_COLORS = [GOOGLE_YELLOW, GOOGLE_GRAY, np.array([0.55, 0.35, 0.65]), np.array([0.1, 0.6, 0.65])]
+
+# ============================================================================
+#  HISTORY - written by benchmark_history.py record, or one run measured here
+# ============================================================================
+
+history = benchmark_history.History(figure_common.FIGURES_PATH / FIGURE_INPUTS[0])
+if not len(history):
+    print(f'No benchmark history at {history.path}; measuring one YIN run (not saved)')
+    frames, f0_true = benchmark_pitch_detectors.synthetic_corpus(400)
+    benchmark_history.record(history, ['YIN'], {}, frames, f0_true, repeats=2, latency_frames=200)
+
+# One machine: timings of different machines are not comparable
+machine = history.runs['machine'][np.argmax(history.run_time)]
+series = [(detector, params) for m, detector, params in history.series() if m == machine]
+series.sort(key=lambda key: (key[0] != 'YIN', key))
+trends = {key: benchmark_history.trend(history, machine, *key) for key in series}
+
+# Commits on the x axis in the order they were first benchmarked
+commit_times = {}
+for points in trends.values():
+    for point in points:
+        commit_times[point['commit']] = min(point['time'], commit_times.get(point['commit'], np.inf))
+commits = sorted(commit_times, key=commit_times.get)
+
+# ============================================================================
+#  FIGURE SETUP - 2 PANEL LAYOUT
+# ============================================================================
+
+fig, axes = plt.subplots(2, 1, figsize=(16/2.54, 14/2.54), dpi=150, sharex=True,
+                         gridspec_kw={'height_ratios': [1.4, 1]})
+fig.patch.set_facecolor('white')
+
+panels = [
+    (axes[0], 'latency_ms', 'Median latency (ms)', '(a) Per-Frame Latency'),
+    (axes[1], 'rpa', 'Raw pitch accuracy (%)', '(b) Accuracy'),
+]
+regressions = []
+for k, (detector, params) in enumerate(series):
+    points = trends[(detector, params)]
+    is_yin = detector == 'YIN'
+    color = GOOGLE_BLUE if is_yin else SERIES_COLORS[(k - 1) % len(SERIES_COLORS)]
+    label = detector if params == '{}' else f'{detector} {params}'
+    x = np.array([commits.index(p['commit']) for p in points])
+    for ax, metric, _, _ in panels:
+        value = np.array([p[metric]['value'] for p in points])
+        # Accuracy is measured on the same frames every run; its interval is
+        # corpus sampling, not run noise, and is left to the comparator
+        if metric == 'latency_ms':
+            low, high = np.array([p[metric]['ci'] for p in points]).T
+            ax.fill_between(x, low, high, color=color, alpha=0.18 if is_yin else 0.1,
+                            linewidth=0)
+        ax.plot(x, value, color=color, linewidth=2.0 if is_yin else 1.2, marker='o',
+                markersize=4 if is_yin else 3, label=label, zorder=5 if is_yin else 3)
+        for i, point in enumerate(points):
+            result = point[metric].get('compare')
+            if result and (result['regression'] or result['improvement']):
+                ax.scatter(x[i], value[i], s=70, zorder=10,
+                           marker='v' if result['regression'] else '^',
+                           c=[GOOGLE_RED if result['regression'] else GOOGLE_GREEN],
+                           edgecolors='white', linewidths=0.8)
+                if result['regression']:
+                    regressions.append(f'{label} {metric} at {point["commit"]} '
+                                       f'({result["change"] * (1 if metric == "rpa" else 100):+.1f}'
+                                       f'{" pp" if metric == "rpa" else "%"})')
+
+# ============================================================================
+#  STYLING
+# ============================================================================
+
+for ax, metric, ylabel, title in panels:
+    ax.set_ylabel(ylabel, fontname='Times New Roman', fontsize=11)
+    ax.set_title(title, fontname='Times New Roman', fontsize=12, fontweight='bold')
+    ax.grid(True, linestyle=':', alpha=0.3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.tick_params(direction='out', length=3)
+axes[0].set_yscale('log')
+axes[0].yaxis.set_major_formatter(FormatStrFormatter('%g'))
+axes[0].yaxis.set_minor_formatter(FormatStrFormatter('%g'))
+axes[0].tick_params(axis='y', which='minor', labelsize=7)
+
+axes[1].set_xticks(np.arange(len(commits)))
+axes[1].set_xticklabels(commits, rotation=35, ha='right', fontsize=8)
+axes[1].set_xlim(-0.5, len(commits) - 0.5)
+axes[1].set_xlabel('Commit', fontname='Times New Roman', fontsize=11)
+
+# ============================================================================
+#  LEGEND
+# ============================================================================
+
+handles, labels = axes[0].get_legend_handles_labels()
+handles += [
+    Line2D([0], [0], marker='v', color='w', markerfacecolor=GOOGLE_RED, markersize=8,
+           label='Regression'),
+    Line2D([0], [0], marker='^', color='w', markerfacecolor=GOOGLE_GREEN, markersize=8,
+           label='Improvement'),
+]
+axes[0].legend(handles=handles, loc='upper left', ncol=3, frameon=False,
+               prop={'family': 'Times New Roman', 'size': 8})
+fig.text(0.99, 0.005, f'Machine {machine}; latency bands: '
+         f'{benchmark_history.CONFIDENCE * 100:.0f}% bootstrap intervals', ha='right', va='bottom', fontsize=7, color=GOOGLE_GRAY)
+
+# ============================================================================
+#  EXPORT FIGURE
+# ============================================================================
+
+plt.tight_layout(rect=(0, 0.02, 1, 1))
+
+# Export as PNG (300 DPI), PDF and SVG (vector)
+output_path = figure_common.save_figure(fig, 'figure9_benchmark_trend')
+
+print('Figure 9 exported successfully!')
+print(f'{len(commits)} commits, {len(series)} series on machine {machine}')
+for regression in regressions:
+    print(f'Regression: {regression}')
+print(f'Output location: {output_path}')
+
+plt.show()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Shared Figure Helpers
+Style, output location and multi-format export used by every figure script
+Mambo Whistle Technical Report
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import font_manager
+
+FIGURES_PATH = Path(__file__).parent.parent
+OUTPUT_PATH = FIGURES_PATH / 'output'
+
+# Format -> extra savefig arguments (PNG at 300 DPI, PDF/SVG as vector)
+EXPORT_FORMATS = {
+    'png': {'dpi': 300},
+    'pdf': {},
+    'svg': {},
+}
+
+
+# Google brand colors
+GOOGLE_BLUE = np.array([66, 133, 244]) / 255
+GOOGLE_RED = np.array([234, 67, 53]) / 255
+GOOGLE_YELLOW = np.array([251, 188, 5]) / 255
+GOOGLE_GREEN = np.array([52, 168, 83]) / 255
+GOOGLE_GRAY = np.array([95, 99, 104]) / 255
+
+FONT_FAMILY = 'Times New Roman'
+
+
+# ============================================================================
+#  STYLE
+# ============================================================================
+
+def apply_style(axes_linewidth=1.2):
+    """rcParams shared by all figures (only the axes line width differs)."""
+    plt.rcParams['font.family'] = FONT_FAMILY
+    plt.rcParams['mathtext.fontset'] = 'stix'
+    plt.rcParams['font.size'] = 10
+    plt.rcParams['axes.linewidth'] = axes_linewidth
+    plt.rcParams['axes.unicode_minus'] = False
+
+
+def warm_up():
+    """
+    Pay the one-off costs of a first figure: font lookup, font cache and the
+    text/mathtext layout code paths. Used by the render server.
+    """
+    apply_style()
+    font_manager.findfont(FONT_FAMILY)
+    font_manager.findfont(font_manager.FontProperties(family=FONT_FAMILY, weight='bold'))
+    fig, ax = plt.subplots()
+    ax.set_title('Warm-up', fontweight='bold')
+    ax.text(0.5, 0.5, r'$d\'(\tau)$ $f_0$')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+# ============================================================================
+#  EXPORT
+# ============================================================================
+
+def save_figure(fig, stem, output_path=OUTPUT_PATH, formats=EXPORT_FORMATS):
+    """Write `fig` as <stem>.png/.pdf/.svg, one savefig call per format."""
+    output_path.mkdir(exist_ok=True)
+    for fmt, kwargs in formats.items():
+        fig.savefig(output_path / f'{stem}.{fmt}', bbox_inches='tight', facecolor='white',
+                    edgecolor='none', **kwargs)
+    return output_path
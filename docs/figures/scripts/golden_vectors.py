@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Golden Vectors for Worklet Parity
+Reference YIN and spectral-feature outputs in a compact float32 container
+Mambo Whistle Technical Report
+
+The Python reference computes, for a fixed set of input frames, what
+js/pitch-worklet.js should produce: the fixed-window difference function
+d(tau) and d'(tau) of the worklet's detector, the threshold lag and its
+refinement, F0 (0 where the worklet returns null) and the FastFFT features.
+The result is written to tests/fixtures/worklet-golden.bin, which the
+vitest suite (tests/unit/worklet-golden.test.js) reads with
+tests/helpers/goldenVectors.js.
+
+Container layout (little-endian):
+
+    0   4 bytes   magic 'MWGV'
+    4   uint32    format version
+    8   uint32    header length H in bytes
+    12  H bytes   UTF-8 JSON: {"attrs": {...}, "arrays": {name: {"shape": [...],
+                  "offset": bytes from the data start}}}, space-padded so the
+                  data starts on a 64-byte boundary
+    ..  float32   arrays, each starting on a 64-byte boundary
+
+Node wraps each array as a Float32Array view of the file buffer and Python
+memory-maps the file, so neither side parses the numbers.
+
+Usage:
+    python golden_vectors.py                 # regenerate the fixture
+    python golden_vectors.py --check-js      # ... and compare with the worklet under Node
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+import spectral_features
+import worklet_js
+import yin
+
+MAGIC = b'MWGV'
+VERSION = 1
+ALIGNMENT = 64
+DEFAULT_OUTPUT = worklet_js.REPO_ROOT / 'tests' / 'fixtures' / 'worklet-golden.bin'
+
+FS = 44100
+FRAME_LENGTH = 1024                 # Worklet accumulation buffer
+THRESHOLD = 0.15                    # Worklet config.threshold
+DECISION_MARGIN = 1e-3              # Frames with d' this close to a decision are dropped
+
+
+# ============================================================================
+#  CONTAINER
+# ============================================================================
+
+def _align(n):
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def write_container(path, arrays, attrs=None):
+    """Write named arrays (stored as float32) and JSON attributes."""
+    entries, offset = {}, 0
+    blobs = []
+    for name, array in arrays.items():
+        data = np.ascontiguousarray(array, dtype='<f4')
+        entries[name] = {'shape': list(data.shape), 'offset': offset}
+        blobs.append((offset, data.tobytes()))
+        offset = _align(offset + data.nbytes)
+
+    header = json.dumps({'attrs': attrs or {}, 'arrays': entries}, separators=(',', ':'))
+    header = header.encode()
+    header += b' ' * (_align(12 + len(header)) - 12 - len(header))
+    data_start = 12 + len(header)
+
+    buffer = bytearray(data_start + offset)
+    buffer[:12] = MAGIC + struct.pack('<II', VERSION, len(header))
+    buffer[12:data_start] = header
+    for start, blob in blobs:
+        buffer[data_start + start:data_start + start + len(blob)] = blob
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(buffer))
+    return len(buffer)
+
+
+def read_container(path):
+    """Memory-map a container; returns (attrs, {name: read-only float32 array})."""
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(raw[:4]) != MAGIC:
+        raise ValueError(f'{path} is not a golden-vector container')
+    version, header_length = struct.unpack('<II', bytes(raw[4:12]))
+    if version != VERSION:
+        raise ValueError(f'{path}: unsupported container version {version}')
+    header = json.loads(bytes(raw[12:12 + header_length]))
+    data_start = 12 + header_length
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        count = int(np.prod(entry['shape']))
+        start = data_start + entry['offset']
+        arrays[name] = raw[start:start + 4 * count].view('<f4').reshape(entry['shape'])
+    return header['attrs'], arrays
+
+
+# ============================================================================
+#  REFERENCE OUTPUTS
+# ============================================================================
+
+def worklet_yin(frames, fs=FS, threshold=THRESHOLD):
+    """
+    The worklet detector's steps: fixed-window d, d', first dip below the
+    threshold walked to its bottom (no fallback), parabolic refinement and
+    the probabilityThreshold check. tau = -1 and f0 = 0 where it returns null.
+    """
+    d = yin.fixed_window_difference(frames)
+    d_prime = yin.cumulative_mean_normalized_difference(d)
+    below = d_prime[:, yin.MIN_TAU:] < threshold
+    has_dip = below.any(axis=1)
+    tau = yin.absolute_threshold(d_prime, threshold)
+    tau_refined, _ = yin.parabolic_interpolation(d_prime, tau)
+
+    confidence = 1 - d_prime[np.arange(len(frames)), tau]
+    voiced = has_dip & (confidence >= yin.MIN_CONFIDENCE)
+    return {
+        'd': d,
+        'd_prime': d_prime,
+        'tau': np.where(has_dip, tau, -1),
+        'tau_refined': np.where(has_dip, tau_refined, -1.0),
+        'f0': np.where(voiced, fs / np.where(voiced, tau_refined, 1.0), 0.0),
+    }
+
+
+def robust(d_prime, tau, threshold=THRESHOLD, margin=DECISION_MARGIN):
+    """
+    Frames whose decisions survive float32 rounding: no d' value up to the
+    chosen lag (or anywhere, without a dip) lies within `margin` of the
+    threshold, and the descent to the chosen lag has no near-ties.
+    """
+    W = d_prime.shape[1]
+    lags = np.arange(W)
+    last = np.where(tau >= 0, tau, W - 1)[:, np.newaxis]
+    searched = (lags >= yin.MIN_TAU) & (lags <= last)
+    near = (np.abs(d_prime - threshold) < margin) & searched
+    step = np.abs(np.diff(d_prime, axis=1, append=np.inf))
+    tie = (step < margin * 1e-2) & searched
+    return ~(near.any(axis=1) | tie.any(axis=1))
+
+
+def golden_frames(n_per_kind=8, fs=FS, seed=0):
+    """Voice-like, whistle-like and noise frames, screened with robust()."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(FRAME_LENGTH) / fs
+    kinds = {
+        'voice': (90.0, 700.0, 8, 0.01),        # (min F0, max F0, partials, noise)
+        'whistle': (700.0, 1900.0, 1, 0.003),
+        'noisy': (120.0, 500.0, 6, 0.3),
+        'noise': None,
+    }
+    frames, labels = [], []
+    for kind, spec in kinds.items():
+        kept = 0
+        while kept < n_per_kind:
+            if spec is None:
+                frame = rng.standard_normal(FRAME_LENGTH) * rng.uniform(0.01, 0.3)
+            else:
+                low, high, partials, noise = spec
+                f0 = np.exp(rng.uniform(np.log(low), np.log(high)))
+                frame = sum(np.sin(2 * np.pi * h * f0 * t + rng.uniform(0, 2 * np.pi)) / h
+                            for h in range(1, partials + 1) if h * f0 < fs / 2)
+                frame = frame + rng.standard_normal(FRAME_LENGTH) * noise
+                frame *= rng.uniform(0.05, 0.5) / np.max(np.abs(frame))
+            frame = frame.astype(np.float32)
+            result = worklet_yin(frame[np.newaxis].astype(np.float64), fs)
+            if robust(result['d_prime'], result['tau'])[0]:
+                frames.append(frame)
+                labels.append(list(kinds).index(kind))
+                kept += 1
+    return np.stack(frames), np.array(labels), list(kinds)
+
+
+def generate(n_per_kind=8, fs=FS):
+    """Golden arrays and attributes for the fixture."""
+    frames, labels, kinds = golden_frames(n_per_kind, fs)
+    x = frames.astype(np.float64)
+    arrays = {'frames': frames, 'kind': labels, **worklet_yin(x, fs)}
+    features = spectral_features.SpectralAnalyzer(spectral_features.FFT_SIZE, fs).features(x)
+    arrays.update(features._asdict())
+    attrs = {
+        'fs': fs,
+        'frame_length': FRAME_LENGTH,
+        'threshold': THRESHOLD,
+        'min_confidence': yin.MIN_CONFIDENCE,
+        'fft_size': spectral_features.FFT_SIZE,
+        'kinds': kinds,
+        'generator': 'docs/figures/scripts/golden_vectors.py',
+    }
+    return arrays, attrs
+
+
+# ============================================================================
+#  JS CHECK
+# ============================================================================
+
+_JS_CHECK = r'''
+const size = __FRAME_LENGTH__;
+const detect = PitchDetectorWorklet.prototype._createYINDetector({
+    threshold: __THRESHOLD__, sampleRate });
+const fft = new FastFFT(size);
+for (let f = 0; f < frames.length / size; f++) {
+    const frame = frames.subarray(f * size, (f + 1) * size);
+    const power = fft.computePowerSpectrum(frame);
+    out.push(detect(frame) ?? 0, fft.computeSpectralCentroid(power, sampleRate),
+             fft.computeSpectralFlatness(power));
+}
+'''
+
+
+def check_js(arrays, attrs):
+    """Largest deviations of the worklet (under Node) from the golden values."""
+    snippet = (_JS_CHECK.replace('__FRAME_LENGTH__', str(attrs['frame_length']))
+               .replace('__THRESHOLD__', repr(attrs['threshold'])))
+    js = worklet_js.run(snippet, arrays['frames'], attrs['fs']).reshape(-1, 3)
+    f0 = np.asarray(arrays['f0'], dtype=np.float64)
+    voicing = int(np.sum((js[:, 0] > 0) != (f0 > 0)))
+    both = (js[:, 0] > 0) & (f0 > 0)
+    cents = np.abs(1200 * np.log2(js[both, 0] / f0[both])) if both.any() else np.zeros(1)
+    return {
+        'voicing_mismatches': voicing,
+        'f0_cents': float(cents.max()),
+        'centroid_hz': float(np.max(np.abs(js[:, 1] - arrays['centroid']))),
+        'flatness': float(np.max(np.abs(js[:, 2] - arrays['flatness']))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames-per-kind', type=int, default=8)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--check-js', action='store_true',
+                        help='compare the worklet under Node with the written fixture')
+    args = parser.parse_args()
+
+    arrays, attrs = generate(args.frames_per_kind)
+    size = write_container(args.output, arrays, attrs)
+    start = time.perf_counter()
+    attrs, arrays = read_container(args.output)
+    seconds = time.perf_counter() - start
+    voiced = int(np.sum(np.asarray(arrays['f0']) > 0))
+    print(f'{args.output}: {len(arrays["frames"])} frames ({voiced} voiced), '
+          f'{len(arrays)} arrays, {size / 1024:.0f} KiB, mapped in {seconds * 1000:.2f} ms')
+
+    if args.check_js:
+        for name, value in check_js(arrays, attrs).items():
+            print(f'  {name:<20} {value:.3g}')
+
+
+if __name__ == '__main__':
+    main()
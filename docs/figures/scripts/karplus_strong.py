@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Karplus-Strong Offline Renderer
+Block-based rendering of the plucked-string model in js/core/karplus-strong.js
+Mambo Whistle Technical Report
+
+The signal chain of the Tone.js nodes, per sample n:
+
+    white noise -> excitation lowpass (biquad, pluckDamping Hz, Q 0.5 dB)
+                -> noise gain (0 -> velocity in 5 ms, exponential to 1e-7 at 50 ms)
+                -> dampening lowpass (one pole, damping * 3000 Hz)
+                -> feedback comb  y[n] = w[n - D(n)],  w[n] = u[n] + resonance(n) y[n]
+                -> body lowpass (biquad, 3000 Hz, Q 0.7 dB) -> output gain
+
+As in Tone 15's LowpassCombFilter, the dampening lowpass filters the comb's
+input rather than sitting in the loop.
+
+The biquads and the one-pole are linear recurrences: each biquad is split
+into two complex one-pole sections that run as doubling scans
+(smoothing.recurrence), with their state carried across calls. The comb
+reads its own output one loop delay back, so all samples of a block shorter
+than the smallest delay in it depend only on earlier blocks. The delay
+line is therefore filled one pitch period at a time with array operations.
+Reads interpolate linearly between samples, and D(n) is a per-sample
+control, so pitch can glide and wobble continuously.
+
+Tone's FeedbackCombFilter instead floors the delay and updates delayTime and
+feedback once per 128-sample quantum, which quantizes pitch (its loop delay
+is floor(delayTime * fs) + 1 samples). `fractional=False` reproduces that.
+
+Control curves follow the Web Audio automation used by KarplusStrong:
+triggerAttack sets delayTime, resonance and gain; setFrequency ramps
+delayTime linearly; triggerRelease ramps resonance to 0 in 0.1 s and gain
+to 0 in 0.2 s.
+
+Rendering hop by hop (512 samples, one pitch frame of the worklet) times
+the synthesis work per pitch frame. The summary goes to
+data/karplus_strong.json, which Figure 7 uses for the Synthesis Processing
+stage when no pipeline trace exists. Like the other simulators, it times
+this NumPy renderer, not Tone.js.
+
+Usage:
+    python karplus_strong.py [--seconds 10] [--wav pluck.wav] [--tone-compatible]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+import smoothing
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'karplus_strong.json'
+
+FS = 44100
+HOP = 512                           # Samples per worklet pitch frame
+QUANTUM = 128                       # Tone's comb updates its k-rate parameters per quantum
+QUANTILES = (50, 95, 99)
+
+DAMPING = 0.4                       # options.damping (dampening = damping * 3000 Hz)
+RESONANCE = 0.96                    # options.resonance (comb feedback)
+PLUCK_DAMPING = 2000.0              # Excitation lowpass cutoff (Hz)
+EXCITATION_Q = 0.5                  # Biquad Q in dB, as Web Audio interprets lowpass Q
+BODY_FREQUENCY = 3000.0
+BODY_Q = 0.7
+BURST_RISE = 0.005                  # Noise gain: linear rise (s)
+BURST_END = 0.05                    # ... exponential fall ends here (s)
+RAMP_FLOOR = 1e-7                   # Tone ramps "to 0" exponentially to this value
+FREQUENCY_RAMP = 0.01               # setFrequency default ramp (s)
+RELEASE_RESONANCE = 0.1             # triggerRelease ramp times (s)
+RELEASE_GAIN = 0.2
+MIN_FREQUENCY = 20.0                # Longest loop delay the renderer keeps history for
+
+
+# ============================================================================
+#  FILTERS
+# ============================================================================
+
+def lowpass_coefficients(frequency, q_db, fs):
+    """Web Audio BiquadFilterNode lowpass: (b0, b1, b2), (a1, a2) with a0 = 1."""
+    w0 = 2 * np.pi * frequency / fs
+    alpha = np.sin(w0) / (2 * 10 ** (q_db / 20))
+    a0 = 1 + alpha
+    b = np.array([(1 - np.cos(w0)) / 2, 1 - np.cos(w0), (1 - np.cos(w0)) / 2]) / a0
+    return b, np.array([-2 * np.cos(w0), 1 - alpha]) / a0
+
+
+class Biquad:
+    """
+    Biquad as two complex one-pole sections in parallel, after the
+    numerator FIR: 1 / ((1 - p1 z^-1)(1 - p2 z^-1)) = sum_k c_k / (1 - p_k z^-1).
+    """
+
+    def __init__(self, b, a):
+        self.b = np.asarray(b, dtype=np.float64)
+        poles = np.roots(np.concatenate([[1.0], a])).astype(np.complex128)
+        if abs(poles[0] - poles[1]) < 1e-9:
+            raise ValueError('repeated biquad poles are not supported')
+        self.poles = poles
+        self.weights = np.array([poles[0] / (poles[0] - poles[1]),
+                                 poles[1] / (poles[1] - poles[0])])
+        self.inputs = np.zeros(2)                           # x[n - 2], x[n - 1]
+        self.state = np.zeros(2, dtype=np.complex128)       # Section outputs at n - 1
+
+    def process(self, x):
+        padded = np.concatenate([self.inputs, x])
+        v = self.b[0] * padded[2:] + self.b[1] * padded[1:-1] + self.b[2] * padded[:-2]
+        sections = smoothing.recurrence(np.multiply.outer(np.ones(2), v), self.poles,
+                                        initial=self.state)
+        self.inputs = padded[-2:]
+        self.state = sections[:, -1]
+        return np.real(self.weights @ sections)
+
+
+class OnePole:
+    """Tone.OnePoleFilter lowpass: y[n] = t x[n] + (1 - t) y[n - 1], t = 2 pi f / fs."""
+
+    def __init__(self, frequency, fs):
+        self.gain = 2 * np.pi * frequency / fs
+        self.state = 0.0
+
+    def process(self, x):
+        y = smoothing.recurrence(self.gain * x, 1 - self.gain, initial=self.state)
+        self.state = y[-1]
+        return y
+
+
+# ============================================================================
+#  CONTROL CURVES
+# ============================================================================
+
+class Curve:
+    """
+    Per-sample automation built from time-ordered events. A later event
+    overrides everything from its start, as cancelScheduledValues does.
+    """
+
+    def __init__(self, n_samples, fs, value):
+        self.values = np.empty(n_samples)
+        self.fs = fs
+        self.filled = 0             # values[:filled] are final up to the next event
+        self.value = value          # Held after `filled`
+
+    def _start(self, time):
+        start = min(int(round(time * self.fs)), len(self.values))
+        if start > self.filled:
+            self.values[self.filled:start] = self.value
+            self.filled = start
+        current = self.values[start - 1] if 0 < start <= self.filled else self.value
+        self.filled = start
+        return start, current
+
+    def set(self, time, value):
+        self._start(time)
+        self.value = value
+
+    def ramp(self, time, target, duration, exponential=False, start_value=None):
+        start, current = self._start(time)
+        current = current if start_value is None else start_value
+        n = min(max(int(round(duration * self.fs)), 1), len(self.values) - start)
+        fraction = np.arange(1, n + 1) / max(int(round(duration * self.fs)), 1)
+        if exponential:
+            segment = current * (target / current) ** fraction
+        else:
+            segment = current + (target - current) * fraction
+        self.values[start:start + n] = segment
+        self.filled = start + n
+        self.value = target
+
+    def finish(self):
+        self.values[self.filled:] = self.value
+        self.filled = len(self.values)
+        return self.values
+
+
+class Score:
+    """KarplusStrong method calls in time order, turned into control curves."""
+
+    def __init__(self, duration, fs=FS, resonance=RESONANCE):
+        self.n_samples = int(round(duration * fs))
+        self.fs = fs
+        self.resonance = resonance
+        self.delay = Curve(self.n_samples, fs, 1 / 440)     # delayTime (s)
+        self.feedback = Curve(self.n_samples, fs, resonance)
+        self.noise_gain = Curve(self.n_samples, fs, 0.0)
+        self.gain = Curve(self.n_samples, fs, 1.0)
+
+    def trigger_attack(self, time, frequency, velocity=1.0):
+        self.feedback.set(time, self.resonance)
+        self.gain.set(time, 1.0)
+        self.delay.set(time, 1 / frequency)
+        self.noise_gain.ramp(time, velocity, BURST_RISE, start_value=0.0)
+        self.noise_gain.ramp(time + BURST_RISE, RAMP_FLOOR, BURST_END - BURST_RISE,
+                             exponential=True)
+
+    def set_frequency(self, time, frequency, ramp_time=FREQUENCY_RAMP):
+        if frequency > 0:
+            self.delay.ramp(time, 1 / frequency, ramp_time)
+
+    def trigger_release(self, time):
+        self.feedback.ramp(time, 0.0, RELEASE_RESONANCE)
+        self.gain.ramp(time, 0.0, RELEASE_GAIN)
+
+    def controls(self):
+        """(delay s, feedback, noise gain, output gain) per sample."""
+        return tuple(c.finish() for c in (self.delay, self.feedback, self.noise_gain, self.gain))
+
+
+# ============================================================================
+#  RENDERER
+# ============================================================================
+
+class KarplusStrong:
+    """Stateful block renderer; process() continues where the last call stopped."""
+
+    def __init__(self, fs=FS, damping=DAMPING, pluck_damping=PLUCK_DAMPING,
+                 fractional=True, seed=0):
+        self.fs = fs
+        self.fractional = fractional
+        self.rng = np.random.default_rng(seed)
+        self.excitation = Biquad(*lowpass_coefficients(pluck_damping, EXCITATION_Q, fs))
+        self.dampening = OnePole(damping * 3000, fs)
+        self.body = Biquad(*lowpass_coefficients(BODY_FREQUENCY, BODY_Q, fs))
+        # Delay-line history: the last comb inputs w, oldest first
+        self.history = np.zeros(int(np.ceil(fs / MIN_FREQUENCY)) + 2)
+
+    def loop_delay(self, delay_time, feedback, offset=0):
+        """Loop delay in samples and feedback per sample; Tone mode holds both per quantum."""
+        longest = len(self.history) - 2
+        if self.fractional:
+            return np.clip(delay_time * self.fs, 2.0, longest), feedback
+        held = (np.arange(offset, offset + len(delay_time)) // QUANTUM) * QUANTUM - offset
+        held = np.maximum(held, 0)
+        return np.minimum(np.floor(delay_time[held] * self.fs) + 1, longest), feedback[held]
+
+    def comb(self, u, delay, feedback):
+        """y[n] = w[n - D], w[n] = u[n] + g[n] y[n], one block per shortest delay."""
+        h = len(self.history)
+        w = np.concatenate([self.history, np.zeros(len(u))])
+        y = np.empty(len(u))
+        start = 0
+        while start < len(u):
+            guess = start + int(delay[start])
+            length = max(int(np.ceil(delay[start:guess].min())) - 1, 1)
+            stop = min(start + length, len(u))
+            read = np.arange(h + start, h + stop) - delay[start:stop]
+            base = np.floor(read).astype(np.int64)
+            frac = read - base
+            y[start:stop] = (1 - frac) * w[base] + frac * w[base + 1]
+            w[h + start:h + stop] = u[start:stop] + feedback[start:stop] * y[start:stop]
+            start = stop
+        self.history = w[-h:]
+        return y
+
+    def process(self, delay_time, feedback, noise_gain, gain, offset=0):
+        """Render len(delay_time) samples from per-sample controls."""
+        noise = self.rng.uniform(-1.0, 1.0, len(delay_time))
+        u = self.dampening.process(self.excitation.process(noise) * noise_gain)
+        delay, feedback = self.loop_delay(delay_time, feedback, offset)
+        return self.body.process(self.comb(u, delay, feedback)) * gain
+
+    def render(self, score, block=HOP):
+        """Whole score in blocks; returns (audio, seconds per block)."""
+        controls = score.controls()
+        audio = np.empty(score.n_samples)
+        seconds = []
+        for start in range(0, score.n_samples, block):
+            stop = min(start + block, score.n_samples)
+            t0 = time.perf_counter()
+            audio[start:stop] = self.process(*(c[start:stop] for c in controls), offset=start)
+            seconds.append(time.perf_counter() - t0)
+        return audio, np.array(seconds)
+
+
+# ============================================================================
+#  TEST SCORE
+# ============================================================================
+
+def test_score(seconds, fs=FS, seed=0):
+    """
+    Phrases as continuous-synth.js plays them: an attack per note, then a
+    setFrequency per pitch frame (glides and 5.5 Hz vibrato), and a release
+    before each rest.
+    """
+    rng = np.random.default_rng(seed)
+    score = Score(seconds, fs)
+    frame = HOP / fs
+    t = 0.0
+    while t < seconds:
+        note = 110 * 2 ** (rng.integers(0, 24) / 12)
+        length = rng.uniform(0.3, 1.2)
+        score.trigger_attack(t, note)
+        frames = np.arange(t + frame, min(t + length, seconds), frame)
+        target = note * 2 ** (rng.uniform(-2, 2) / 12)
+        for k, ft in enumerate(frames):
+            glide = note + (target - note) * min(k / 20, 1.0)
+            score.set_frequency(ft, glide * 2 ** (0.25 / 12 * np.sin(2 * np.pi * 5.5 * (ft - t))))
+        if rng.random() < 0.3:
+            score.trigger_release(t + length)
+            length += rng.uniform(0.2, 0.5)
+        t += length
+    return score
+
+
+def write_wav(path, audio, fs=FS):
+    """16-bit mono WAV, peak-normalized to -1 dBFS."""
+    peak = max(np.max(np.abs(audio)), 1e-12)
+    data = np.round(audio / peak * 0.891 * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(fs)
+        f.writeframes(data.tobytes())
+
+
+def _stats(values):
+    stats = {'mean': float(np.mean(values))}
+    stats.update({f'p{q}': float(v) for q, v in zip(QUANTILES, np.percentile(values, QUANTILES))})
+    stats['max'] = float(np.max(values))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--tone-compatible', action='store_true',
+                        help='floored, per-quantum loop delay as in Tone.FeedbackCombFilter')
+    parser.add_argument('--wav', type=Path, help='also write the rendered audio')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    score = test_score(args.seconds)
+    synth = KarplusStrong(fractional=not args.tone_compatible)
+    synth.render(test_score(0.1))                                       # Warm-up
+    synth = KarplusStrong(fractional=not args.tone_compatible)
+    start = time.perf_counter()
+    audio, seconds = synth.render(score)
+    total = time.perf_counter() - start
+    block_ms = _stats(seconds * 1000)
+
+    print(f'{args.seconds:g} s rendered in {total * 1000:.0f} ms '
+          f'({args.seconds / total:.0f}x real time, '
+          f'{"Tone-compatible" if args.tone_compatible else "fractional"} delay)')
+    print(f'Per {HOP}-sample pitch frame ({HOP / FS * 1000:.1f} ms of audio): '
+          + '  '.join(f'{k} {v:.3f} ms' for k, v in block_ms.items()))
+
+    report = {'fs': FS, 'hop': HOP, 'seconds': args.seconds,
+              'fractional': not args.tone_compatible, 'realtime_factor': args.seconds / total,
+              'block_ms': block_ms}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+    if args.wav:
+        write_wav(args.wav, audio)
+        print(f'Audio written to {args.wav}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Pipeline Latency Traces
+Streaming aggregation of per-frame stage-timestamp traces for Figure 7
+Mambo Whistle Technical Report
+
+A trace is JSON-lines, one object per frame, in either of two forms (a trace
+may mix them):
+
+    {"frame": 0, "ts": [t0, t1, ..., t7]}            stage boundary timestamps (ms)
+    {"frame": 0, "stages": {"YIN Pitch Detection": 0.4, ...}}   stage durations (ms)
+
+Timestamps are the boundaries of the seven PIPELINE_STAGES, so stage i
+lasts ts[i + 1] - ts[i]. Traces are read in fixed-size chunks and folded
+into log-spaced histograms, so memory stays constant however many frames
+the trace holds.
+
+Usage:
+    python latency_trace.py trace.jsonl
+    python latency_trace.py --synthetic 1000000 trace.jsonl   # test input only
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+# Stage names and threads, in pipeline order (Figure 7)
+PIPELINE_STAGES = [
+    ('Microphone Capture',   'Audio Thread'),
+    ('Buffer Accumulation',  'Audio Thread'),
+    ('YIN Pitch Detection',  'Audio Thread'),
+    ('FFT + Features',       'Audio Thread'),
+    ('Message Transfer',     'Thread Boundary'),
+    ('Synthesis Processing', 'Main Thread'),
+    ('DOM Rendering',        'Main Thread'),
+]
+STAGE_NAMES = [name for name, _ in PIPELINE_STAGES]
+
+DEFAULT_TRACE = Path(__file__).parent.parent / 'data' / 'latency_trace.jsonl'
+CHUNK_LINES = 16384
+
+
+# ============================================================================
+#  FIXED-MEMORY HISTOGRAM
+# ============================================================================
+
+class LogHistogram:
+    """
+    Histograms for several series over log-spaced bins.
+
+    With 200 bins per decade, quantiles are accurate to about 0.6% relative
+    error. Values outside [low, high) land in under/overflow bins.
+    """
+
+    def __init__(self, n_series, low=1e-3, high=1e4, bins_per_decade=200):
+        self.log_low = np.log10(low)
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = int(np.ceil((np.log10(high) - self.log_low) * bins_per_decade))
+        # Column 0 is underflow, column n_bins + 1 overflow
+        self.counts = np.zeros((n_series, self.n_bins + 2), dtype=np.int64)
+        self.sums = np.zeros(n_series)
+        self.count = 0
+
+    def add(self, values):
+        """Add a (n_samples, n_series) block of values."""
+        values = np.asarray(values, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = (np.log10(values) - self.log_low) * self.bins_per_decade
+        index = np.clip(np.floor(np.nan_to_num(position, nan=-1.0, neginf=-1.0)) + 1,
+                        0, self.n_bins + 1).astype(np.int64)
+
+        n_series = self.counts.shape[0]
+        flat = index + np.arange(n_series) * (self.n_bins + 2)
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(
+            self.counts.shape)
+        self.sums += values.sum(axis=0)
+        self.count += len(values)
+
+    def quantile(self, q):
+        """Quantile q (0-100) of every series, at the geometric bin centre."""
+        target = q / 100 * self.count
+        cumulative = np.cumsum(self.counts, axis=1)
+        index = np.argmax(cumulative >= max(target, 1), axis=1)
+        centre = self.log_low + (index - 0.5) / self.bins_per_decade
+        return 10 ** centre
+
+    def mean(self):
+        return self.sums / max(self.count, 1)
+
+
+# ============================================================================
+#  TRACE READING
+# ============================================================================
+
+def _durations(records, stage_names, path, line_numbers):
+    """Stage durations of a chunk; each record is read by its own form."""
+    durations = np.zeros((len(records), len(stage_names)))
+    timed = [i for i, r in enumerate(records) if 'ts' in r]
+    for i in timed:
+        if len(records[i]['ts']) != len(stage_names) + 1:
+            raise ValueError(f'{path}:{line_numbers[i]}: "ts" needs {len(stage_names) + 1} '
+                             f'stage boundary timestamps')
+    if timed:
+        ts = np.array([records[i]['ts'] for i in timed], dtype=np.float64)
+        durations[timed] = np.diff(ts, axis=1)
+    for i, record in enumerate(records):
+        if 'ts' in record:
+            continue
+        if 'stages' not in record:
+            raise ValueError(f'{path}:{line_numbers[i]}: trace record has neither "ts" nor '
+                             f'"stages"')
+        durations[i] = [record['stages'].get(name, 0.0) for name in stage_names]
+    return durations
+
+
+def iter_trace_chunks(path, stage_names=STAGE_NAMES, chunk_lines=CHUNK_LINES):
+    """Yield (n_frames, n_stages) blocks of stage durations in ms."""
+    with open(path) as f:
+        numbered = enumerate(f, start=1)
+        while True:
+            chunk = list(islice(numbered, chunk_lines))
+            if not chunk:
+                return
+            lines = [(n, line) for n, line in chunk if line.strip()]
+            if not lines:
+                continue
+            # One json.loads per chunk is much faster than one per line
+            records = json.loads('[' + ','.join(line for _, line in lines) + ']')
+            yield _durations(records, stage_names, path, [n for n, _ in lines])
+
+
+class TraceSummary(NamedTuple):
+    """Per-stage and end-to-end latency statistics of a trace (ms)."""
+    frames: int
+    quantiles: tuple                # Percentiles, e.g. (50, 95, 99)
+    stage_quantiles: np.ndarray     # (len(quantiles), n_stages)
+    total_quantiles: np.ndarray     # (len(quantiles),) of the per-frame sum
+    stage_means: np.ndarray
+
+
+def summarize_trace(path, quantiles=(50, 95, 99), stage_names=STAGE_NAMES):
+    """Stream a trace into histograms and return its summary."""
+    stages = LogHistogram(len(stage_names))
+    totals = LogHistogram(1)
+    for durations in iter_trace_chunks(path, stage_names):
+        stages.add(durations)
+        totals.add(durations.sum(axis=1, keepdims=True))
+
+    return TraceSummary(
+        frames=stages.count,
+        quantiles=tuple(quantiles),
+        stage_quantiles=np.array([stages.quantile(q) for q in quantiles]),
+        total_quantiles=np.array([totals.quantile(q)[0] for q in quantiles]),
+        stage_means=stages.mean(),
+    )
+
+
+def write_trace(path, durations, start_frame=0, mode='w'):
+    """Write a (n_frames, n_stages) block of durations as a timestamp trace."""
+    durations = np.asarray(durations, dtype=np.float64)
+    ts = np.zeros((len(durations), durations.shape[1] + 1))
+    np.cumsum(durations, axis=1, out=ts[:, 1:])
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, mode) as f:
+        for i, row in enumerate(np.round(ts, 4).tolist()):
+            f.write(json.dumps({'frame': start_frame + i, 'ts': row}) + '\n')
+
+
+def synthetic_trace(path, n_frames, means, seed=0, chunk=CHUNK_LINES):
+    """Log-normal stage durations around `means`; for exercising the tooling only."""
+    rng = np.random.default_rng(seed)
+    means = np.asarray(means, dtype=np.float64)
+    sigma = 0.35
+    for start in range(0, n_frames, chunk):
+        n = min(chunk, n_frames - start)
+        durations = means * rng.lognormal(-sigma ** 2 / 2, sigma, (n, len(means)))
+        write_trace(path, durations, start, 'w' if start == 0 else 'a')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('trace', type=Path, nargs='?', default=DEFAULT_TRACE)
+    parser.add_argument('--synthetic', type=int, metavar='FRAMES',
+                        help='write a synthetic trace with this many frames first')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        means = [1.5, 12.0, 0.5, 0.1, 0.8, 2.5, 16.0]
+        synthetic_trace(args.trace, args.synthetic, means)
+        print(f'Wrote synthetic trace ({args.synthetic} frames) to {args.trace}')
+
+    summary = summarize_trace(args.trace)
+    print(f'{summary.frames} frames')
+    print(f'{"Stage":<22}' + ''.join(f'{f"p{q}":>9}' for q in summary.quantiles))
+    for i, name in enumerate(STAGE_NAMES):
+        print(f'{name:<22}' + ''.join(f'{v:>9.2f}' for v in summary.stage_quantiles[:, i]))
+    print(f'{"End-to-end":<22}' + ''.join(f'{v:>9.2f}' for v in summary.total_quantiles))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Local Module Closure
+The sibling modules a script imports, followed transitively, and their hash
+Mambo Whistle Technical Report
+
+The scripts in this directory import each other flat (`import yin`). The
+figure build runner fingerprints a figure by this closure, and the pitch
+evaluation cache keys its results on the closure of detectors.py.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import ast
+import hashlib
+
+
+def local_imports(path, seen=None):
+    """Sibling modules imported by `path`, followed transitively."""
+    seen = set() if seen is None else seen
+    tree = ast.parse(path.read_text(), filename=str(path))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            candidate = path.parent / (module.split('.')[0] + '.py')
+            if candidate.exists() and candidate not in seen:
+                seen.add(candidate)
+                local_imports(candidate, seen)
+    return seen
+
+
+def closure(path):
+    """`path` and every sibling module it imports, sorted for stable hashing."""
+    return sorted({path, *local_imports(path)})
+
+
+def source_hash(path):
+    """SHA-256 over the names and contents of closure(path)."""
+    digest = hashlib.sha256()
+    for source in closure(path):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Onset Detector Replay
+Whole-recording replay of the worklet's SimpleOnsetDetector with onset F-measure
+Mambo Whistle Technical Report
+
+SimpleOnsetDetector (js/pitch-worklet.js) moves between silence, attack,
+sustain and release one frame at a time. Every transition except the end
+of an attack depends only on the current frame, so the replay works on
+arrays:
+
+1. envelope(): the volume the worklet feeds in, per 512-sample hop. This is
+   the RMS of the render quantum that completes each frame, smoothed by the
+   volume EMAFilter (alpha 0.3) and converted to dB. Only the quanta that
+   complete a frame are read.
+2. conditions(): energy increase over the 5-value history and the level
+   tests of each state, for every frame and every clip at once.
+3. replay(): for each condition, the index of the next frame where it
+   holds (a reversed minimum scan). The state machine then jumps from one
+   transition to the next, so the Python loop runs once per state change,
+   not once per frame. An attack ends at the first frame minStateDuration
+   after it started, found with searchsorted on the frame times.
+
+The worklet only calls detect() on frames with a detected pitch; the
+replay feeds every hop, which is what a parameter search over whole
+recordings needs. Onsets (entries into 'attack') are matched one-to-one
+with the corpus onsets (voiced-segment starts) within ONSET_TOLERANCE,
+and scored with precision, recall and F-measure. States are checked
+against the sequential port in worklet_sim.py and, when Node is present,
+against the JS class itself.
+
+Usage:
+    python onset_replay.py --corpus ../data/corpus
+    python onset_replay.py --corpus ../data/corpus --sweep --check-js
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import itertools
+import time
+from pathlib import Path
+
+import numpy as np
+
+import corpus
+import smoothing
+import worklet_js
+import worklet_sim
+
+FRAME_LENGTH = 1024                 # Worklet accumulation buffer
+HOP = FRAME_LENGTH // 2             # Results every half buffer
+QUANTUM = 128
+VOLUME_ALPHA = worklet_sim.VOLUME_ALPHA
+HISTORY_SIZE = 5                    # SimpleOnsetDetector historySize
+ONSET_TOLERANCE = 0.05              # Seconds either side of a reference onset
+
+STATES = ('silence', 'attack', 'sustain', 'release')
+SILENCE, ATTACK, SUSTAIN, RELEASE = range(len(STATES))
+
+# Worklet configuration: energyThreshold (dB), silenceThreshold (dB), minStateDuration (ms)
+DEFAULT_PARAMS = {'energy_threshold': 3.0, 'silence_threshold': -40.0, 'min_state_duration': 50.0}
+SWEEP_GRID = {
+    'energy_threshold': [1.0, 2.0, 3.0, 4.0, 6.0, 8.0],
+    'silence_threshold': [-60.0, -50.0, -40.0, -35.0, -30.0, -25.0, -20.0],
+    'min_state_duration': [0.0, 25.0, 50.0, 100.0, 200.0],
+}
+
+
+# ============================================================================
+#  ENVELOPE AND CONDITIONS
+# ============================================================================
+
+def envelope(audio, fs):
+    """
+    (volume_db, times) of each hop for audio of shape (..., n_samples).
+    times is the currentTime (s) of the quantum that completes each frame.
+    """
+    audio = np.asarray(audio)
+    n_frames = (audio.shape[-1] - FRAME_LENGTH) // HOP + 1
+    if n_frames <= 0:
+        return np.zeros(audio.shape[:-1] + (0,)), np.zeros(0)
+    per_hop, first = HOP // QUANTUM, FRAME_LENGTH // QUANTUM - 1
+    n_quanta = audio.shape[-1] // QUANTUM
+    quanta = audio[..., :n_quanta * QUANTUM].reshape(audio.shape[:-1] + (n_quanta, QUANTUM))
+    last = quanta[..., first::per_hop, :][..., :n_frames, :].astype(np.float64)
+    volume = np.sqrt(np.einsum('...i,...i->...', last, last) / QUANTUM)
+
+    # volumeFilter: the first value passes through
+    volume = smoothing.recurrence(VOLUME_ALPHA * volume, 1 - VOLUME_ALPHA, initial=volume[..., 0])
+    with np.errstate(divide='ignore'):
+        volume_db = np.where(volume > 0, 20 * np.log10(volume), -100.0)
+    times = (first + per_hop * np.arange(n_frames)) * QUANTUM / fs
+    return volume_db, times
+
+
+def _next_true(mask):
+    """Index of the next frame (inclusive) where mask holds, n if none; length n + 1."""
+    n = mask.shape[-1]
+    index = np.where(mask, np.arange(n), n)
+    index = np.concatenate([index, np.full(mask.shape[:-1] + (1,), n)], axis=-1)
+    return np.minimum.accumulate(index[..., ::-1], axis=-1)[..., ::-1]
+
+
+def conditions(volume_db, energy_threshold, silence_threshold, history_size=HISTORY_SIZE):
+    """Next-frame tables of the transition conditions, over the last axis."""
+    v = np.asarray(volume_db, dtype=np.float64)
+    n = v.shape[-1]
+    total = np.cumsum(v, axis=-1)
+    lagged = np.zeros_like(total)
+    lagged[..., history_size:] = total[..., :-history_size]
+    count = np.minimum(np.arange(1, n + 1), history_size)
+    increase = v - (total - lagged) / count
+
+    return {
+        'above_silence': _next_true(v > silence_threshold),
+        'below_silence': _next_true(v < silence_threshold),
+        'below_release': _next_true(v < silence_threshold + 10),
+        'above_recovery': _next_true(v > silence_threshold + 15),
+        'attack': (increase > energy_threshold) | (v > -20),
+    }
+
+
+# ============================================================================
+#  STATE MACHINE
+# ============================================================================
+
+def replay(volume_db, times, energy_threshold=3.0, silence_threshold=-40.0,
+           min_state_duration=50.0, tables=None):
+    """
+    SimpleOnsetDetector states of one track. Returns (change frames, new
+    states): the state is states[i] from frame changes[i] until the next
+    change. `tables` are precomputed conditions() for this track.
+    """
+    t = np.asarray(times, dtype=np.float64)
+    n = len(t)
+    if tables is None:
+        tables = conditions(volume_db, energy_threshold, silence_threshold)
+    above, below = tables['above_silence'], tables['below_silence']
+    release_at, recovery_at = tables['below_release'], tables['above_recovery']
+    attack = tables['attack']
+
+    changes, states = [0], [SILENCE]
+    state, search = SILENCE, 0
+    while search < n:
+        if state == SILENCE:
+            frame = above[search]
+            new_state = ATTACK if frame < n and attack[frame] else SUSTAIN
+        elif state == ATTACK:
+            # First later frame with (t - lastStateChange) * 1000 >= minStateDuration
+            start = t[search - 1]
+            frame = max(int(np.searchsorted(t, start + min_state_duration / 1000)), search)
+            while frame > search and (t[frame - 1] - start) * 1000 >= min_state_duration:
+                frame -= 1
+            while frame < n and (t[frame] - start) * 1000 < min_state_duration:
+                frame += 1
+            new_state = SUSTAIN
+        elif state == SUSTAIN:
+            frame, new_state = release_at[search], RELEASE
+        else:
+            quiet, loud = below[search], recovery_at[search]
+            frame, new_state = (quiet, SILENCE) if quiet < loud else (loud, SUSTAIN)
+        if frame >= n:
+            break
+        changes.append(int(frame))
+        states.append(new_state)
+        state, search = new_state, frame + 1
+    return np.array(changes), np.array(states, dtype=np.int8)
+
+
+def expand(changes, states, n):
+    """Per-frame state codes from replay() output."""
+    return np.repeat(states, np.diff(np.append(changes, n)))
+
+
+def replay_clips(volume_db, times, energy_threshold=3.0, silence_threshold=-40.0,
+                 min_state_duration=50.0):
+    """Onset times (s) of each clip (row), with a fresh detector per clip."""
+    tables = conditions(volume_db, energy_threshold, silence_threshold)
+    onsets = []
+    for i in range(len(volume_db)):
+        clip_tables = {name: table[i] for name, table in tables.items()}
+        changes, states = replay(volume_db[i], times, min_state_duration=min_state_duration,
+                                 tables=clip_tables)
+        onsets.append(times[changes[states == ATTACK]])
+    return onsets
+
+
+# ============================================================================
+#  EVALUATION
+# ============================================================================
+
+def reference_onsets(f0, fs):
+    """Voiced-segment starts (s) of each clip from its per-sample F0."""
+    voiced = np.asarray(f0) > 0
+    starts = voiced & ~np.concatenate([np.zeros(voiced.shape[:-1] + (1,), bool),
+                                       voiced[..., :-1]], axis=-1)
+    return [np.flatnonzero(row) / fs for row in starts]
+
+
+def match_onsets(reference, estimated, tolerance=ONSET_TOLERANCE):
+    """Number of one-to-one matches within `tolerance`, pairing in time order."""
+    i = j = hits = 0
+    while i < len(reference) and j < len(estimated):
+        if abs(reference[i] - estimated[j]) <= tolerance:
+            hits, i, j = hits + 1, i + 1, j + 1
+        elif estimated[j] < reference[i]:
+            j += 1
+        else:
+            i += 1
+    return hits
+
+
+def f_measure(references, estimates, tolerance=ONSET_TOLERANCE):
+    """Precision, recall and F-measure over all clips."""
+    hits = sum(match_onsets(r, e, tolerance) for r, e in zip(references, estimates))
+    n_reference = sum(len(r) for r in references)
+    n_estimated = sum(len(e) for e in estimates)
+    precision = hits / n_estimated if n_estimated else 0.0
+    recall = hits / n_reference if n_reference else 0.0
+    f = 2 * precision * recall / (precision + recall) if hits else 0.0
+    return {'precision': precision, 'recall': recall, 'f_measure': f,
+            'reference': n_reference, 'estimated': n_estimated}
+
+
+# ============================================================================
+#  CHECKS
+# ============================================================================
+
+def sequential_states(volume_db, times, energy_threshold=3.0, silence_threshold=-40.0,
+                      min_state_duration=50.0):
+    """States from the frame-by-frame port (worklet_sim.OnsetDetector)."""
+    detector = worklet_sim.OnsetDetector(energy_threshold, HISTORY_SIZE, silence_threshold,
+                                         min_state_duration)
+    return np.array([STATES.index(detector.detect(v, t))
+                     for v, t in zip(volume_db.tolist(), times.tolist())], dtype=np.int8)
+
+
+_JS_ONSETS = r'''
+const states = ['silence', 'attack', 'sustain', 'release'];
+const n = __FRAMES__;
+for (let clip = 0; clip < frames.length / (2 * n); clip++) {
+    const detector = new SimpleOnsetDetector({ energyThreshold: __ENERGY__,
+        silenceThreshold: __SILENCE__, minStateDuration: __DURATION__ });
+    for (let i = 0; i < n; i++) {
+        const k = 2 * (clip * n + i);
+        out.push(states.indexOf(detector.detect(frames[k], frames[k + 1])));
+    }
+}
+'''
+
+
+def js_states(volume_db, times, fs, energy_threshold=3.0, silence_threshold=-40.0,
+              min_state_duration=50.0):
+    """States of the worklet's SimpleOnsetDetector under Node, (n_clips, n_frames)."""
+    pairs = np.stack(np.broadcast_arrays(volume_db, times), axis=-1)
+    snippet = (_JS_ONSETS.replace('__FRAMES__', str(len(times)))
+               .replace('__ENERGY__', repr(energy_threshold))
+               .replace('__SILENCE__', repr(silence_threshold))
+               .replace('__DURATION__', repr(min_state_duration)))
+    return worklet_js.run(snippet, pairs, fs).reshape(volume_db.shape).astype(np.int8)
+
+
+def check(volume_db, times, fs, params, use_js):
+    """Clips whose replayed states differ from the sequential port (and the JS class)."""
+    # The JS side reads float32 inputs; replay exactly those values
+    volume_db = volume_db.astype(np.float32).astype(np.float64)
+    times = times.astype(np.float32).astype(np.float64)
+    replayed = np.array([expand(*replay(v, times, **params), len(times)) for v in volume_db])
+    sequential = np.array([sequential_states(v, times, **params) for v in volume_db])
+    mismatches = {'sequential': int(np.sum(np.any(replayed != sequential, axis=1)))}
+    if use_js:
+        js = js_states(volume_db, times, fs, **params)
+        mismatches['js'] = int(np.sum(np.any(replayed != js, axis=1)))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', type=Path, default=corpus.DEFAULT_OUTPUT)
+    parser.add_argument('--energy-threshold', type=float, default=DEFAULT_PARAMS['energy_threshold'])
+    parser.add_argument('--silence-threshold', type=float,
+                        default=DEFAULT_PARAMS['silence_threshold'])
+    parser.add_argument('--min-state-duration', type=float,
+                        default=DEFAULT_PARAMS['min_state_duration'])
+    parser.add_argument('--sweep', action='store_true', help='grid search over SWEEP_GRID')
+    parser.add_argument('--check-js', action='store_true',
+                        help='compare states with SimpleOnsetDetector under Node')
+    parser.add_argument('--check-clips', type=int, default=32, help='clips compared by --check-js')
+    args = parser.parse_args()
+
+    data = corpus.Corpus(args.corpus)
+    hours = data.audio.size / data.fs / 3600
+    start = time.perf_counter()
+    volume_db, times = envelope(data.audio, data.fs)
+    envelope_seconds = time.perf_counter() - start
+    references = reference_onsets(data.f0, data.fs)
+
+    params = {'energy_threshold': args.energy_threshold,
+              'silence_threshold': args.silence_threshold,
+              'min_state_duration': args.min_state_duration}
+    start = time.perf_counter()
+    estimates = replay_clips(volume_db, times, **params)
+    replay_seconds = time.perf_counter() - start
+    scores = f_measure(references, estimates)
+
+    print(f'Corpus: {args.corpus} ({len(data)} clips, {hours * 60:.1f} min, '
+          f'{volume_db.size} frames)')
+    print(f'Envelope {envelope_seconds:.2f} s, replay {replay_seconds:.2f} s: '
+          f'{hours / (envelope_seconds + replay_seconds):.1f} h of audio per CPU second')
+    print(f'{params}: P {scores["precision"]:.3f}  R {scores["recall"]:.3f}  '
+          f'F {scores["f_measure"]:.3f}  ({scores["estimated"]} onsets, '
+          f'{scores["reference"]} reference)')
+
+    if args.check_js or args.sweep:
+        n = min(args.check_clips, len(data))
+        use_js = args.check_js and worklet_js.available()
+        if args.check_js and not use_js:
+            print('Node not found; JS check skipped')
+        mismatches = check(volume_db[:n], times, data.fs, params, use_js)
+        print(f'Clips with state mismatches out of {n}: '
+              + ', '.join(f'{name} {count}' for name, count in mismatches.items()))
+
+    if args.sweep:
+        settings = [dict(zip(SWEEP_GRID, values))
+                    for values in itertools.product(*SWEEP_GRID.values())]
+        start = time.perf_counter()
+        results = [(f_measure(references, replay_clips(volume_db, times, **p)), p)
+                   for p in settings]
+        seconds = time.perf_counter() - start
+        results.sort(key=lambda r: -r[0]['f_measure'])
+        print(f'\n{len(settings)} settings in {seconds:.1f} s '
+              f'({hours * len(settings) / seconds:.0f} h of audio per CPU second); best:')
+        print(f'{"energy":>8} {"silence":>8} {"min ms":>8} {"P":>7} {"R":>7} {"F":>7}')
+        for scores, p in results[:10]:
+            print(f'{p["energy_threshold"]:>8g} {p["silence_threshold"]:>8g} '
+                  f'{p["min_state_duration"]:>8g} {scores["precision"]:>7.3f} '
+                  f'{scores["recall"]:>7.3f} {scores["f_measure"]:>7.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Operation Counts per Detector
+Traced multiply-adds, comparisons and memory traffic per frame for Figure 1
+Mambo Whistle Technical Report
+
+Each registered detector (detectors.py) is run on frames wrapped in a
+counting ndarray subclass. Every ufunc call, reduction and NumPy function
+that touches a counted array is tallied:
+
+    madds     arithmetic operations (a multiply-add counts once); an FFT of
+              length n counts n log2 n, a matrix product or einsum one per
+              term (the product of the output and contracted dimensions)
+    compares  comparisons, min/max, select, logic and bit operations
+              (one per element; a uint64 XOR or popcount counts once)
+    bytes     operand and result bytes of each operation (unfused traffic)
+
+Nested NumPy calls are not double counted, and views (slicing, reshape,
+sliding windows) are free. A NumPy function missing from the cost tables
+below raises a warning, naming it, instead of silently counting as free. Counts are steady-state: each detector is
+called once before tracing so cached tables (SWIPE kernels) are not
+charged to every frame. Sweeping the frame length and maxFrequency shows
+how each detector's cost scales.
+
+Results go to data/op_counts.json, which Figure 1 reads for its bubble
+sizes (in thousands of operations per frame).
+
+Usage:
+    python op_count.py [--frame-lengths 512 1024 2048 4096] [--max-freq 800 2000]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import inspect
+import json
+import math
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+import benchmark_pitch_detectors
+import detectors
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'op_counts.json'
+COUNT_KEYS = ('madds', 'compares', 'bytes')
+
+ARITHMETIC_UFUNCS = {
+    'add', 'subtract', 'multiply', 'divide', 'true_divide', 'floor_divide', 'remainder',
+    'negative', 'positive', 'absolute', 'fabs', 'square', 'sqrt', 'reciprocal', 'power',
+    'float_power', 'exp', 'exp2', 'expm1', 'log', 'log2', 'log10', 'log1p', 'sin', 'cos',
+    'tan', 'arctan', 'arctan2', 'hypot', 'rint', 'floor', 'ceil', 'trunc', 'conjugate',
+}
+# Everything else (comparisons, maximum/minimum, logic and bit operations,
+# isfinite, ...) counts as a comparison
+
+REDUCTIONS = {'sum', 'mean', 'prod', 'cumsum', 'cumprod', 'norm', 'var', 'std', 'diff'}
+PRODUCTS = {'dot', 'matmul', 'inner', 'vdot', 'einsum'}
+ELEMENTWISE = {'sinc': 3, 'hamming': 2, 'hanning': 2, 'nan_to_num': 1}     # madds per element
+SEARCHES = {'argmax', 'argmin', 'max', 'min', 'amax', 'amin', 'where', 'clip', 'isin',
+            'nonzero', 'flatnonzero', 'any', 'all', 'count_nonzero', 'packbits', 'unpackbits'}
+FFTS = {'fft', 'ifft', 'rfft', 'irfft'}
+# Copies and gathers: memory traffic only
+COPIES = {'concatenate', 'stack', 'vstack', 'hstack', 'append', 'copy', 'take', 'take_along_axis',
+          'put_along_axis', 'repeat', 'tile', 'pad', 'zeros_like', 'ones_like', 'empty_like',
+          'full_like', 'ascontiguousarray', 'round', 'around'}
+# Views: free
+VIEWS = {'reshape', 'ravel', 'transpose', 'swapaxes', 'moveaxis', 'squeeze', 'expand_dims',
+         'atleast_1d', 'atleast_2d', 'broadcast_to', 'broadcast_arrays', 'sliding_window_view',
+         'shape', 'ndim', 'size', 'result_type', 'may_share_memory', 'shares_memory'}
+
+# Array constructors whose results must be counted too while tracing
+_CONSTRUCTORS = ('asarray', 'zeros', 'ones', 'empty', 'full', 'arange', 'linspace', 'hanning')
+
+
+# ============================================================================
+#  COUNTING ARRAY
+# ============================================================================
+
+_active = None      # Tracer collecting counts, or None
+_warned = set()     # NumPy functions without a cost entry, warned about once
+
+
+def _unwrap(value):
+    if isinstance(value, Counted):
+        return value.view(np.ndarray)
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_fields'):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _wrap(value):
+    if type(value) is np.ndarray:
+        return value.view(Counted)
+    if isinstance(value, tuple) and not hasattr(value, '_fields'):
+        return tuple(_wrap(v) for v in value)
+    return value
+
+
+def _arrays(values):
+    for value in values:
+        if isinstance(value, np.ndarray):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            yield from _arrays(value)
+
+
+def _traffic(inputs, outputs):
+    return sum(a.nbytes for a in _arrays(inputs)) + sum(a.nbytes for a in _arrays(outputs))
+
+
+class Counted(np.ndarray):
+    """ndarray subclass that reports its operations to the active Tracer."""
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        raw_inputs = _unwrap(inputs)
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}      # out=, where=
+        result = getattr(ufunc, method)(*raw_inputs, **kwargs)
+        if _active is not None:
+            _active.count_ufunc(ufunc, method, raw_inputs, result)
+        return _wrap(result)
+
+    def __array_function__(self, func, types, args, kwargs):
+        raw_args, raw_kwargs = _unwrap(args), {k: _unwrap(v) for k, v in kwargs.items()}
+        result = func(*raw_args, **raw_kwargs)
+        if _active is not None:
+            _active.count_function(func.__name__, raw_args, result)
+        return _wrap(result)
+
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        keys = key if isinstance(key, tuple) else (key,)
+        basic = all(k is None or k is Ellipsis or isinstance(k, (slice, int, np.integer))
+                    for k in keys)
+        # Advanced indexing gathers into a new array: charge the copy
+        if not basic and _active is not None and isinstance(result, np.ndarray):
+            _active.counts['bytes'] += 2 * result.nbytes
+        return result
+
+
+class Tracer:
+    """Context manager collecting counts from Counted arrays."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNT_KEYS, 0)
+        self._saved = {}
+
+    def count_ufunc(self, ufunc, method, inputs, result):
+        arrays = list(_arrays(inputs))
+        if method == '__call__':
+            n = max((np.size(r) for r in _arrays([result])), default=1)
+            if ufunc.__name__ == 'matmul':
+                n *= arrays[0].shape[-1]
+        else:                           # reduce, accumulate, reduceat, at
+            n = arrays[0].size if arrays else 1
+        kind = 'madds' if ufunc.__name__ in ARITHMETIC_UFUNCS | {'matmul'} else 'compares'
+        self.counts[kind] += n
+        self.counts['bytes'] += _traffic(inputs, [result])
+
+    def count_function(self, name, args, result):
+        arrays = list(_arrays(args))
+        size = arrays[0].size if arrays else 0
+        if name in FFTS:
+            out = result if isinstance(result, np.ndarray) else arrays[0]
+            n = out.shape[-1] if name in ('irfft', 'fft', 'ifft') else 2 * (out.shape[-1] - 1)
+            self.counts['madds'] += out.size // out.shape[-1] * n * math.log2(max(n, 2))
+        elif name in PRODUCTS:
+            self.counts['madds'] += _product_terms(name, args, result)
+        elif name in REDUCTIONS:
+            self.counts['madds'] += size
+        elif name in ELEMENTWISE:
+            self.counts['madds'] += ELEMENTWISE[name] * size
+        elif name in SEARCHES:
+            self.counts['compares'] += size
+        elif name in ('searchsorted', 'argsort', 'sort', 'unique'):
+            self.counts['compares'] += size * math.log2(max(size, 2))
+        elif name in VIEWS:
+            return
+        elif name not in COPIES and name not in _warned:
+            _warned.add(name)
+            warnings.warn(f'op_count has no cost for numpy.{name}; only its memory traffic '
+                          f'is counted', stacklevel=2)
+        self.counts['bytes'] += _traffic(args, [result])
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError('tracers cannot be nested')
+        _active = self
+        for name in _CONSTRUCTORS:
+            original = getattr(np, name)
+            self._saved[name] = original
+            setattr(np, name, _counted_constructor(name, original))
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        for name, original in self._saved.items():
+            setattr(np, name, original)
+        self._saved.clear()
+        _active = None
+        return False
+
+
+def _product_terms(name, args, result):
+    """Multiply-adds of a matrix or tensor product: one per term summed."""
+    if name == 'einsum':
+        spec, operands = args[0], [np.asarray(a) for a in args[1:]]
+        if not isinstance(spec, str):
+            raise ValueError('op_count only counts einsum with a subscripts string')
+        inputs = spec.replace(' ', '').split('->')[0].split(',')
+        sizes, ellipsis = {}, 1
+        for subscripts, operand in zip(inputs, operands):
+            letters = subscripts.replace('...', '')
+            n_ellipsis = operand.ndim - len(letters)
+            if '...' in subscripts:
+                start = subscripts.index('...')
+                ellipsis = max(ellipsis, math.prod(operand.shape[start:start + n_ellipsis]))
+                dims = operand.shape[:start] + operand.shape[start + n_ellipsis:]
+            else:
+                dims = operand.shape
+            for letter, dim in zip(letters, dims):
+                sizes[letter] = max(sizes.get(letter, 1), dim)
+        # Every combination of output and contracted indices is one term
+        return ellipsis * math.prod(sizes.values())
+    a = np.asarray(args[0])
+    return max(np.size(result), 1) * (a.shape[-1] if a.ndim else 1)
+
+
+def _counted_constructor(name, original):
+    if name == 'asarray':
+        # Keep the subclass where detectors coerce their input
+        def asarray(a, dtype=None, order=None, **kwargs):
+            return _wrap(np.asanyarray(a, dtype=dtype, order=order, **kwargs))
+        return asarray
+
+    def constructor(*args, **kwargs):
+        return _wrap(original(*args, **kwargs))
+    return constructor
+
+
+# ============================================================================
+#  PER-DETECTOR COUNTS
+# ============================================================================
+
+def count_detector(detector, frames, fs):
+    """Steady-state counts per frame for one detector instance."""
+    detector(frames, fs)
+    with Tracer() as tracer:
+        detector(np.asarray(frames, dtype=np.float64).view(Counted), fs)
+    return {key: round(value / len(frames)) for key, value in tracer.counts.items()}
+
+
+def count_all(names, frame_length, max_freq=None, n_frames=64, fs=benchmark_pitch_detectors.FS):
+    """Counts per frame for each named detector at one frame length."""
+    frames, _ = benchmark_pitch_detectors.synthetic_corpus(n_frames, frame_length=frame_length)
+    results = {}
+    for name in names:
+        # Detectors without a max_freq parameter search every lag regardless
+        accepts = 'max_freq' in inspect.signature(detectors.DETECTORS[name]).parameters
+        params = {'max_freq': max_freq} if max_freq is not None and accepts else {}
+        counts = count_detector(detectors.create(name, **params), frames, fs)
+        counts['ops'] = counts['madds'] + counts['compares']
+        results[name] = counts
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--detectors', nargs='+', default=list(detectors.DETECTORS),
+                        choices=list(detectors.DETECTORS))
+    parser.add_argument('--frame-length', type=int, default=benchmark_pitch_detectors.FRAME_LENGTH,
+                        help='frame length of the Figure 1 counts')
+    parser.add_argument('--frame-lengths', type=int, nargs='+', default=[512, 1024, 2048, 4096],
+                        help='frame lengths of the scaling table')
+    parser.add_argument('--max-freq', type=float, nargs='+', default=[800.0, 2000.0],
+                        help='maxFrequency values of the scaling table')
+    parser.add_argument('--frames', type=int, default=64, help='frames traced per setting')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    counts = count_all(args.detectors, args.frame_length, n_frames=args.frames)
+    print(f'Per frame at N = {args.frame_length}:')
+    print(f'{"Detector":<16} {"madds":>10} {"compares":>10} {"bytes":>11}')
+    for name, c in counts.items():
+        print(f'{name:<16} {c["madds"]:>10,} {c["compares"]:>10,} {c["bytes"]:>11,}')
+
+    scaling = {name: [] for name in args.detectors}
+    print(f'\nThousands of ops per frame (madds + compares) by N and maxFrequency:')
+    settings = [(n, f) for n in args.frame_lengths for f in args.max_freq]
+    print(f'{"Detector":<16}' + ''.join(f'{f"{n}/{f:g}":>12}' for n, f in settings))
+    for n, f in settings:
+        for name, c in count_all(args.detectors, n, f, args.frames).items():
+            scaling[name].append({'frame_length': n, 'max_freq': f, **c})
+    for name, rows in scaling.items():
+        print(f'{name:<16}' + ''.join(f'{r["ops"] / 1000:>12.1f}' for r in rows))
+
+    report = {
+        'fs': benchmark_pitch_detectors.FS,
+        'frame_length': args.frame_length,
+        'detectors': counts,
+        'scaling': scaling,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Pitch Accuracy Evaluation Engine
+Sharded, disk-cached pitch and voicing metrics over a generated corpus
+Mambo Whistle Technical Report
+
+Any detector in the registry (detectors.py) can be evaluated; frames are
+compared against the corpus F0 at each frame centre with the metrics of
+pitch_metrics.py (VR, VFA, RPA, RCA, GPE, OA).
+
+Clips are split into shards that run in a process pool. Each clip's raw
+counts are cached on disk under a key built from the detector, its
+parameters, the framing, a hash of the detector source modules and a hash
+of the clip's audio and ground truth, so changing one parameter only
+re-runs the affected evaluations and editing a detector re-runs them all.
+
+Usage:
+    python pitch_eval.py --corpus ../data/corpus
+    python pitch_eval.py --corpus ../data/corpus --param threshold=0.1,0.15,0.2
+    python pitch_eval.py --corpus ../data/corpus --detector SWIPE
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import ast
+import functools
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import corpus
+import detectors
+import local_modules
+import pitch_metrics
+import yin
+
+FIGURES_PATH = Path(__file__).parent.parent
+DEFAULT_CACHE = FIGURES_PATH / 'data' / '.eval-cache'
+DEFAULT_OUTPUT = FIGURES_PATH / 'data' / 'pitch_eval.json'
+
+CACHE_VERSION = 1               # Bump when pitch_metrics.frame_counts changes
+
+
+# ============================================================================
+#  CACHE
+# ============================================================================
+
+def clip_hash(audio, f0):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(f0, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def detector_code_hash():
+    """
+    Hash of detectors.py and every sibling module it imports, transitively,
+    so editing a detector invalidates its cached counts.
+    """
+    return local_modules.source_hash(Path(detectors.__file__))
+
+
+def cache_key(detector, params, frame_length, hop, fs, clip_digest):
+    spec = json.dumps({
+        'version': CACHE_VERSION,
+        'code': detector_code_hash(),
+        'detector': detector,
+        'params': params,
+        'frame_length': frame_length,
+        'hop': hop,
+        'fs': fs,
+        'clip': clip_digest,
+    }, sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def _cache_path(cache_dir, key):
+    return Path(cache_dir) / key[:2] / f'{key}.json'
+
+
+def _read_cache(cache_dir, key):
+    try:
+        return np.array(json.loads(_cache_path(cache_dir, key).read_text()), dtype=np.int64)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_cache(cache_dir, key, counts):
+    path = _cache_path(cache_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename so a concurrent reader never sees a partial file
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(counts.tolist()))
+    tmp.replace(path)
+
+
+# ============================================================================
+#  SHARDED EVALUATION
+# ============================================================================
+
+def evaluate_shard(corpus_path, start, stop, detector, params, frame_length, hop, cache_dir):
+    """
+    Counts for clips [start, stop). Cached clips are read back; the rest are
+    framed and run through the detector in one batch (one call per clip for
+    sequential detectors, which decode their frames as one track).
+    Returns (counts of shape (stop - start, len(pitch_metrics.COUNTS)), n_cached).
+    """
+    data = corpus.Corpus(corpus_path)
+    fs = data.fs
+    detect = detectors.create(detector, **params)
+    counts = np.zeros((stop - start, len(pitch_metrics.COUNTS)), dtype=np.int64)
+
+    pending = []
+    for i in range(start, stop):
+        audio, f0 = data[i]
+        key = cache_key(detector, params, frame_length, hop, fs, clip_hash(audio, f0))
+        cached = _read_cache(cache_dir, key)
+        if cached is not None:
+            counts[i - start] = cached
+        else:
+            pending.append((i, key))
+
+    if pending:
+        frames, truth, sizes = [], [], []
+        for i, _ in pending:
+            audio, f0 = data[i]
+            windows = yin.frame_signal(np.asarray(audio, dtype=np.float64), frame_length, hop)
+            frames.append(windows)
+            truth.append(yin.frame_signal(f0, frame_length, hop)[:, frame_length // 2])
+            sizes.append(len(windows))
+
+        bounds = np.cumsum([0] + sizes)
+        if detect.sequential:
+            f0_est = np.concatenate([detect(windows, fs)[0] for windows in frames])
+        else:
+            f0_est, _ = detect(np.concatenate(frames), fs)
+        for (i, key), ref, lo, hi in zip(pending, truth, bounds[:-1], bounds[1:]):
+            counts[i - start] = pitch_metrics.frame_counts(f0_est[lo:hi], ref)
+            _write_cache(cache_dir, key, counts[i - start])
+
+    return counts, (stop - start) - len(pending)
+
+
+def evaluate(corpus_path, detector='YIN', params=None, frame_length=1024, hop=512,
+             cache_dir=DEFAULT_CACHE, jobs=None, shard_size=32, pool=None):
+    """
+    Evaluate one detector configuration over the whole corpus.
+    Returns (per-clip counts array, number of clips served from cache).
+    """
+    params = dict(params or {})
+    n_clips = len(corpus.Corpus(corpus_path))
+    shards = [(s, min(s + shard_size, n_clips)) for s in range(0, n_clips, shard_size)]
+    args = [(str(corpus_path), s, e, detector, params, frame_length, hop, str(cache_dir))
+            for s, e in shards]
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=jobs or os.cpu_count())
+    try:
+        results = list(pool.map(evaluate_shard, *zip(*args)))
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    if not results:
+        return np.zeros((0, len(pitch_metrics.COUNTS)), dtype=np.int64), 0
+    counts = np.concatenate([c for c, _ in results])
+    return counts, sum(n for _, n in results)
+
+
+def summarize(counts, clips):
+    """Overall metrics plus a breakdown by clip kind."""
+    kinds = np.array([c['kind'] for c in clips])
+    summary = {'all': pitch_metrics.metrics(counts.sum(axis=0))}
+    for kind in corpus.KINDS:
+        if (kinds == kind).any():
+            summary[kind] = pitch_metrics.metrics(counts[kinds == kind].sum(axis=0))
+    return summary
+
+
+def parse_value(text):
+    """'4096' -> 4096, '0.1' -> 0.1, 'True' -> True; anything else stays a string."""
+    try:
+        return ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError):
+        return text.strip()
+
+
+def parse_grid(specs):
+    """['threshold=0.1,0.15', ...] -> list of parameter dicts (Cartesian product)."""
+    names, values = [], []
+    for spec in specs:
+        name, _, options = spec.partition('=')
+        names.append(name)
+        values.append([parse_value(v) for v in options.split(',')])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', type=Path, default=corpus.DEFAULT_OUTPUT)
+    parser.add_argument('--detector', default='YIN', choices=list(detectors.DETECTORS))
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                        help='detector parameter values; repeat for a grid')
+    parser.add_argument('--frame-length', type=int, default=1024)
+    parser.add_argument('--hop', type=int, default=512)
+    parser.add_argument('--jobs', type=int)
+    parser.add_argument('--shard-size', type=int, default=32, help='clips per task')
+    parser.add_argument('--cache', type=Path, default=DEFAULT_CACHE)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    clips = corpus.Corpus(args.corpus).clips
+    print(f'Corpus: {args.corpus} ({len(clips)} clips)')
+    print(f'{"Params":<28} {"VR":>7} {"VFA":>7} {"RPA":>7} {"RCA":>7} {"GPE":>7} '
+          f'{"cached":>8} {"time (s)":>9}')
+
+    runs = []
+    with ProcessPoolExecutor(max_workers=args.jobs or os.cpu_count()) as pool:
+        for params in parse_grid(args.param):
+            start = time.perf_counter()
+            counts, cached = evaluate(args.corpus, args.detector, params, args.frame_length,
+                                      args.hop, args.cache, shard_size=args.shard_size,
+                                      pool=pool)
+            seconds = time.perf_counter() - start
+            summary = summarize(counts, clips)
+            m = summary['all']
+            label = ', '.join(f'{k}={v:g}' for k, v in params.items()) or 'defaults'
+            print(f'{label:<28} {m["VR"]:>7.2f} {m["VFA"]:>7.2f} {m["RPA"]:>7.2f} '
+                  f'{m["RCA"]:>7.2f} {m["GPE"]:>7.2f} {cached:>4}/{len(clips):<3} {seconds:>9.2f}')
+            runs.append({'detector': args.detector, 'params': params, 'metrics': summary})
+
+    report = {
+        'corpus': str(args.corpus),
+        'frame_length': args.frame_length,
+        'hop': args.hop,
+        'runs': runs,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Pitch Accuracy Metrics
+Frame-level pitch and voicing metrics against a ground-truth F0 contour
+Mambo Whistle Technical Report
+
+An F0 of 0 means unvoiced, for both reference and estimate:
+
+    VR    voicing recall         est voiced among reference-voiced frames
+    VFA   voicing false alarm    est voiced among reference-unvoiced frames
+    RPA   raw pitch accuracy     within 50 cents, over reference-voiced frames
+    RCA   raw chroma accuracy    as RPA, with octave errors forgiven
+    GPE   gross pitch error      more than 20% off, over frames voiced in both
+    OA    overall accuracy       correct voicing and (if voiced) pitch, over all frames
+
+Metrics are computed from integer counts, so results of many clips or
+shards combine by summing their counts.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import numpy as np
+
+CENTS_TOLERANCE = 50            # RPA / RCA
+GROSS_ERROR = 0.2               # GPE: relative frequency error
+
+# Per-clip counts, in this order
+COUNTS = ('frames', 'ref_voiced', 'ref_unvoiced', 'voiced_hits', 'false_alarms',
+          'both_voiced', 'pitch_correct', 'chroma_correct', 'gross_errors')
+
+
+def frame_counts(f0_est, f0_ref):
+    """
+    Counts (in COUNTS order) for one clip's estimated and reference F0.
+
+    f0_est may carry leading axes (e.g. one row per parameter setting); the
+    counts are then taken along the last axis, shape (..., len(COUNTS)).
+    """
+    f0_est = np.asarray(f0_est, dtype=np.float64)
+    f0_ref = np.asarray(f0_ref, dtype=np.float64)
+    ref_voiced = f0_ref > 0
+    est_voiced = f0_est > 0
+    both = ref_voiced & est_voiced
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cents = 1200 * np.log2(f0_est / f0_ref)
+        relative = np.abs(f0_est / f0_ref - 1)
+    cents = np.where(both, cents, np.nan)
+    chroma = np.abs(cents - 1200 * np.round(cents / 1200))
+
+    shape = f0_est.shape[:-1]
+    n_both = both.sum(axis=-1)
+    return np.stack([
+        np.full(shape, f0_ref.shape[-1]),
+        np.broadcast_to(ref_voiced.sum(axis=-1), shape),
+        np.broadcast_to((~ref_voiced).sum(axis=-1), shape),
+        n_both,
+        (est_voiced & ~ref_voiced).sum(axis=-1),
+        n_both,
+        (np.abs(cents) <= CENTS_TOLERANCE).sum(axis=-1),
+        (chroma <= CENTS_TOLERANCE).sum(axis=-1),
+        (both & (relative > GROSS_ERROR)).sum(axis=-1),
+    ], axis=-1).astype(np.int64)
+
+
+def metrics(counts):
+    """Percentages from summed counts."""
+    c = dict(zip(COUNTS, np.asarray(counts).tolist()))
+
+    def ratio(num, den):
+        return round(100 * num / den, 2) if den else float('nan')
+
+    return {
+        'VR': ratio(c['voiced_hits'], c['ref_voiced']),
+        'VFA': ratio(c['false_alarms'], c['ref_unvoiced']),
+        'RPA': ratio(c['pitch_correct'], c['ref_voiced']),
+        'RCA': ratio(c['chroma_correct'], c['ref_voiced']),
+        'GPE': ratio(c['gross_errors'], c['both_voiced']),
+        'OA': ratio(c['pitch_correct'] + c['ref_unvoiced'] - c['false_alarms'], c['frames']),
+        'frames': c['frames'],
+    }
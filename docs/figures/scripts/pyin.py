@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Probabilistic YIN (PYIN-style) Tracking
+Multi-threshold pitch candidates decoded with a banded log-domain Viterbi
+Mambo Whistle Technical Report
+
+Instead of one threshold, a grid of thresholds weighted by a beta prior
+(mean 0.1, as in Mauch & Dixon 2014) is applied to each frame's d'(tau).
+Every threshold nominates one lag (yin_sweep.py answers all thresholds from
+one d'), so a frame gets a handful of weighted candidates; thresholds with
+no dip hand a small share of their weight to the in-range minimum.
+
+The hidden state of each frame is (candidate, voiced/unvoiced). Transitions
+between consecutive frames are banded in pitch: a triangular weight within
+MAX_STEP_CENTS, and a small constant jump probability outside the band so
+note changes remain reachable. Voicing switches with SWITCH_PROBABILITY.
+The decoder keeps only the current scores and one int8 backpointer per state
+and frame, so memory is linear in the track length, and each step is a
+(2K x 2K) array operation over the K candidates.
+
+This replaces the worklet's 5-frame pitchHistory median with a decoder that
+uses the whole track.
+
+Accuracy against plain YIN is measured with the evaluation engine
+(`python pitch_eval.py --detector PYIN`); this script times the decoder.
+
+Usage:
+    python pyin.py [--hours 1.0]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+import yin
+import yin_sweep
+
+# ============================================================================
+#  MODEL PARAMETERS
+# ============================================================================
+
+THRESHOLDS = np.arange(1, 101) / 100        # 0.01 ... 1.00
+PRIOR_MEAN = 0.1                            # Beta prior over thresholds
+PRIOR_BETA = 18.0
+NO_DIP_WEIGHT = 0.01                        # Share given to the minimum when no dip
+N_CANDIDATES = 8                            # Candidates kept per frame
+
+MAX_STEP_CENTS = 250.0                      # Half-width of the pitch transition band
+JUMP_PROBABILITY = 1e-3                     # Any transition outside the band
+SWITCH_PROBABILITY = 0.01                   # Voiced <-> unvoiced
+VOICED_PRIOR = 0.5                          # Scales candidate weights into P(voiced)
+
+F0_RANGE = (80.0, 2000.0)                   # Worklet minFrequency .. accepted maximum
+
+
+def beta_prior(thresholds, mean=PRIOR_MEAN, b=PRIOR_BETA):
+    """Normalized beta(a, b) weights on the threshold grid, a chosen for the mean."""
+    a = mean * b / (1 - mean)
+    log_norm = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+    x = np.clip(np.asarray(thresholds, dtype=np.float64), 1e-6, 1 - 1e-6)
+    weights = np.exp(log_norm + (a - 1) * np.log(x) + (b - 1) * np.log1p(-x))
+    return weights / weights.sum()
+
+
+# ============================================================================
+#  CANDIDATES
+# ============================================================================
+
+def pitch_candidates(d_prime, fs, thresholds=THRESHOLDS, prior=None, f0_range=F0_RANGE,
+                     n_candidates=N_CANDIDATES):
+    """
+    Weighted F0 candidates per frame from one d' per frame.
+
+    Returns (f0, weight), both (n_frames, n_candidates), sorted by weight;
+    unused slots have f0 = 0. Weights of a frame sum to at most 1.
+    """
+    prior = beta_prior(thresholds) if prior is None else prior
+    sweep = yin_sweep.sweep_cmndf(d_prime, fs, thresholds, [f0_range])
+    tau = sweep.tau[:, 0]
+    tau_refined = sweep.tau_refined[:, 0]
+    weight = prior * np.where(sweep.has_dip[:, 0], 1.0, NO_DIP_WEIGHT)
+
+    # Merge thresholds that chose the same lag: sort lags per frame and sum
+    # the weight of each run of equal lags onto its first element
+    order = np.argsort(tau, axis=1, kind='stable')
+    tau = np.take_along_axis(tau, order, axis=1)
+    tau_refined = np.take_along_axis(tau_refined, order, axis=1)
+    weight = np.take_along_axis(weight, order, axis=1)
+
+    run_start = np.ones(tau.shape, dtype=bool)
+    run_start[:, 1:] = tau[:, 1:] != tau[:, :-1]
+    run_end = np.ones(tau.shape, dtype=bool)
+    run_end[:, :-1] = run_start[:, 1:]
+    # Weight of a run = cumulative weight at its end minus that before its start
+    total = np.cumsum(weight, axis=1)
+    first = np.maximum.accumulate(np.where(run_start, np.arange(tau.shape[1]), 0), axis=1)
+    before = np.where(first > 0, np.take_along_axis(total, np.maximum(first - 1, 0), axis=1), 0)
+    merged = np.where(run_end, total - before, 0.0)
+
+    # Keep the heaviest candidates (run ends carry the merged weight)
+    keep = np.argsort(-merged, axis=1, kind='stable')[:, :n_candidates]
+    weight = np.take_along_axis(merged, keep, axis=1)
+    f0 = fs / np.take_along_axis(tau_refined, keep, axis=1)
+    return np.where(weight > 0, f0, 0.0), weight
+
+
+# ============================================================================
+#  VITERBI DECODING
+# ============================================================================
+
+def _log(x):
+    with np.errstate(divide='ignore'):
+        return np.log(x)
+
+
+def transition_log_probs(f0_prev, f0_next, valid_prev, valid_next):
+    """
+    Log transition weights between candidate sets of consecutive frames,
+    shape (..., 2K, 2K) with states ordered (voiced candidates, unvoiced candidates).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cents = np.abs(1200 * np.log2(f0_next[..., np.newaxis, :] / f0_prev[..., :, np.newaxis]))
+    band = 1 - cents / MAX_STEP_CENTS
+    pitch = np.where(band > 0, band * (1 - JUMP_PROBABILITY), JUMP_PROBABILITY)
+    pitch = _log(pitch * (valid_prev[..., :, np.newaxis] & valid_next[..., np.newaxis, :]))
+
+    stay, switch = math.log(1 - SWITCH_PROBABILITY), math.log(SWITCH_PROBABILITY)
+    top = np.concatenate([pitch + stay, pitch + switch], axis=-1)
+    bottom = np.concatenate([pitch + switch, pitch + stay], axis=-1)
+    return np.concatenate([top, bottom], axis=-2)
+
+
+def observation_log_probs(f0, weight):
+    """
+    Voiced states: candidate weight. Unvoiced states split the remaining
+    probability over all N_CANDIDATES slots (not just the used ones), so a
+    single confident candidate is not matched by its own unvoiced twin.
+    """
+    valid = f0 > 0
+    voiced = np.clip(weight * VOICED_PRIOR, 0, 1)
+    unvoiced = np.where(valid, (1 - voiced.sum(axis=-1, keepdims=True)) / N_CANDIDATES, 0.0)
+    return _log(np.concatenate([voiced, unvoiced], axis=-1))
+
+
+def viterbi_decode(f0, weight, block=4096):
+    """
+    Most likely (candidate, voicing) path through the candidate lattice.
+
+    Transition matrices are built block frames at a time, so peak memory is
+    bounded; the int8 backpointers are the only per-frame state kept.
+    Returns (f0_path, voiced, voiced_probability-like weight of the path).
+    """
+    n_frames, K = f0.shape
+    if n_frames == 0:
+        return np.zeros(0), np.zeros(0, dtype=bool), np.zeros(0)
+    # Every frame has at least one candidate; a zero weight (e.g. a gated,
+    # silent frame) only rules out its voiced state
+    valid = f0 > 0
+    backpointer = np.empty((n_frames, 2 * K), dtype=np.int8)
+    backpointer[0] = -1
+
+    score = observation_log_probs(f0[0], weight[0])
+    for start in range(1, n_frames, block):
+        stop = min(start + block, n_frames)
+        transition = transition_log_probs(f0[start - 1:stop - 1], f0[start:stop],
+                                          valid[start - 1:stop - 1], valid[start:stop])
+        observation = observation_log_probs(f0[start:stop], weight[start:stop])
+        for i in range(stop - start):
+            candidates = score[:, np.newaxis] + transition[i]
+            best = candidates.argmax(axis=0)
+            backpointer[start + i] = best
+            score = candidates[best, np.arange(2 * K)] + observation[i]
+            # Renormalize so long tracks never underflow
+            score -= score.max()
+
+    # Backtrack
+    state = np.empty(n_frames, dtype=np.int64)
+    state[-1] = int(np.argmax(score))
+    for t in range(n_frames - 1, 0, -1):
+        state[t - 1] = backpointer[t, state[t]]
+
+    candidate = state % K
+    voiced = state < K
+    rows = np.arange(n_frames)
+    path_f0 = f0[rows, candidate]
+    path_weight = weight[rows, candidate]
+    return np.where(voiced, path_f0, 0.0), voiced & (path_f0 > 0), path_weight
+
+
+# ============================================================================
+#  TRACKING
+# ============================================================================
+
+def frame_candidates(frames, fs, f0_range=F0_RANGE, block_frames=2048):
+    """
+    Weighted candidates for a (n_frames, N) stack, block_frames at a time.
+    Frames below the worklet volume gate keep their candidates at zero weight.
+    """
+    n_frames = len(frames)
+    prior = beta_prior(THRESHOLDS)
+
+    cand_f0 = np.zeros((n_frames, N_CANDIDATES))
+    cand_weight = np.zeros((n_frames, N_CANDIDATES))
+    for start in range(0, n_frames, block_frames):
+        block = slice(start, start + block_frames)
+        d_prime = yin.cumulative_mean_normalized_difference(
+            yin.difference_function(frames[block]))
+        f0, weight = pitch_candidates(d_prime, fs, THRESHOLDS, prior, f0_range)
+        rms = np.sqrt(np.mean(np.square(frames[block]), axis=-1))
+        cand_f0[block] = f0
+        cand_weight[block] = weight * (rms >= yin.MIN_VOLUME)[:, np.newaxis]
+    return cand_f0, cand_weight
+
+
+def track_pitch(signal, fs, frame_length=1024, hop=512, f0_range=F0_RANGE,
+                block_frames=2048):
+    """
+    PYIN-style pitch track of a recording; same framing and output as
+    yin.track_pitch (confidence holds the candidate weight of the path).
+    """
+    frames = yin.frame_signal(signal, frame_length, hop)
+    cand_f0, cand_weight = frame_candidates(frames, fs, f0_range, block_frames)
+
+    f0, voiced, confidence = viterbi_decode(cand_f0, cand_weight)
+    with np.errstate(divide='ignore'):
+        tau = np.where(voiced, fs / f0, 0.0)
+    times = np.arange(len(frames)) * hop / fs
+    return yin.PitchTrack(f0=f0, confidence=confidence, tau=tau, times=times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=1.0,
+                        help='length of the synthetic lattice used to time the decoder')
+    parser.add_argument('--hop', type=int, default=512)
+    args = parser.parse_args()
+
+    # Decoder scaling on a long random-walk lattice with octave-error candidates
+    fs = 44100
+    rng = np.random.default_rng(0)
+    n_frames = int(args.hours * 3600 * fs / args.hop)
+    walk = 220 * 2 ** (np.cumsum(rng.normal(0, 10, n_frames)) / 1200 % 2 - 1)
+    cand_f0 = walk[:, np.newaxis] * 2.0 ** rng.integers(-1, 2, (n_frames, N_CANDIDATES))
+    cand_weight = rng.dirichlet(np.ones(N_CANDIDATES), n_frames) * 0.9
+
+    start = time.perf_counter()
+    viterbi_decode(cand_f0, cand_weight)
+    seconds = time.perf_counter() - start
+    print(f'Viterbi: {n_frames} frames ({args.hours:g} h at hop {args.hop}), '
+          f'{2 * N_CANDIDATES} states: {seconds:.1f} s, '
+          f'{n_frames * 2 * N_CANDIDATES / 1e6:.1f} MB of backpointers')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Warm Figure Render Server
+Watches figure scripts and data, re-rendering only affected figures in one warm interpreter
+Mambo Whistle Technical Report
+
+A cold `python figureN.py` pays for the matplotlib import, font lookup
+and style setup before drawing anything. This server does that once
+(figure_common.warm_up), then polls the files every figure depends on
+(build_figures.dependencies: the script, the local modules it imports and
+its FIGURE_INPUTS) and re-runs only the figures whose files changed.
+Before a figure runs, every local module it imports (transitively) is
+dropped from sys.modules, so an edit to a dependency of a dependency is
+picked up too. Successful renders update the build_figures.py cache.
+
+Usage:
+    python render_server.py                       # watch all figures
+    python render_server.py figure5 --interval 0.2
+    python render_server.py --once --compare-cold # time warm vs. cold once
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import build_figures
+import local_modules
+
+
+# ============================================================================
+#  WARM-UP AND TIMING
+# ============================================================================
+
+def warm_up():
+    """Import matplotlib and load the shared style once; returns seconds taken."""
+    start = time.perf_counter()
+    import figure_common
+    figure_common.warm_up()
+    return time.perf_counter() - start
+
+
+def cold_render_time(script):
+    """Wall time of the figure in a fresh interpreter (what an edit costs without the server)."""
+    env = {**os.environ, 'MPLBACKEND': 'Agg'}
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, str(script)], cwd=build_figures.SCRIPTS_PATH,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    seconds = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip().splitlines()[-1])
+    return seconds
+
+
+# ============================================================================
+#  WATCHING
+# ============================================================================
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _forget_local_modules(scripts):
+    """
+    Drop every sibling module the scripts import, transitively, so the next
+    run re-executes all of them. Dropping only the changed module is not
+    enough: the modules that import it would keep their reference to the
+    old one.
+    """
+    for script in scripts:
+        for path in local_modules.local_imports(script):
+            sys.modules.pop(path.stem, None)
+
+
+class RenderServer:
+    """Dependency map plus last-seen modification times for a set of figures."""
+
+    def __init__(self, names=None):
+        self.names = names
+        self.scripts = []
+        self.deps = {}
+        self.mtimes = {}
+        self.cache = build_figures.load_cache()
+        self.refresh()
+
+    def refresh(self):
+        """Re-scan scripts and their dependencies (imports can change on edit)."""
+        self.scripts = build_figures.find_figures(self.names)
+        self.deps = {script: build_figures.dependencies(script) for script in self.scripts}
+        for paths in self.deps.values():
+            for path in paths:
+                self.mtimes.setdefault(path, _mtime(path))
+
+    def changed(self):
+        """Files modified since the last poll."""
+        changed = set()
+        for path in {p for paths in self.deps.values() for p in paths}:
+            mtime = _mtime(path)
+            if mtime != self.mtimes.get(path):
+                self.mtimes[path] = mtime
+                changed.add(path)
+        return changed
+
+    def affected(self, changed):
+        return [script for script in self.scripts if changed & set(self.deps[script])]
+
+    def render(self, scripts):
+        _forget_local_modules(scripts)
+        for script in scripts:
+            # Fingerprint the files the render reads, not what they become during it
+            digest = build_figures.fingerprint(script)
+            stem, seconds, error = build_figures.render(script)
+            if error:
+                self.cache.pop(stem, None)
+                print(f'  FAILED      {stem}: {error}', flush=True)
+            else:
+                self.cache[stem] = digest
+                print(f'  rendered    {stem} ({seconds:.2f} s warm)', flush=True)
+        build_figures.save_cache(self.cache)
+
+    def poll(self):
+        """Re-render the figures affected by files changed since the last poll."""
+        changed = self.changed()
+        if not changed:
+            return []
+        names = ', '.join(sorted(p.name for p in changed))
+        print(f'Changed: {names}', flush=True)
+        self.refresh()
+        scripts = self.affected(changed)
+        self.render(scripts)
+        return scripts
+
+    def serve(self, interval):
+        print(f'Watching {len(self.scripts)} figure(s); Ctrl+C to stop', flush=True)
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            print('Stopped')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('figures', nargs='*', help='figure names, e.g. figure1 (default: all)')
+    parser.add_argument('--interval', type=float, default=0.5, help='poll interval in seconds')
+    parser.add_argument('--once', action='store_true',
+                        help='render the figures once in the warm interpreter and exit')
+    parser.add_argument('--compare-cold', action='store_true',
+                        help='also time each figure in a fresh interpreter')
+    args = parser.parse_args()
+
+    setup = warm_up()
+    print(f'Warm-up (matplotlib import, fonts, style): {setup:.2f} s', flush=True)
+
+    server = RenderServer(args.figures)
+    if args.compare_cold:
+        print(f'{"Figure":<40} {"cold (s)":>9} {"warm (s)":>9} {"speedup":>8}')
+        for script in server.scripts:
+            cold = cold_render_time(script)
+            stem, warm, error = build_figures.render(script)
+            if error:
+                print(f'{stem:<40} FAILED: {error}')
+                continue
+            print(f'{stem:<40} {cold:>9.2f} {warm:>9.2f} {cold / warm:>7.1f}x')
+    else:
+        server.render(server.scripts)
+
+    if not args.once:
+        server.serve(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Long-Session Plots
+Waveform and pitch contour of recordings of any length
+Mambo Whistle Technical Report
+
+Figure 5 plots every sample of one 1024-sample frame. The same approach on
+an hour-long session (159 M samples, 310 k pitch frames) gives PDF/SVG files
+of gigabytes and renders that take minutes. Here every series is reduced to
+the pixel budget of its axes at the 300 DPI export resolution first:
+
+    waveform        min-max envelope per pixel column, read chunk by chunk
+                    from the memory-mapped recording (downsample.minmax_reader),
+                    drawn as a filled band
+    pitch contour   registry YIN track (audio_reader frames), unvoiced frames
+                    as gaps, reduced with LTTB
+
+and the dense artists are rasterized inside the vector outputs
+(rasterized=True), so PDF and SVG embed one image per band instead of
+thousands of path vertices. Axis text stays vector. The number of drawn
+points, the render time and the file sizes are then bounded by the figure
+size, not by the session length; --sweep measures this on test recordings.
+
+Usage:
+    python session_plot.py recording.wav [--vector]      # output/session_<name>.*
+    python session_plot.py --sweep 1 10 60 [--raw-minutes 1]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import ticker
+
+import audio_reader
+import detectors
+import downsample
+import figure_common
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'session_plot.json'
+
+FIGSIZE = (16 / 2.54, 9 / 2.54)
+EXPORT_DPI = figure_common.EXPORT_FORMATS['png']['dpi']
+HOP = 512
+
+
+# ============================================================================
+#  FIGURE
+# ============================================================================
+
+def pitch_track(reader, hop=HOP):
+    """(frame times in s, f0 in Hz with NaN where unvoiced) from the registry YIN."""
+    f0, _ = detectors.create('YIN').track(reader, hop=hop)
+    times = (np.arange(len(f0)) * hop + 512) / reader.fs
+    return times, np.where(f0 > 0, f0, np.nan)
+
+
+def session_figure(reader, times, f0, raw=False, rasterize=True):
+    """
+    Two-panel session figure. Returns (fig, points drawn). raw=True plots
+    every sample and frame, as Figure 5 does, for comparison.
+    """
+    figure_common.apply_style()
+    fig, (ax_wave, ax_pitch) = plt.subplots(2, 1, figsize=FIGSIZE, dpi=150, sharex=True)
+    minutes = reader.duration >= 120
+    scale = 1 / 60 if minutes else 1.0
+    budget = downsample.pixel_budget(ax_wave, EXPORT_DPI)
+
+    if raw:
+        samples = reader.read(0, len(reader))
+        ax_wave.plot(np.arange(len(samples)) / reader.fs * scale, samples,
+                     color=figure_common.GOOGLE_BLUE, linewidth=0.3, rasterized=rasterize)
+        pitch_index = np.arange(len(f0))
+        points = len(samples) + len(f0)
+    else:
+        starts, low, high = downsample.minmax_reader(reader, budget)
+        ax_wave.fill_between(starts / reader.fs * scale, low, high, step='post', linewidth=0.3,
+                             color=figure_common.GOOGLE_BLUE, rasterized=rasterize)
+        pitch_index = downsample.lttb(times, f0, budget)
+        points = 2 * len(starts) + len(pitch_index)
+    ax_pitch.plot(times[pitch_index] * scale, f0[pitch_index], color=figure_common.GOOGLE_RED,
+                  linewidth=0.6, rasterized=rasterize)
+
+    ax_wave.set_ylim(-1.05, 1.05)
+    ax_wave.set_ylabel('Amplitude')
+    ax_wave.set_title(f'Session: {reader.path.name}', fontweight='bold')
+    ax_pitch.set_yscale('log')
+    ax_pitch.yaxis.set_major_formatter(ticker.FormatStrFormatter('%g'))
+    ax_pitch.yaxis.set_minor_formatter(ticker.FormatStrFormatter('%g'))
+    ax_pitch.set_ylabel('F0 (Hz)')
+    ax_pitch.set_xlabel('Time (min)' if minutes else 'Time (s)')
+    ax_pitch.set_xlim(0, reader.duration * scale)
+    for ax in (ax_wave, ax_pitch):
+        ax.grid(True, linestyle=':', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+    fig.tight_layout()
+    return fig, points
+
+
+def render(reader, times, f0, output_path, stem, raw=False, rasterize=True):
+    """Build and export the figure; returns (points, seconds, {format: bytes})."""
+    start = time.perf_counter()
+    fig, points = session_figure(reader, times, f0, raw, rasterize)
+    figure_common.save_figure(fig, stem, output_path)
+    seconds = time.perf_counter() - start
+    plt.close(fig)
+    sizes = {fmt: (output_path / f'{stem}.{fmt}').stat().st_size
+             for fmt in figure_common.EXPORT_FORMATS}
+    return points, seconds, sizes
+
+
+# ============================================================================
+#  SWEEP
+# ============================================================================
+
+def sweep(minutes_list, raw_minutes, rasterize=True):
+    """Render time and file sizes of test sessions of each length."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for minutes in minutes_list:
+            path = tmp / f'session_{minutes:g}min.wav'
+            audio_reader.write_wav(path, audio_reader.test_recording(minutes * 60, 44100), 44100)
+            reader = audio_reader.AudioReader(path)
+            times, f0 = pitch_track(reader)
+            modes = [('reduced', False)] + ([('raw', True)] if minutes <= raw_minutes else [])
+            for mode, raw in modes:
+                points, seconds, sizes = render(reader, times, f0, tmp, path.stem, raw, rasterize)
+                rows.append({'minutes': minutes, 'mode': mode, 'points': points,
+                             'render_s': seconds, 'bytes': sizes})
+                print(f'{minutes:>7g} {mode:>8} {points:>11,} {seconds:>9.2f} '
+                      + ''.join(f'{sizes[fmt] / 1024:>10.0f}' for fmt in figure_common.EXPORT_FORMATS))
+            del reader
+            path.unlink()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', type=Path, nargs='?', help='recording to plot')
+    parser.add_argument('--sweep', type=float, nargs='+', metavar='MINUTES',
+                        help='measure render cost on test sessions of these lengths')
+    parser.add_argument('--raw-minutes', type=float, default=1.0,
+                        help='also plot every sample for sweep sessions up to this length')
+    parser.add_argument('--vector', action='store_true', help='do not rasterize dense artists')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    if args.path is None and not args.sweep:
+        parser.error('give a recording or --sweep')
+
+    if args.path:
+        reader = audio_reader.AudioReader(args.path)
+        times, f0 = pitch_track(reader)
+        stem = f'session_{args.path.stem}'
+        points, seconds, sizes = render(reader, times, f0, figure_common.OUTPUT_PATH, stem,
+                                        rasterize=not args.vector)
+        print(f'{reader.duration / 60:.1f} min: {points:,} points drawn, {seconds:.2f} s, '
+              + ', '.join(f'{fmt} {size / 1024:.0f} KB' for fmt, size in sizes.items()))
+        print(f'Plot written to {figure_common.OUTPUT_PATH}/{stem}.*')
+
+    if args.sweep:
+        print(f'{"minutes":>7} {"mode":>8} {"points":>11} {"render s":>9} '
+              + ''.join(f'{fmt + " KB":>10}' for fmt in figure_common.EXPORT_FORMATS))
+        rows = sweep(args.sweep, args.raw_minutes, rasterize=not args.vector)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'rasterized': not args.vector, 'sessions': rows},
+                                          indent=2) + '\n')
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
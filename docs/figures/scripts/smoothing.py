@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Batch Smoothing Filters
+Offline equivalents of js/features/smoothing-filters.js for whole tracks
+Mambo Whistle Technical Report
+
+    EMAFilter       ema(), ema_bank()   y[n] = alpha x[n] + (1 - alpha) y[n - 1],
+                                        first value passed through
+    KalmanFilter    kalman()            steady-state gain, x0 = initialEstimate
+    MedianFilter    median_filter()     trailing window, shorter (mean of the two
+                                        middle values when even) while it fills
+
+All three are first-order linear recurrences or order statistics, so whole
+tracks are filtered at once:
+
+- ema() evaluates the recurrence EMA_BLOCK samples at a time as one matrix
+  product with the block's decay matrix, carrying y across blocks.
+- recurrence() runs y[n] = a y[n - 1] + b[n] for many rows, each with its own
+  coefficient, as a log2(n)-step doubling scan. ema_bank() and kalman() use
+  it to filter one track with hundreds of parameter values in one pass.
+- SlidingMedian keeps the window in two heaps (lower and upper half) with
+  lazy deletion, so each step costs O(log w) instead of sorting the window.
+
+The 1-D Kalman filter's gain depends on the error covariance only, not on
+the data, and converges geometrically to K = P / (P + R) with
+P = (Q + sqrt(Q^2 + 4QR)) / 2 (within about 100 frames for the defaults,
+Q = 0.001 and R = 0.1). The steady-state filter is therefore an EMA with
+alpha = K, started from initialEstimate, and depends on Q / R only; it
+differs from the JS filter only while the gain settles.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import heapq
+
+import numpy as np
+
+import stage_timer
+
+EMA_BLOCK = 256                     # Samples per block of the blocked EMA
+
+
+# ============================================================================
+#  LINEAR RECURRENCES
+# ============================================================================
+
+@stage_timer.timed('FFT + Features')
+def ema(values, alpha):
+    """
+    EMAFilter over the first axis: y[0] = x[0], y[n] = alpha x[n] + (1 - alpha) y[n - 1].
+
+    The recurrence is evaluated EMA_BLOCK frames at a time as one matrix
+    product with the block's decay matrix, carrying y across blocks.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if len(x) == 0:
+        return x.copy()
+    n = np.arange(EMA_BLOCK)
+    lag = n[:, np.newaxis] - n[np.newaxis, :]
+    weights = np.where(lag >= 0, alpha * (1 - alpha) ** np.maximum(lag, 0), 0.0)
+    carry = (1 - alpha) ** (n + 1)
+
+    y = np.empty_like(x)
+    previous = x[0]
+    for start in range(0, len(x), EMA_BLOCK):
+        block = x[start:start + EMA_BLOCK]
+        size = len(block)
+        y[start:start + size] = (weights[:size, :size] @ block
+                                 + np.multiply.outer(carry[:size], previous))
+        previous = y[start + size - 1]
+    return y
+
+
+@stage_timer.timed('FFT + Features')
+def recurrence(b, a, initial=0.0):
+    """
+    y[..., n] = a y[..., n - 1] + b[..., n] along the last axis, y[..., -1] = initial.
+
+    `a` and `initial` broadcast against b[..., 0] and may be complex. After
+    the step with stride s, y[n] holds the recurrence restarted at n - 2s + 1,
+    so log2(n) passes over the array finish the scan.
+    """
+    y = np.array(b, dtype=np.result_type(b, a, initial, np.float64))
+    n = y.shape[-1]
+    a = np.asarray(a, dtype=y.dtype)[..., np.newaxis]
+    y[..., :1] += a * np.asarray(initial, dtype=y.dtype)[..., np.newaxis]
+    power = np.broadcast_to(a, y[..., :1].shape).copy()
+    stride = 1
+    while stride < n:
+        y[..., stride:] += power * y[..., :-stride]     # The right side is copied first
+        power *= power
+        stride *= 2
+    return y
+
+
+def ema_bank(values, alphas):
+    """EMAFilter of one track for each alpha; returns (len(alphas), n)."""
+    x = np.asarray(values, dtype=np.float64)
+    alphas = np.asarray(alphas, dtype=np.float64)[:, np.newaxis]
+    if x.size == 0:
+        return np.zeros((len(alphas), 0))
+    # Starting from x[0] makes y[0] = x[0], as the first update does
+    return recurrence(alphas * x, 1 - alphas[:, 0], initial=np.full(len(alphas), x[0]))
+
+
+def kalman_gain(Q, R):
+    """Steady-state gain of the 1-D random-walk KalmanFilter."""
+    Q, R = np.asarray(Q, dtype=np.float64), np.asarray(R, dtype=np.float64)
+    predicted = (Q + np.sqrt(Q * Q + 4 * Q * R)) / 2
+    return predicted / (predicted + R)
+
+
+@stage_timer.timed('FFT + Features')
+def kalman(values, Q=0.001, R=0.1, initial_estimate=0.0):
+    """
+    Steady-state KalmanFilter of one track for each (Q, R) pair (broadcast);
+    returns (n_pairs, n), or (n,) for scalar Q and R.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    gain = kalman_gain(Q, R)
+    y = recurrence(np.multiply.outer(np.atleast_1d(gain), x), 1 - np.atleast_1d(gain),
+                   initial=initial_estimate)
+    return y if gain.ndim else y[0]
+
+
+# ============================================================================
+#  SLIDING MEDIAN
+# ============================================================================
+
+class SlidingMedian:
+    """
+    Median of a sliding window with O(log w) insert and remove.
+
+    `low` is a max-heap of the smaller half (keys negated), `high` a min-heap
+    of the larger half. Entries are (value, sequence number), so equal
+    values stay distinct; removed entries are only marked, and dropped when
+    they reach the top of their heap.
+    """
+
+    def __init__(self):
+        self.low, self.high = [], []
+        self.low_size = self.high_size = 0
+        self.removed = set()
+
+    def _prune(self, heap):
+        while heap and abs(heap[0][1]) in self.removed:
+            self.removed.discard(abs(heap[0][1]))
+            heapq.heappop(heap)
+
+    def _in_low(self, value, seq):
+        return bool(self.low) and (value, seq) <= (-self.low[0][0], -self.low[0][1])
+
+    def _rebalance(self):
+        if self.low_size > self.high_size + 1:
+            value, seq = heapq.heappop(self.low)
+            heapq.heappush(self.high, (-value, -seq))
+            self.low_size, self.high_size = self.low_size - 1, self.high_size + 1
+        elif self.high_size > self.low_size:
+            value, seq = heapq.heappop(self.high)
+            heapq.heappush(self.low, (-value, -seq))
+            self.low_size, self.high_size = self.low_size + 1, self.high_size - 1
+        self._prune(self.low)
+        self._prune(self.high)
+
+    def add(self, value, seq):
+        if self._in_low(value, seq):
+            heapq.heappush(self.low, (-value, -seq))
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, (value, seq))
+            self.high_size += 1
+        self._rebalance()
+
+    def remove(self, value, seq):
+        self.removed.add(seq)
+        if self._in_low(value, seq):
+            self.low_size -= 1
+            self._prune(self.low)
+        else:
+            self.high_size -= 1
+            self._prune(self.high)
+        self._rebalance()
+
+    def median(self):
+        if self.low_size > self.high_size:
+            return -self.low[0][0]
+        return (-self.low[0][0] + self.high[0][0]) / 2
+
+
+@stage_timer.timed('FFT + Features')
+def median_filter(values, window=5):
+    """MedianFilter over a track: median of the last `window` values (fewer at the start)."""
+    if window < 3 or window % 2 == 0:
+        raise ValueError(f'MedianFilter needs an odd window of at least 3, got {window}')
+    x = np.asarray(values, dtype=np.float64)
+    window_median = SlidingMedian()
+    y = np.empty_like(x)
+    for n, value in enumerate(x.tolist()):
+        if n >= window:
+            window_median.remove(x[n - window], n - window)
+        window_median.add(value, n)
+        y[n] = window_median.median()
+    return y
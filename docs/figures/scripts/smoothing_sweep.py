@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Smoothing Filter Sweep
+Group delay against residual jitter for thousands of smoothing settings
+Mambo Whistle Technical Report
+
+Runs the batch filters of smoothing.py over a long synthetic pitch track
+(in cents) for every setting of four families:
+
+    EMA             alpha
+    Kalman          Q / R (the steady-state filter depends on the ratio only,
+                    and traces the EMA curve with alpha = K)
+    Median          odd window w
+    Median + EMA    median of w frames, then EMA (outliers first, then jitter)
+
+The track holds notes for 0.2 .. 1.5 s with jumps or short glides between
+them, as a detector reports them: Gaussian jitter on every frame plus
+occasional octave errors. Two numbers describe each setting:
+
+    group delay      frames until the response to a note change reaches half
+                     its height (50% step response), in ms at the hop rate
+    residual jitter  RMS deviation from the true pitch (cents) on frames at
+                     least SETTLE_SECONDS after the last note change
+
+The current app settings are marked: the pitch KalmanFilter of
+expressive-features.js (Q = 0.001, R = 0.1), a 5-frame MedianFilter (the
+worklet's pitch history) and EMA alpha = 0.3. Results go to
+data/smoothing_sweep.json and the plot to output/smoothing_sweep.*.
+
+Usage:
+    python smoothing_sweep.py [--minutes 20] [--jitter 15] [--outlier-rate 0.02]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import figure_common
+import smoothing
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'smoothing_sweep.json'
+
+FS = 44100
+HOP = 512                           # Worklet result interval
+SETTLE_SECONDS = 0.3                # Frames this soon after a note change are not steady
+STEP_CENTS = 100.0                  # Height of the step used for the delay
+BATCH = 64                          # Parameter values filtered per recurrence pass
+
+EMA_ALPHAS = np.logspace(-2.5, 0, 400)
+KALMAN_RATIOS = np.logspace(-6, 2, 400)         # Q / R
+MEDIAN_WINDOWS = np.arange(3, 32, 2)
+CASCADE_ALPHAS = np.logspace(-2, 0, 100)
+
+# Current settings: (family, parameters, label)
+CURRENT_SETTINGS = [
+    ('Kalman', {'ratio': 0.001 / 0.1}, 'Kalman Q=0.001, R=0.1'),
+    ('Median', {'window': 5}, 'Median w=5'),
+    ('EMA', {'alpha': 0.3}, 'EMA alpha=0.3'),
+]
+
+FAMILY_COLORS = {
+    'EMA': figure_common.GOOGLE_BLUE,
+    'Kalman': figure_common.GOOGLE_GREEN,
+    'Median': figure_common.GOOGLE_RED,
+    'Median + EMA': figure_common.GOOGLE_YELLOW,
+}
+
+
+# ============================================================================
+#  TEST TRACK
+# ============================================================================
+
+def pitch_track(n_frames, frame_rate, jitter_cents=15.0, outlier_rate=0.02, seed=0):
+    """
+    (observed, true, steady) tracks in cents: held notes with jumps or
+    glides, detector jitter and octave errors.
+    """
+    rng = np.random.default_rng(seed)
+    truth = np.empty(n_frames)
+    since_change = np.empty(n_frames)
+    n, note = 0, 0.0
+    while n < n_frames:
+        previous, note = note, float(rng.integers(-12, 13)) * 100
+        hold = int(rng.uniform(0.2, 1.5) * frame_rate)
+        glide = int(rng.uniform(0.02, 0.08) * frame_rate) if rng.random() < 0.5 else 0
+        segment = np.full(hold, note)
+        segment[:glide] = np.linspace(previous, note, glide + 1)[1:]
+        end = min(n + hold, n_frames)
+        truth[n:end] = segment[:end - n]
+        since_change[n:end] = np.arange(end - n) - glide
+        n = end
+
+    observed = truth + jitter_cents * rng.standard_normal(n_frames)
+    octave = rng.random(n_frames) < outlier_rate
+    observed[octave] += rng.choice([-1200.0, 1200.0], int(octave.sum()))
+    return observed, truth, since_change >= SETTLE_SECONDS * frame_rate
+
+
+# ============================================================================
+#  SWEEP
+# ============================================================================
+
+def _metrics(smoothed, step_response, truth, steady, frame_ms):
+    """(group delay ms, residual jitter cents) for each row."""
+    crossed = step_response >= STEP_CENTS / 2
+    delay = np.where(crossed.any(axis=1), crossed.argmax(axis=1), step_response.shape[1])
+    jitter = np.sqrt(np.mean((smoothed[:, steady] - truth[steady]) ** 2, axis=1))
+    return delay * frame_ms, jitter
+
+
+def _step(length):
+    return np.where(np.arange(length) < length // 4, 0.0, STEP_CENTS), length // 4
+
+
+def sweep(observed, truth, steady, frame_rate):
+    """Rows of {family, parameters, delay_ms, jitter_cents} for every setting."""
+    frame_ms = 1000 / frame_rate
+    step, onset = _step(int(4 * frame_rate))
+    rows = []
+
+    def add(family, params, smoothed, step_response):
+        delay, jitter = _metrics(smoothed, step_response[:, onset:], truth, steady, frame_ms)
+        rows.extend({'family': family, **p, 'delay_ms': float(d), 'jitter_cents': float(j)}
+                    for p, d, j in zip(params, delay, jitter))
+
+    for start in range(0, len(EMA_ALPHAS), BATCH):
+        alphas = EMA_ALPHAS[start:start + BATCH]
+        add('EMA', [{'alpha': float(a)} for a in alphas],
+            smoothing.ema_bank(observed, alphas), smoothing.ema_bank(step, alphas))
+
+    for start in range(0, len(KALMAN_RATIOS), BATCH):
+        ratios = KALMAN_RATIOS[start:start + BATCH]
+        add('Kalman', [{'ratio': float(r)} for r in ratios],
+            smoothing.kalman(observed, ratios, 1.0, initial_estimate=observed[0]),
+            smoothing.kalman(step, ratios, 1.0))
+
+    for window in MEDIAN_WINDOWS:
+        median = smoothing.median_filter(observed, window)
+        median_step = smoothing.median_filter(step, window)
+        add('Median', [{'window': int(window)}], median[np.newaxis], median_step[np.newaxis])
+        add('Median + EMA', [{'window': int(window), 'alpha': float(a)} for a in CASCADE_ALPHAS],
+            smoothing.ema_bank(median, CASCADE_ALPHAS),
+            smoothing.ema_bank(median_step, CASCADE_ALPHAS))
+    return rows
+
+
+def pareto_front(rows):
+    """Rows not beaten on both delay and jitter by another row, by delay."""
+    front, best = [], np.inf
+    for row in sorted(rows, key=lambda r: (r['delay_ms'], r['jitter_cents'])):
+        if row['jitter_cents'] < best:
+            front.append(row)
+            best = row['jitter_cents']
+    return front
+
+
+def current_points(observed, truth, steady, frame_rate):
+    """(label, delay ms, jitter cents) of the CURRENT_SETTINGS."""
+    frame_ms = 1000 / frame_rate
+    step, onset = _step(int(4 * frame_rate))
+    points = []
+    for family, params, label in CURRENT_SETTINGS:
+        if family == 'Kalman':
+            filtered = [smoothing.kalman(x, params['ratio'], 1.0, initial_estimate=x[0])
+                        for x in (observed, step)]
+        elif family == 'Median':
+            filtered = [smoothing.median_filter(x, params['window']) for x in (observed, step)]
+        else:
+            filtered = [smoothing.ema(x, params['alpha']) for x in (observed, step)]
+        delay, jitter = _metrics(filtered[0][np.newaxis], filtered[1][np.newaxis, onset:],
+                                 truth, steady, frame_ms)
+        points.append((label, float(delay[0]), float(jitter[0])))
+    return points
+
+
+# ============================================================================
+#  PLOT
+# ============================================================================
+
+def plot(rows, front, points, raw_jitter):
+    figure_common.apply_style()
+    fig, ax = plt.subplots(figsize=(16/2.54, 10/2.54), dpi=150)
+    for family, color in FAMILY_COLORS.items():
+        family_rows = [r for r in rows if r['family'] == family]
+        ax.scatter([r['delay_ms'] for r in family_rows], [r['jitter_cents'] for r in family_rows],
+                   s=6, color=color, alpha=0.6, linewidths=0, label=f'{family} ({len(family_rows)})')
+    ax.plot([r['delay_ms'] for r in front], [r['jitter_cents'] for r in front],
+            color=[0.2, 0.2, 0.2], linewidth=1.2, label='Pareto front')
+    for label, delay, jitter in points:
+        ax.plot(delay, jitter, marker='*', markersize=11, color='black', linestyle='none')
+        ax.annotate(label, (delay, jitter), xytext=(5, 5), textcoords='offset points', fontsize=8)
+    ax.axhline(raw_jitter, linestyle='--', color=figure_common.GOOGLE_GRAY, linewidth=1)
+    ax.text(1, raw_jitter, ' unsmoothed', fontsize=8, va='bottom', color=figure_common.GOOGLE_GRAY)
+
+    ax.set_xscale('symlog', linthresh=10)
+    ax.set_xlim(left=0)
+    ax.set_yscale('log')
+    ax.set_xlabel('Group delay (50% step response, ms)')
+    ax.set_ylabel('Residual jitter (RMS cents, steady frames)')
+    ax.set_title('Smoothing Filters: Latency vs. Jitter', fontweight='bold')
+    ax.grid(True, which='both', linestyle=':', alpha=0.4)
+    ax.legend(fontsize=8, loc='upper right')
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=20.0, help='length of the pitch track')
+    parser.add_argument('--jitter', type=float, default=15.0, help='detector jitter (cents RMS)')
+    parser.add_argument('--outlier-rate', type=float, default=0.02,
+                        help='fraction of frames with octave errors')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--no-plot', action='store_true')
+    args = parser.parse_args()
+
+    frame_rate = FS / HOP
+    observed, truth, steady = pitch_track(int(args.minutes * 60 * frame_rate), frame_rate,
+                                          args.jitter, args.outlier_rate)
+    start = time.perf_counter()
+    rows = sweep(observed, truth, steady, frame_rate)
+    seconds = time.perf_counter() - start
+    front = pareto_front(rows)
+    points = current_points(observed, truth, steady, frame_rate)
+    raw_jitter = float(np.sqrt(np.mean((observed[steady] - truth[steady]) ** 2)))
+
+    print(f'{len(rows)} settings over {len(observed)} frames in {seconds:.1f} s')
+    print(f'Unsmoothed jitter: {raw_jitter:.1f} cents')
+    for label, delay, jitter in points:
+        better = [r for r in front if r['delay_ms'] <= delay and r['jitter_cents'] < jitter]
+        hint = (f'; {better[-1]["family"]} reaches {better[-1]["jitter_cents"]:.1f} cents '
+                f'at {better[-1]["delay_ms"]:.0f} ms' if better else '; on the front')
+        print(f'  {label:<22} {delay:6.0f} ms {jitter:8.1f} cents{hint}')
+
+    report = {'fs': FS, 'hop': HOP, 'frames': len(observed), 'jitter_cents': args.jitter,
+              'outlier_rate': args.outlier_rate, 'unsmoothed_jitter': raw_jitter,
+              'settings': rows, 'pareto_front': front}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report) + '\n')
+    print(f'Results written to {args.output}')
+
+    if not args.no_plot:
+        output = figure_common.save_figure(plot(rows, front, points, raw_jitter), 'smoothing_sweep')
+        print(f'Plot written to {output}/smoothing_sweep.*')
+
+
+if __name__ == '__main__':
+    main()
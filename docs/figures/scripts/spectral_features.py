@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Spectral Features (Worklet FastFFT Path)
+Batched power spectrum, centroid, flatness, brightness and breathiness
+Mambo Whistle Technical Report
+
+Offline equivalent of the feature path in js/pitch-worklet.js:
+
+    FastFFT.computePowerSpectrum     |X[k]|^2 for k < N/2 (no window)
+    FastFFT.computeSpectralCentroid  power-weighted mean bin frequency
+    FastFFT.computeSpectralFlatness  geometric / arithmetic mean power
+    _normalizeBrightness             log-scaled centroid, 200 Hz .. 8 kHz -> 0 .. 1
+    breathiness                      min(flatness, 1)
+    EMAFilter                        alpha 0.3 (brightness), 0.4 (breathiness)
+
+Bins at or below POWER_FLOOR are ignored by the centroid and flatness, as
+in the worklet. The bin-frequency table is precomputed per analyzer and all
+frames of a batch go through one rfft call; the EMA filters use the blocked
+recurrence in smoothing.py.
+
+Parity with the JS classes is checked by running them under Node
+(worklet_js.py) on the same float32 frames.
+
+Usage:
+    python spectral_features.py [--frames 10000]    # batch timing + JS parity
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+import audio_reader
+import smoothing
+import stage_timer
+import worklet_js
+
+FFT_SIZE = 1024                     # Worklet FastFFT(1024)
+POWER_FLOOR = 1e-10                 # Bins at or below are skipped
+BRIGHTNESS_RANGE = (200.0, 8000.0)  # _normalizeBrightness: Hz mapped to 0 .. 1
+BRIGHTNESS_ALPHA = 0.3              # brightnessFilter
+BREATHINESS_ALPHA = 0.4             # breathinessFilter
+
+# Largest accepted deviation from the JS float32 FastFFT (power: relative to frame peak)
+PARITY_TOLERANCE = {'power': 1e-5, 'centroid_hz': 0.05, 'flatness': 1e-5, 'brightness': 1e-5,
+                    'breathiness': 1e-5, 'brightness_ema': 1e-5, 'breathiness_ema': 1e-5}
+
+
+class SpectralFeatures(NamedTuple):
+    """Per-frame features, each of shape (n_frames,)."""
+    centroid: np.ndarray        # Hz
+    flatness: np.ndarray
+    brightness: np.ndarray      # 0 .. 1
+    breathiness: np.ndarray     # 0 .. 1
+
+
+# ============================================================================
+#  FEATURE EXTRACTION
+# ============================================================================
+
+def normalize_brightness(centroid):
+    """_normalizeBrightness: log position of the centroid in BRIGHTNESS_RANGE."""
+    low, high = BRIGHTNESS_RANGE
+    centroid = np.asarray(centroid, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position = np.log(centroid / low) / np.log(high / low)
+    return np.where(centroid <= low, 0.0, np.clip(position, 0, 1))
+
+
+class SpectralAnalyzer:
+    """Feature extractor for one FFT size and sample rate, with precomputed tables."""
+
+    def __init__(self, size=FFT_SIZE, fs=44100):
+        if size & (size - 1):
+            raise ValueError(f'FastFFT needs a power-of-two size, got {size}')
+        self.size = size
+        self.fs = fs
+        # Bin frequencies of the N/2 bins the worklet keeps (Nyquist excluded)
+        self.bin_freqs = np.arange(size // 2) * (fs / size)
+
+    @stage_timer.timed('FFT + Features')
+    def power_spectrum(self, frames):
+        """|X[k]|^2 for k < N/2 of each frame (zero-padded or cut to N)."""
+        spectrum = np.fft.rfft(np.asarray(frames, dtype=np.float64), self.size, axis=-1)
+        spectrum = spectrum[..., :self.size // 2]
+        return spectrum.real ** 2 + spectrum.imag ** 2
+
+    def centroid(self, power):
+        used = power > POWER_FLOOR
+        total = np.sum(power, axis=-1, where=used)
+        weighted = np.sum(power * self.bin_freqs, axis=-1, where=used)
+        return np.divide(weighted, total, out=np.zeros_like(total), where=total > 0)
+
+    def flatness(self, power):
+        used = power > POWER_FLOOR
+        count = used.sum(axis=-1)
+        with np.errstate(divide='ignore'):
+            log_sum = np.sum(np.log(power), axis=-1, where=used)
+        arithmetic = np.sum(power, axis=-1, where=used)
+        valid = (count > 0) & (arithmetic > 0)
+        safe = np.maximum(count, 1)
+        return np.where(valid, np.exp(log_sum / safe) / np.where(valid, arithmetic / safe, 1.0),
+                        0.0)
+
+    @stage_timer.timed('FFT + Features')
+    def features(self, frames):
+        power = self.power_spectrum(frames)
+        centroid = self.centroid(power)
+        flatness = self.flatness(power)
+        return SpectralFeatures(centroid=centroid, flatness=flatness,
+                                brightness=normalize_brightness(centroid),
+                                breathiness=np.minimum(flatness, 1.0))
+
+
+@stage_timer.timed('FFT + Features')
+def track_features(source, hop=512, fs=None, block_frames=audio_reader.CHUNK_FRAMES):
+    """
+    Unsmoothed features of every FFT_SIZE frame of a 1-D signal or an
+    audio_reader.AudioReader (whose sample rate is used), block by block.
+    """
+    fs = getattr(source, 'fs', fs or 44100)
+    analyzer = SpectralAnalyzer(FFT_SIZE, fs)
+    n_frames = audio_reader.count_frames(len(source), FFT_SIZE, hop)
+    columns = [np.empty(n_frames) for _ in SpectralFeatures._fields]
+    for start, frames in audio_reader.frame_blocks(source, FFT_SIZE, hop, block_frames):
+        for column, values in zip(columns, analyzer.features(frames)):
+            column[start:start + len(frames)] = values
+    return SpectralFeatures(*columns)
+
+
+def smooth(features):
+    """Worklet EMA smoothing of (brightness, breathiness) over consecutive frames."""
+    return (smoothing.ema(features.brightness, BRIGHTNESS_ALPHA),
+            smoothing.ema(features.breathiness, BREATHINESS_ALPHA))
+
+
+# ============================================================================
+#  JS PARITY
+# ============================================================================
+
+_JS_FEATURES = r'''
+const size = __SIZE__;
+const fft = new FastFFT(size);
+const brightnessFilter = new EMAFilter(__BRIGHTNESS_ALPHA__);
+const breathinessFilter = new EMAFilter(__BREATHINESS_ALPHA__);
+const normalize = PitchDetectorWorklet.prototype._normalizeBrightness;
+for (let f = 0; f < frames.length / size; f++) {
+    const power = fft.computePowerSpectrum(frames.subarray(f * size, (f + 1) * size));
+    const centroid = fft.computeSpectralCentroid(power, sampleRate);
+    const flatness = fft.computeSpectralFlatness(power);
+    const brightness = normalize(centroid);
+    const breathiness = Math.min(flatness, 1.0);
+    for (let k = 0; k < power.length; k++) out.push(power[k]);
+    out.push(centroid, flatness, brightness, breathiness,
+             brightnessFilter.update(brightness), breathinessFilter.update(breathiness));
+}
+'''
+
+
+def js_features(frames, fs=44100):
+    """
+    The worklet's own results for float32 frames of FFT_SIZE samples.
+    Returns (power, centroid, flatness, brightness, breathiness,
+    smoothed brightness, smoothed breathiness).
+    """
+    snippet = (_JS_FEATURES.replace('__SIZE__', str(FFT_SIZE))
+               .replace('__BRIGHTNESS_ALPHA__', repr(BRIGHTNESS_ALPHA))
+               .replace('__BREATHINESS_ALPHA__', repr(BREATHINESS_ALPHA)))
+    values = worklet_js.run(snippet, frames, fs).reshape(len(frames), -1)
+    half = FFT_SIZE // 2
+    return (values[:, :half],) + tuple(values[:, half + i] for i in range(6))
+
+
+def parity_errors(frames, fs=44100):
+    """Largest deviations from the JS classes (power relative to each frame's peak)."""
+    frames = np.asarray(frames, dtype=np.float32)
+    js = js_features(frames, fs)
+    analyzer = SpectralAnalyzer(FFT_SIZE, fs)
+    power = analyzer.power_spectrum(frames)
+    features = analyzer.features(frames)
+    ours = (power, features.centroid, features.flatness, features.brightness,
+            features.breathiness) + smooth(features)
+
+    peak = power.max(axis=-1, keepdims=True)
+    errors = {'power': float(np.max(np.abs(js[0] - power) / peak))}
+    for name, a, b in zip(['centroid_hz', 'flatness', 'brightness', 'breathiness',
+                           'brightness_ema', 'breathiness_ema'], js[1:], ours[1:]):
+        errors[name] = float(np.max(np.abs(a - b)))
+    return errors
+
+
+def test_frames(n_frames, size=FFT_SIZE, fs=44100, seed=0):
+    """Harmonic frames with random F0, roll-off and noise level (float32)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(size) / fs
+    f0 = np.exp(rng.uniform(np.log(80), np.log(1600), (n_frames, 1)))
+    rolloff = rng.uniform(0.5, 2.5, (n_frames, 1))
+    frames = np.zeros((n_frames, size))
+    for h in range(1, 13):
+        frames += np.sin(2 * np.pi * h * f0 * t + rng.uniform(0, 2 * np.pi, (n_frames, 1))) \
+            * (h * f0 < fs / 2) / h ** rolloff
+    frames += rng.standard_normal(frames.shape) * rng.uniform(0.001, 1.0, (n_frames, 1))
+    frames *= 0.5 / np.max(np.abs(frames), axis=1, keepdims=True)
+    return frames.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=10000, help='frames for the batch timing')
+    parser.add_argument('--parity-frames', type=int, default=200)
+    args = parser.parse_args()
+
+    analyzer = SpectralAnalyzer()
+    frames = test_frames(args.frames)
+    analyzer.features(frames[:16])
+    start = time.perf_counter()
+    features = analyzer.features(frames)
+    smooth(features)
+    seconds = time.perf_counter() - start
+    print(f'{args.frames} frames of {FFT_SIZE}: {seconds * 1000:.1f} ms '
+          f'({seconds / args.frames * 1e6:.2f} us/frame)')
+
+    if not worklet_js.available():
+        print('Node not found; JS parity check skipped')
+        return
+    errors = parity_errors(test_frames(args.parity_frames, seed=1))
+    print(f'Max deviation from pitch-worklet.js over {args.parity_frames} frames:')
+    failed = [name for name, value in errors.items() if value > PARITY_TOLERANCE[name]]
+    for name, value in errors.items():
+        status = 'FAIL' if name in failed else 'ok'
+        print(f'  {name:<16} {value:>10.3g}  (tolerance {PARITY_TOLERANCE[name]:g})  {status}')
+    if failed:
+        raise SystemExit(f'Parity check failed: {", ".join(failed)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Timers
+Low-overhead timing hooks for the Python reference code, by Figure 7 stage
+Mambo Whistle Technical Report
+
+Hot functions are labelled with a Figure 7 stage (latency_trace.PIPELINE_STAGES)
+and a detail, by default the function name:
+
+    @stage_timer.timed('YIN Pitch Detection')
+    def difference_function(frame, W=None): ...
+
+    with stage_timer.stage('FFT + Features', 'block'):
+        ...
+
+The hooks in yin.py, spectral_features.py and smoothing.py cost one flag
+check while the timer is off (the default). Once enable()d, every thread
+records (label, start, end) perf_counter_ns tuples into its own ring buffer
+of RING_SIZE events, without locks. Whenever a ring wraps, its events are
+folded into per-thread latency_trace.LogHistogram summaries first, so the
+summary covers every recorded call while the trace keeps the newest events.
+With sample_every=n only every n-th call of a label in a thread is timed.
+
+    chrome_trace()   Chrome trace-event JSON ("X" events per call, one track
+                     per thread, nested calls stacked); open it in
+                     chrome://tracing or ui.perfetto.dev
+    summary()        calls, total, mean and p50/p95/p99 per label (ms)
+
+Usage:
+    python stage_timer.py [--seconds 60] [--threads 4] [--sample 1]
+
+profiles yin.track_pitch, spectral_features.track_features and the
+smoothing filters on a hummed test recording, and measures the overhead of
+the hooks against the same load with the timer off. Results go to
+data/stage_profile.json and data/stage_trace.json.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import latency_trace
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'stage_profile.json'
+DEFAULT_TRACE = Path(__file__).parent.parent / 'data' / 'stage_trace.json'
+
+RING_SIZE = 65536                   # Events kept per thread for the trace
+HISTOGRAM_RANGE = (1e-5, 1e5)       # ms, 10 ns .. 100 s
+QUANTILES = (50, 95, 99)
+
+
+# ============================================================================
+#  PER-THREAD RING BUFFER
+# ============================================================================
+
+def _histogram():
+    return latency_trace.LogHistogram(1, *HISTOGRAM_RANGE)
+
+
+def _fold(histograms, events):
+    """Add the durations (ms) of (label, start, end) events to {label: histogram}."""
+    events = np.fromiter(itertools.chain.from_iterable(events), dtype=np.int64,
+                         count=3 * len(events)).reshape(-1, 3)
+    durations = (events[:, 2] - events[:, 1]) / 1e6
+    for label in np.unique(events[:, 0]).tolist():
+        if label not in histograms:
+            histograms[label] = _histogram()
+        histograms[label].add(durations[events[:, 0] == label, np.newaxis])
+
+
+class _Ring:
+    """Events of one thread: the newest `size` for the trace, all in histograms."""
+
+    def __init__(self, size):
+        thread = threading.current_thread()
+        self.tid = thread.ident
+        self.thread_name = thread.name
+        self.clear(size)
+
+    def clear(self, size):
+        self.size = size
+        self.events = [None] * size
+        self.written = 0
+        self.calls = {}
+        self.histograms = {}
+
+    def record(self, label, start, end):
+        self.events[self.written % self.size] = (label, start, end)
+        self.written += 1
+        if self.written % self.size == 0:
+            _fold(self.histograms, self.events)
+
+    def unfolded(self):
+        """Events recorded since the ring last wrapped."""
+        return self.events[:self.written % self.size]
+
+    def newest(self):
+        """The events still in the ring, oldest first."""
+        if self.written <= self.size:
+            return self.events[:self.written]
+        cut = self.written % self.size
+        return self.events[cut:] + self.events[:cut]
+
+
+class _Span:
+    __slots__ = ('ring', 'label', 'start')
+
+    def __init__(self, ring, label):
+        self.ring = ring
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.ring.record(self.label, self.start, time.perf_counter_ns())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# ============================================================================
+#  REGISTRY
+# ============================================================================
+
+class StageTimer:
+    """
+    Registry of (stage, detail) labels and the rings of the threads that
+    recorded them. enable(), disable() and reset() are meant to be called
+    while no timed code runs.
+    """
+
+    def __init__(self, stage_names=latency_trace.STAGE_NAMES):
+        self.stage_names = list(stage_names)
+        self.labels = []
+        self._ids = {}
+        self._rings = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.sample_every = 1
+        self.ring_size = RING_SIZE
+        self.origin = time.perf_counter_ns()
+
+    def label(self, stage, detail=None):
+        """Id of (stage, detail); stage must be one of the Figure 7 stages."""
+        if stage not in self.stage_names:
+            raise ValueError(f'unknown stage {stage!r}; choose from {", ".join(self.stage_names)}')
+        key = (stage, detail)
+        with self._lock:
+            if key not in self._ids:
+                self._ids[key] = len(self.labels)
+                self.labels.append(key)
+            return self._ids[key]
+
+    def enable(self, sample_every=1, ring_size=RING_SIZE):
+        self.reset(ring_size)
+        self.sample_every = max(int(sample_every), 1)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self, ring_size=None):
+        """Drop all recorded events; the time origin of the trace restarts."""
+        with self._lock:
+            self.ring_size = ring_size or self.ring_size
+            for ring in self._rings:
+                ring.clear(self.ring_size)
+            self.origin = time.perf_counter_ns()
+
+    def _ring(self):
+        try:
+            return self._local.ring
+        except AttributeError:
+            ring = self._local.ring = _Ring(self.ring_size)
+            with self._lock:
+                self._rings.append(ring)
+            return ring
+
+    def _sampled_ring(self, label):
+        """The thread's ring if this call of `label` is sampled, else None."""
+        ring = self._ring()
+        if self.sample_every > 1:
+            calls = ring.calls.get(label, 0)
+            ring.calls[label] = calls + 1
+            if calls % self.sample_every:
+                return None
+        return ring
+
+    # ------------------------------------------------------------------------
+    #  Hooks
+    # ------------------------------------------------------------------------
+
+    def stage(self, stage, detail=None):
+        """Context manager timing its body as (stage, detail)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        label = self.label(stage, detail)
+        ring = self._sampled_ring(label)
+        return _Span(ring, label) if ring is not None else _NULL_SPAN
+
+    def timed(self, stage, detail=None):
+        """Decorator timing each call as (stage, detail or the function name)."""
+        def decorate(fn):
+            label = self.label(stage, detail or fn.__qualname__)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                ring = self._sampled_ring(label)
+                if ring is None:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    ring.record(label, start, time.perf_counter_ns())
+            return wrapper
+        return decorate
+
+    # ------------------------------------------------------------------------
+    #  Export
+    # ------------------------------------------------------------------------
+
+    def label_name(self, label):
+        stage, detail = self.labels[label]
+        return f'{stage}: {detail}' if detail else stage
+
+    def summary(self, quantiles=QUANTILES):
+        """{label name: calls, total/mean and quantiles in ms} over all threads."""
+        merged = {}
+        with self._lock:
+            rings = list(self._rings)
+        for ring in rings:
+            pending = {}
+            _fold(pending, ring.unfolded())
+            for histograms in (ring.histograms, pending):
+                for label, histogram in histograms.items():
+                    total = merged.setdefault(label, _histogram())
+                    total.counts += histogram.counts
+                    total.sums += histogram.sums
+                    total.count += histogram.count
+
+        summary = {}
+        for label in sorted(merged, key=lambda l: (self.stage_names.index(self.labels[l][0]), l)):
+            histogram = merged[label]
+            stage, detail = self.labels[label]
+            row = {'stage': stage, 'detail': detail, 'calls': histogram.count,
+                   'total_ms': float(histogram.sums[0]), 'mean_ms': float(histogram.mean()[0])}
+            row.update({f'p{q}_ms': float(histogram.quantile(q)[0]) for q in quantiles})
+            summary[self.label_name(label)] = row
+        return summary
+
+    def chrome_trace(self):
+        """Chrome trace-event JSON object of the events still in the rings."""
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            rings = list(self._rings)
+        for ring in rings:
+            if not ring.written:
+                continue
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ring.tid,
+                           'args': {'name': ring.thread_name}})
+            for label, start, end in ring.newest():
+                stage, detail = self.labels[label]
+                events.append({'name': detail or stage, 'cat': stage, 'ph': 'X',
+                               'ts': (start - self.origin) / 1e3, 'dur': (end - start) / 1e3,
+                               'pid': pid, 'tid': ring.tid})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'sample_every': self.sample_every, 'ring_size': self.ring_size}}
+
+    def write_chrome_trace(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()) + '\n')
+
+
+# The registry the hooks in the reference modules use
+TIMER = StageTimer()
+stage = TIMER.stage
+timed = TIMER.timed
+enable = TIMER.enable
+disable = TIMER.disable
+reset = TIMER.reset
+summary = TIMER.summary
+write_chrome_trace = TIMER.write_chrome_trace
+
+
+# ============================================================================
+#  PROFILING RUN
+# ============================================================================
+
+def workload(signal, fs):
+    """Batch analysis of one recording through the hooked modules."""
+    import smoothing
+    import spectral_features
+    import yin
+
+    track = yin.track_pitch(signal, fs)
+    features = spectral_features.track_features(signal, fs=fs)
+    spectral_features.smooth(features)
+    voiced = np.where(track.f0 > 0, track.f0, 0.0)
+    smoothing.kalman(voiced)
+    smoothing.median_filter(voiced)
+
+
+def run(recordings, fs, threads):
+    """Wall time of the workload over `recordings`, `threads` at a time."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads, thread_name_prefix='analysis') as pool:
+        list(pool.map(lambda signal: workload(signal, fs), recordings))
+    return time.perf_counter() - start
+
+
+def hook_cost(calls=200000):
+    """ns per call of an empty timed function: off, on, and on with sampling 1/16."""
+    timer = StageTimer()
+    hooked = timer.timed('YIN Pitch Detection', 'empty')(lambda: None)
+
+    def per_call(fn):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            fn()
+        return (time.perf_counter_ns() - start) / calls
+
+    bare = per_call(lambda: None)
+    costs = {'off': per_call(hooked) - bare}
+    timer.enable()
+    costs['on'] = per_call(hooked) - bare
+    timer.enable(sample_every=16)
+    costs['on, 1/16 sampled'] = per_call(hooked) - bare
+    return costs
+
+
+def main():
+    import audio_reader
+    import stage_timer      # The registry the hooks use, also when run as __main__
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60.0, help='length of each recording')
+    parser.add_argument('--recordings', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--sample', type=int, default=1, help='time every n-th call')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--trace', type=Path, default=DEFAULT_TRACE)
+    args = parser.parse_args()
+
+    fs = 44100
+    recordings = [np.concatenate(list(audio_reader.test_recording(args.seconds, fs, seed=k)))
+                  for k in range(args.recordings)]
+    run(recordings[:1], fs, 1)
+
+    # Best of interleaved off/on runs, so drift affects both alike
+    # The summary and trace are those of the last timed run
+    off, on = [], []
+    for _ in range(args.repeats):
+        stage_timer.disable()
+        off.append(run(recordings, fs, args.threads))
+        stage_timer.enable(args.sample)
+        on.append(run(recordings, fs, args.threads))
+    stage_timer.disable()
+    overhead = min(on) / min(off) - 1
+    stats = stage_timer.summary()
+    stage_timer.write_chrome_trace(args.trace)
+
+    audio_seconds = args.recordings * args.seconds
+    print(f'{args.recordings} x {args.seconds:g} s recordings on {args.threads} threads: '
+          f'{min(off):.2f} s untimed, {min(on):.2f} s timed '
+          f'(overhead {overhead * 100:+.1f}%, sample 1/{args.sample})')
+    print(f'{"Stage: function":<56} {"calls":>7} {"total s":>8} {"mean ms":>9}'
+          + ''.join(f'{f"p{q}":>9}' for q in QUANTILES))
+    for name, row in stats.items():
+        print(f'{name:<56} {row["calls"]:>7} {row["total_ms"] / 1e3:>8.2f} '
+              f'{row["mean_ms"]:>9.3f}' + ''.join(f'{row[f"p{q}_ms"]:>9.3f}' for q in QUANTILES))
+    costs = hook_cost()
+    print('Hook cost per call: ' + ', '.join(f'{mode} {ns:.0f} ns' for mode, ns in costs.items()))
+
+    report = {'recordings': args.recordings, 'seconds': args.seconds, 'threads': args.threads,
+              'sample_every': args.sample, 'repeats': args.repeats,
+              'untimed_s': min(off), 'timed_s': min(on), 'overhead': overhead,
+              'realtime_factor': audio_seconds / min(off), 'hook_ns': costs, 'stages': stats}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}, trace to {args.trace}')
+
+
+if __name__ == '__main__':
+    main()
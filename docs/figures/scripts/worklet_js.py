@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Worklet JS Bridge
+Runs code against the classes of js/pitch-worklet.js under Node for parity checks
+Mambo Whistle Technical Report
+
+The worklet file is evaluated in a Node `vm` context with the AudioWorklet
+globals stubbed (AudioWorkletProcessor, registerProcessor, sampleRate,
+currentTime), which exposes FastFFT, EMAFilter, SimpleOnsetDetector and
+PitchDetectorWorklet to a short JS snippet. Float32 input is passed on
+stdin as `frames`; the snippet pushes numbers onto `out`, which come back
+as a float64 array.
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+WORKLET_PATH = REPO_ROOT / 'js' / 'pitch-worklet.js'
+
+_RUNNER = r'''
+const fs = require('fs');
+const vm = require('vm');
+const context = vm.createContext({
+    console,
+    AudioWorkletProcessor: class { constructor() { this.port = { postMessage() {} }; } },
+    registerProcessor() {},
+    sampleRate: __SAMPLE_RATE__,
+    currentTime: 0,
+});
+vm.runInContext(fs.readFileSync(__WORKLET_PATH__, 'utf8') + `
+globalThis.worklet = { FastFFT, EMAFilter, SimpleOnsetDetector, PitchDetectorWorklet };`, context);
+const { FastFFT, EMAFilter, SimpleOnsetDetector, PitchDetectorWorklet } = context.worklet;
+const sampleRate = __SAMPLE_RATE__;
+
+const input = fs.readFileSync(0);
+const frames = new Float32Array(input.buffer.slice(input.byteOffset, input.byteOffset + input.length));
+const out = [];
+__SNIPPET__
+process.stdout.write(Buffer.from(new Float64Array(out).buffer));
+'''
+
+
+def available():
+    """True when Node is on the PATH and the worklet source exists."""
+    return shutil.which('node') is not None and WORKLET_PATH.exists()
+
+
+def run(snippet, frames, fs=44100):
+    """Run `snippet` with the worklet classes in scope; returns `out` as float64."""
+    if not available():
+        raise RuntimeError(f'Node and {WORKLET_PATH} are required for worklet parity checks')
+    script = (_RUNNER.replace('__WORKLET_PATH__', json.dumps(str(WORKLET_PATH)))
+              .replace('__SAMPLE_RATE__', repr(fs))
+              .replace('__SNIPPET__', snippet))
+    data = np.ascontiguousarray(frames, dtype='<f4').tobytes()
+    result = subprocess.run(['node', '--input-type=commonjs', '-e', script], input=data,
+                            capture_output=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip())
+    return np.frombuffer(result.stdout, dtype='<f8')
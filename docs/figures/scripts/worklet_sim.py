@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Worklet Render-Quantum Simulator
+Replays audio through the PitchDetectorWorklet.process chain, one quantum at a time
+Mambo Whistle Technical Report
+
+Each 128-sample render quantum goes through the same steps as
+js/pitch-worklet.js:
+
+    _calculateRMS         volume of the quantum itself (not of the frame)
+    _accumulateAudio      fill the 1024-sample accumulation buffer
+    detector              fixed-window YIN (golden_vectors.worklet_yin), only when
+                          the buffer is full and volume >= minVolumeThreshold
+    FastFFT features      power spectrum, centroid, flatness (spectral_features.py),
+                          only for a detected F0 in 20 .. 2000 Hz
+    EMAFilter             volume 0.3, brightness 0.3, breathiness 0.4
+    SimpleOnsetDetector   articulation state from the smoothed volume in dB
+    copyWithin            keep the newest half, so results come every 512 samples
+
+Every quantum is timed stage by stage with perf_counter. A quantum misses
+its deadline when its compute time exceeds 128 / fs (2.9 ms at 44.1 kHz).
+The latency of a result is the time from the centre of its analysis frame
+(the instant its F0 describes) to the end of the quantum that posts it:
+half a frame of buffering plus that quantum's compute time.
+
+The timings measure this NumPy reference, not the browser's JIT-compiled
+JS; they bound whether the chain fits the quantum, and give Figure 7
+measured values for the audio-thread stages. The summary (per-stage
+p50/p95/p99, deadline misses, result latency) is written to
+data/worklet_sim.json, which Figure 7 uses in place of the cited means for
+Buffer Accumulation, YIN Pitch Detection and FFT + Features when no full
+pipeline trace exists.
+
+Usage:
+    python worklet_sim.py [--seconds 10] [--corpus ../data/corpus]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+import golden_vectors
+import spectral_features
+import yin
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'worklet_sim.json'
+
+FS = 44100
+QUANTUM = 128                       # Web Audio render quantum
+FRAME_LENGTH = golden_vectors.FRAME_LENGTH
+PITCH_RANGE = (20.0, 2000.0)        # Frequencies that produce a pitch-frame
+VOLUME_ALPHA = 0.3                  # volumeFilter
+QUANTILES = (50, 95, 99)
+
+# Figure 7 stages the simulator measures (latency_trace.PIPELINE_STAGES names)
+SIMULATED_STAGES = ('Buffer Accumulation', 'YIN Pitch Detection', 'FFT + Features')
+
+
+# ============================================================================
+#  WORKLET STATE
+# ============================================================================
+
+class EMAFilter:
+    """EMAFilter: the first value passes through, then alpha x + (1 - alpha) y."""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class OnsetDetector:
+    """SimpleOnsetDetector with the worklet's configuration."""
+
+    def __init__(self, energy_threshold=3.0, history_size=5, silence_threshold=-40.0,
+                 min_state_duration=50.0):
+        self.energy_threshold = energy_threshold
+        self.history_size = history_size
+        self.silence_threshold = silence_threshold
+        self.min_state_duration = min_state_duration     # ms
+        self.history = []
+        self.state = 'silence'
+        self.last_change = 0.0
+
+    def detect(self, volume_db, current_time):
+        self.history.append(volume_db)
+        if len(self.history) > self.history_size:
+            self.history.pop(0)
+        increase = volume_db - sum(self.history) / len(self.history)
+        can_change = (current_time - self.last_change) * 1000 >= self.min_state_duration
+
+        state, silence = self.state, self.silence_threshold
+        if state == 'silence':
+            if volume_db > silence:
+                state = 'attack' if increase > self.energy_threshold or volume_db > -20 else 'sustain'
+        elif state == 'attack':
+            if can_change:
+                state = 'sustain'
+        elif state == 'sustain':
+            if volume_db < silence + 10:
+                state = 'release'
+        elif state == 'release':
+            if volume_db < silence:
+                state = 'silence'
+            elif volume_db > silence + 15:
+                state = 'sustain'
+
+        if state != self.state:
+            self.state = state
+            self.last_change = current_time
+        return self.state
+
+
+class WorkletSimulator:
+    """PitchDetectorWorklet.process for float32 quanta, with per-stage timings."""
+
+    def __init__(self, fs=FS, frame_length=FRAME_LENGTH, threshold=golden_vectors.THRESHOLD):
+        self.fs = fs
+        self.threshold = threshold
+        self.buffer = np.zeros(frame_length, dtype=np.float32)
+        self.index = 0
+        self.analyzer = spectral_features.SpectralAnalyzer(spectral_features.FFT_SIZE, fs)
+        self.volume_filter = EMAFilter(VOLUME_ALPHA)
+        self.brightness_filter = EMAFilter(spectral_features.BRIGHTNESS_ALPHA)
+        self.breathiness_filter = EMAFilter(spectral_features.BREATHINESS_ALPHA)
+        self.onset = OnsetDetector()
+
+    def process(self, quantum, current_time):
+        """
+        One render quantum. Returns (stage seconds, result), where stage
+        seconds is (accumulate, yin, features) and result is the pitch-frame
+        data as a dict, or None when nothing is posted.
+        """
+        clock = time.perf_counter
+        start = clock()
+        volume = math.sqrt(float(np.dot(quantum, quantum)) / len(quantum)) if len(quantum) else 0.0
+        size = min(len(quantum), len(self.buffer) - self.index)
+        self.buffer[self.index:self.index + size] = quantum[:size]
+        self.index += size
+        accumulate = clock() - start
+        if self.index < len(self.buffer):
+            return (accumulate, 0.0, 0.0), None
+
+        result, yin_time, features_time = None, 0.0, 0.0
+        if volume >= yin.MIN_VOLUME:
+            start = clock()
+            frame = self.buffer[np.newaxis].astype(np.float64)
+            f0 = float(golden_vectors.worklet_yin(frame, self.fs, self.threshold)['f0'][0])
+            yin_time = clock() - start
+            if PITCH_RANGE[0] <= f0 <= PITCH_RANGE[1]:
+                start = clock()
+                features = self.analyzer.features(frame)
+                volume_ema = self.volume_filter.update(volume)
+                volume_db = 20 * math.log10(volume_ema) if volume_ema > 0 else -100.0
+                result = {
+                    'frequency': f0,
+                    'volume_db': volume_db,
+                    'brightness': self.brightness_filter.update(float(features.brightness[0])),
+                    'breathiness': self.breathiness_filter.update(float(features.breathiness[0])),
+                    'articulation': self.onset.detect(volume_db, current_time),
+                }
+                features_time = clock() - start
+
+        start = clock()
+        half = len(self.buffer) // 2
+        self.buffer[:half] = self.buffer[half:]
+        self.index = half
+        accumulate += clock() - start
+        return (accumulate, yin_time, features_time), result
+
+
+# ============================================================================
+#  REPLAY
+# ============================================================================
+
+def simulate(signal, fs=FS, quantum=QUANTUM):
+    """
+    Replay `signal` quantum by quantum. Returns per-quantum stage times in ms
+    (n_quanta, 3), a mask of quanta that posted a result, and the results.
+    """
+    signal = np.asarray(signal, dtype=np.float32)
+    sim = WorkletSimulator(fs)
+    n_quanta = len(signal) // quantum
+    stage_ms = np.zeros((n_quanta, 3))
+    posted = np.zeros(n_quanta, dtype=bool)
+    results = []
+    for q in range(n_quanta):
+        # currentTime is the context time of the quantum's first sample
+        seconds, result = sim.process(signal[q * quantum:(q + 1) * quantum], q * quantum / fs)
+        stage_ms[q] = seconds
+        if result is not None:
+            posted[q] = True
+            results.append(result)
+    stage_ms *= 1000
+    return stage_ms, posted, results
+
+
+def _stats(values):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {'mean': 0.0, 'max': 0.0, **{f'p{q}': 0.0 for q in QUANTILES}}
+    stats = {'mean': float(values.mean()), 'max': float(values.max())}
+    stats.update({f'p{q}': float(v) for q, v in zip(QUANTILES, np.percentile(values, QUANTILES))})
+    return stats
+
+
+def summarize(stage_ms, posted, fs=FS, quantum=QUANTUM, frame_length=FRAME_LENGTH):
+    """Deadline misses, result latency and Figure 7 stage statistics (ms)."""
+    deadline = quantum / fs * 1000
+    compute = stage_ms.sum(axis=1)
+    buffering = np.full(int(posted.sum()), frame_length / 2 / fs * 1000)
+    analysed = stage_ms[:, 1] > 0
+    return {
+        'fs': fs,
+        'quantum': quantum,
+        'frame_length': frame_length,
+        'hop': frame_length // 2,
+        'deadline_ms': deadline,
+        'quanta': len(stage_ms),
+        'results': int(posted.sum()),
+        'deadline_misses': int(np.sum(compute > deadline)),
+        'quantum_ms': _stats(compute),
+        'result_latency_ms': _stats(buffering + compute[posted]),
+        'stages': {
+            'Buffer Accumulation': _stats(buffering),
+            'YIN Pitch Detection': _stats(stage_ms[analysed, 1]),
+            'FFT + Features': _stats(stage_ms[posted, 2]),
+        },
+    }
+
+
+def test_signal(seconds, fs=FS, seed=0):
+    """Hummed phrase: glides between notes with vibrato, gaps and breath noise."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fs)
+    notes = 110 * 2 ** (rng.integers(0, 24, max(int(seconds * 3), 1)) / 12)
+    f0 = np.repeat(notes, -(-n // len(notes)))[:n]
+    f0 = np.convolve(f0, np.ones(2048) / 2048, mode='same')           # glides
+    f0 *= 2 ** (0.3 / 12 * np.sin(2 * np.pi * 5.5 * np.arange(n) / fs))
+    phase = 2 * np.pi * np.cumsum(f0) / fs
+    signal = sum(np.sin(h * phase) / h for h in range(1, 9))
+    envelope = (np.sin(np.pi * np.arange(n) / fs * 0.7) ** 2 > 0.1).astype(np.float64)
+    envelope = np.convolve(envelope, np.ones(441) / 441, mode='same')
+    signal = 0.3 * envelope * signal / np.max(np.abs(signal)) + 0.003 * rng.standard_normal(n)
+    return signal.astype(np.float32)
+
+
+def load_corpus(path, seconds, fs=FS):
+    """Concatenated corpus clips (corpus.py) up to `seconds` of audio."""
+    import corpus
+    clips = corpus.Corpus(path)
+    if clips.fs != fs:
+        raise ValueError(f'corpus sample rate {clips.fs} Hz, simulator expects {fs} Hz')
+    n_clips = -(-int(seconds * fs) // clips.audio.shape[1])
+    return np.asarray(clips.audio[:n_clips]).reshape(-1)[:int(seconds * fs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0, help='audio to replay')
+    parser.add_argument('--corpus', type=Path, help='replay corpus clips instead of the test phrase')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    signal = (load_corpus(args.corpus, args.seconds) if args.corpus
+              else test_signal(args.seconds))
+    stage_ms, posted, _ = simulate(signal)
+    report = summarize(stage_ms, posted)
+
+    print(f'{report["quanta"]} quanta, {report["results"]} results, deadline '
+          f'{report["deadline_ms"]:.2f} ms, {report["deadline_misses"]} misses')
+    print(f'{"":<22}' + ''.join(f'{name:>9}' for name in ('mean', 'p50', 'p95', 'p99', 'max')))
+    rows = [('Quantum compute', report['quantum_ms']),
+            ('Result latency', report['result_latency_ms'])] + list(report['stages'].items())
+    for name, stats in rows:
+        print(f'{name:<22}' + ''.join(f'{stats[k]:>9.3f}'
+                                      for k in ('mean', 'p50', 'p95', 'p99', 'max')))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
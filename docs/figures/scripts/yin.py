@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+YIN Pitch Detection Kernel
+Vectorized NumPy implementation of the four YIN stages visualized in Figure 5
+Mambo Whistle Technical Report
+
+The squared difference function is evaluated through FFT autocorrelation plus
+cumulative-energy terms instead of the O(N*W) double loop:
+
+    d(tau) = sum_{j=0}^{N-tau-1} (x[j] - x[j+tau])^2
+           = E[0, N-tau) + E[tau, N) - 2 r(tau)
+
+With decimation > 1 the lag search is coarse-to-fine: YIN runs on an
+anti-aliased copy of the frame at 1/decimation of the rate, and d'(tau) is
+then evaluated exactly, at full rate, only in a narrow band of lags around
+the coarse dip (see benchmark_yin_coarse.py for cost and accuracy). With
+early_exit, d(tau) and the running CMNDF are evaluated LAG_BLOCK lags at a
+time, and a frame stops as soon as its first dip below the threshold is
+confirmed (benchmark_yin_early_exit.py).
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+import audio_reader
+import stage_timer
+
+# ============================================================================
+#  DEFAULTS (mirroring js/pitch-worklet.js)
+# ============================================================================
+
+DEFAULT_THRESHOLD = 0.15    # Absolute threshold on d'(tau)
+MIN_TAU = 2                 # First lag considered by the threshold search
+MIN_CONFIDENCE = 0.1        # probabilityThreshold: 1 - d'(tau) below this is unvoiced
+MIN_VOLUME = 0.001          # minVolumeThreshold: RMS below this is not analysed
+
+
+class PitchTrack(NamedTuple):
+    """Per-frame YIN results for a whole recording (one entry per frame)."""
+    f0: np.ndarray
+    confidence: np.ndarray
+    tau: np.ndarray
+    times: np.ndarray
+
+
+class YinResult(NamedTuple):
+    """Intermediate and final values of a single-frame YIN run."""
+    f0: float
+    confidence: float
+    tau_estimate: int
+    tau_refined: float
+    delta: float
+    d: np.ndarray
+    d_prime: np.ndarray
+
+
+# ============================================================================
+#  STEP 1: SQUARED DIFFERENCE FUNCTION
+# ============================================================================
+
+def autocorrelation(frame, W):
+    """Linear autocorrelation r(tau) = sum_j x[j] x[j+tau] for tau in [0, W)."""
+    x = np.asarray(frame, dtype=np.float64)
+    N = x.shape[-1]
+    # Linear (not circular) autocorrelation needs an FFT of at least 2N - 1
+    n_fft = 1 << int(np.ceil(np.log2(2 * N - 1)))
+    spectrum = np.fft.rfft(x, n_fft, axis=-1)
+    return np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n_fft, axis=-1)[..., :W]
+
+
+@stage_timer.timed('YIN Pitch Detection')
+def difference_function(frame, W=None):
+    """
+    Squared difference function d(tau) for tau in [0, W).
+
+    Works on the last axis, so a stack of frames is processed in one call.
+    The sum runs over the whole frame (j < N - tau), matching Figure 5.
+    """
+    x = np.asarray(frame, dtype=np.float64)
+    N = x.shape[-1]
+    if W is None:
+        W = N // 2
+
+    acf = autocorrelation(x, W)
+
+    # energy[k] = sum(x[:k] ** 2)
+    energy = np.zeros(x.shape[:-1] + (N + 1,))
+    np.cumsum(x * x, axis=-1, out=energy[..., 1:])
+
+    tau = np.arange(W)
+    head = energy[..., N - tau]
+    tail = energy[..., N:] - energy[..., tau]
+
+    d = head + tail - 2 * acf
+    d[..., 0] = 0
+    # FFT round-off can push d slightly below zero at near-perfect periods
+    return np.maximum(d, 0, out=d)
+
+
+def fixed_window_difference(frame, W=None):
+    """
+    Fixed-window d(tau) = sum_{j=0}^{W-1} (x[j] - x[j+tau])^2 for tau in [0, W),
+    the form of the original YIN paper used by js/pitch-worklet.js.
+
+    The cross term is the correlation of the first W samples with the whole
+    frame (one FFT product); the frame must hold at least 2W - 1 samples.
+    """
+    x = np.asarray(frame, dtype=np.float64)
+    N = x.shape[-1]
+    if W is None:
+        W = N // 2
+    if N < 2 * W - 1:
+        raise ValueError(f'a fixed window of {W} lags needs {2 * W - 1} samples, got {N}')
+
+    n_fft = 1 << int(np.ceil(np.log2(N + W - 1)))
+    head = np.fft.rfft(x[..., :W], n_fft, axis=-1)
+    full = np.fft.rfft(x, n_fft, axis=-1)
+    cross = np.fft.irfft(np.conj(head) * full, n_fft, axis=-1)[..., :W]
+
+    energy = np.zeros(x.shape[:-1] + (N + 1,))
+    np.cumsum(x * x, axis=-1, out=energy[..., 1:])
+    tau = np.arange(W)
+
+    d = energy[..., W:W + 1] + energy[..., tau + W] - energy[..., tau] - 2 * cross
+    d[..., 0] = 0
+    return np.maximum(d, 0, out=d)
+
+
+# ============================================================================
+#  STEP 2: CUMULATIVE MEAN NORMALIZED DIFFERENCE
+# ============================================================================
+
+@stage_timer.timed('YIN Pitch Detection')
+def cumulative_mean_normalized_difference(d):
+    """d'(tau) = d(tau) / ((1/tau) * sum_{j=1}^{tau} d(j)), with d'(0) = 1."""
+    d = np.asarray(d, dtype=np.float64)
+    cumsum_d = np.cumsum(d[..., 1:], axis=-1)
+    tau = np.arange(1, d.shape[-1])
+
+    d_prime = np.ones_like(d)
+    valid = cumsum_d > 0
+    np.divide(d[..., 1:] * tau, cumsum_d, out=d_prime[..., 1:], where=valid)
+    return d_prime
+
+
+# ============================================================================
+#  STEP 3: ABSOLUTE THRESHOLD
+# ============================================================================
+
+@stage_timer.timed('YIN Pitch Detection')
+def absolute_threshold(d_prime, threshold=DEFAULT_THRESHOLD, min_tau=MIN_TAU):
+    """
+    First lag where d'(tau) drops below the threshold, walked down to the
+    bottom of that dip. Falls back to the global minimum when nothing crosses.
+
+    Operates on the last axis; returns an int for a single frame and an
+    integer array (one lag per frame) for a stack of frames.
+    """
+    d_prime = np.asarray(d_prime)
+    W = d_prime.shape[-1]
+    search = d_prime[..., min_tau:]
+    below = search < threshold
+    has_dip = below.any(axis=-1)
+    start = np.argmax(below, axis=-1) + min_tau
+
+    # stop[t] marks lags where the descent ends: the successor is not lower
+    stop = np.ones(d_prime.shape, dtype=bool)
+    stop[..., :-1] = ~(d_prime[..., 1:] < d_prime[..., :-1])
+    stop &= np.arange(W) >= start[..., np.newaxis]
+    tau = np.argmax(stop, axis=-1)
+
+    fallback = np.argmin(search, axis=-1) + min_tau
+    tau = np.where(has_dip, tau, fallback)
+    return int(tau) if tau.ndim == 0 else tau
+
+
+# ============================================================================
+#  STEP 4: PARABOLIC INTERPOLATION
+# ============================================================================
+
+@stage_timer.timed('YIN Pitch Detection')
+def parabolic_interpolation(d_prime, tau_estimate):
+    """
+    Sub-sample refinement of tau_estimate. Returns (tau_refined, delta).
+
+    Operates on the last axis; tau_estimate holds one lag per frame.
+    """
+    d_prime = np.asarray(d_prime)
+    W = d_prime.shape[-1]
+    tau = np.asarray(tau_estimate)
+    interior = (tau > 1) & (tau < W - 1)
+
+    centre = np.clip(tau, 1, W - 2)[..., np.newaxis]
+    y_prev = np.take_along_axis(d_prime, centre - 1, axis=-1)[..., 0]
+    y_curr = np.take_along_axis(d_prime, centre, axis=-1)[..., 0]
+    y_next = np.take_along_axis(d_prime, centre + 1, axis=-1)[..., 0]
+
+    denominator = y_prev - 2 * y_curr + y_next
+    usable = interior & (np.abs(denominator) > 1e-10)
+    delta = np.where(usable, 0.5 * (y_prev - y_next) / np.where(usable, denominator, 1), 0.0)
+
+    tau_refined = tau + delta
+    if tau_refined.ndim == 0:
+        return float(tau_refined), float(delta)
+    return tau_refined, delta
+
+
+# ============================================================================
+#  FULL PIPELINE
+# ============================================================================
+
+def detect_pitch(frame, fs, threshold=DEFAULT_THRESHOLD, W=None):
+    """Run all four YIN stages on a single frame."""
+    d = difference_function(frame, W)
+    d_prime = cumulative_mean_normalized_difference(d)
+    tau_estimate = absolute_threshold(d_prime, threshold)
+    tau_refined, delta = parabolic_interpolation(d_prime, tau_estimate)
+
+    return YinResult(
+        f0=fs / tau_refined,
+        confidence=1 - d_prime[tau_estimate],
+        tau_estimate=tau_estimate,
+        tau_refined=tau_refined,
+        delta=delta,
+        d=d,
+        d_prime=d_prime,
+    )
+
+
+# ============================================================================
+#  COARSE-TO-FINE SEARCH
+# ============================================================================
+
+DECIMATION_TAPS = 8         # Anti-aliasing FIR taps per unit of decimation
+BAND_MARGIN = 2             # Full-rate lags searched beyond +-decimation around the coarse dip
+
+
+def decimation_filter(factor):
+    """Hamming-windowed sinc lowpass at 0.8 of the decimated Nyquist frequency."""
+    n = np.arange(DECIMATION_TAPS * factor + 1) - DECIMATION_TAPS * factor / 2
+    cutoff = 0.8 / factor
+    h = cutoff * np.sinc(cutoff * n) * np.hamming(len(n))
+    return h / h.sum()
+
+
+def decimate(frames, factor):
+    """Lowpass and keep every factor-th sample; the filter is evaluated at kept samples only."""
+    h = decimation_filter(factor)
+    x = np.asarray(frames, dtype=np.float64)
+    return np.lib.stride_tricks.sliding_window_view(x, len(h), axis=-1)[..., ::factor, :] @ h
+
+
+def band_difference(frames, lags):
+    """
+    d(tau) and d'(tau) of difference_function at a band of lags per frame.
+
+    lags is (n_frames, B), consecutive in each row and >= 1. The normalizer
+    of d' needs sum_{j=1}^{tau} d(j) for all lags below the band; its
+    energy terms are cumulative sums of the energy prefix E, and with P the
+    prefix sum of x
+
+        sum_{j=1}^{tau} r(j) = sum_i x[i] (P[min(i + tau + 1, N)] - P[i + 1])
+
+    so the band costs O(B N) per frame instead of all W lags.
+    """
+    x = np.asarray(frames, dtype=np.float64)
+    n, N = x.shape
+    rows = np.arange(n)[:, np.newaxis]
+    first, last = lags[:, 0], int(lags.max())
+    span = N + lags.shape[1] - 1
+
+    energy = np.zeros((n, N + 1))
+    np.cumsum(x * x, axis=-1, out=energy[:, 1:])
+    prefix = np.zeros((n, N + last + 1))
+    np.cumsum(x, axis=-1, out=prefix[:, 1:N + 1])
+    prefix[:, N + 1:] = prefix[:, N:N + 1]
+    padded = np.zeros((n, N + last + 1))
+    padded[:, :N] = x
+
+    # Each frame's samples from its first lag on (one row copy), then a window per lag
+    shifted = np.lib.stride_tricks.sliding_window_view(padded, span, axis=-1)[rows[:, 0], first]
+    windows = np.lib.stride_tricks.sliding_window_view(shifted, N, axis=-1)
+    r = np.einsum('nkj,nj->nk', windows, x)
+    ahead = np.lib.stride_tricks.sliding_window_view(prefix, N, axis=-1)[rows[:, 0], first]
+    r_before = np.einsum('ij,ij->i', x, ahead - prefix[:, 1:N + 1])
+    r_sum = r_before[:, np.newaxis] + np.cumsum(r, axis=1)
+
+    # sum_{j=1}^{tau} E[0, N-j) and sum_{j=1}^{tau} E[j, N)
+    head_sum = np.cumsum(energy[:, N - 1:N - 1 - last:-1], axis=1)[rows, lags - 1]
+    tail_sum = lags * energy[:, N:] - np.cumsum(energy[:, 1:last + 1], axis=1)[rows, lags - 1]
+
+    d = energy[rows, N - lags] + energy[:, N:] - energy[rows, lags] - 2 * r
+    np.maximum(d, 0, out=d)
+    total = head_sum + tail_sum - 2 * r_sum
+    d_prime = np.ones_like(d)
+    np.divide(d * lags, total, out=d_prime, where=total > 0)
+    return d, d_prime
+
+
+@stage_timer.timed('YIN Pitch Detection')
+def detect_pitch_coarse_to_fine(frames, fs, threshold=DEFAULT_THRESHOLD, W=None, factor=4):
+    """
+    detect_pitch_batch with a coarse-to-fine lag search.
+
+    The threshold rule picks a dip of d' on the decimated frames; the
+    full-rate d' is then computed for the lags within factor + BAND_MARGIN
+    of it, where the threshold rule and parabolic refinement run again.
+    Frames whose band would be clipped at MIN_TAU or W take the full-rate
+    search instead. The chosen lag, d' and confidence are exact full-rate
+    values, so the result differs from the full search only when the coarse
+    pass picks another dip.
+    """
+    x = np.asarray(frames, dtype=np.float64)
+    N = x.shape[-1]
+    if W is None:
+        W = N // 2
+
+    coarse = decimate(x, factor)
+    W_coarse = min(-(-W // factor) + 1, coarse.shape[-1] - 1)
+    d_coarse = difference_function(coarse, W_coarse)
+    tau_coarse = absolute_threshold(cumulative_mean_normalized_difference(d_coarse), threshold)
+
+    half = factor + BAND_MARGIN
+    centre = np.clip(tau_coarse * factor, MIN_TAU + half + 2, W - half - 2)
+    # A band clipped at either end of the lag range can miss the dip the
+    # full search finds (near W: the lowest F0s of short frames)
+    clipped = np.flatnonzero(centre != tau_coarse * factor)
+    # Two lags before the band and one after, so that parabolic_interpolation
+    # sees every band lag as interior
+    lags = centre[:, np.newaxis] + np.arange(-half - 2, half + 2)
+    _, d_prime = band_difference(x, lags)
+
+    position = absolute_threshold(d_prime[:, :-1], threshold, min_tau=2)
+    refined, _ = parabolic_interpolation(d_prime, position)
+    confidence = 1 - np.take_along_axis(d_prime, position[:, np.newaxis], axis=-1)[:, 0]
+    tau_estimate = lags[:, 0] + position
+    tau_refined = lags[:, 0] + refined
+    if len(clipped):
+        _, confidence[clipped], tau_estimate[clipped], tau_refined[clipped] = (
+            detect_pitch_batch(x[clipped], fs, threshold, W))
+    return fs / tau_refined, confidence, tau_estimate, tau_refined
+
+
+# ============================================================================
+#  EARLY-EXIT SEARCH
+# ============================================================================
+
+LAG_BLOCK = 32              # Lags of d(tau) evaluated per step of the early-exit search
+
+
+@stage_timer.timed('YIN Pitch Detection')
+def detect_pitch_early_exit(frames, fs, threshold=DEFAULT_THRESHOLD, W=None, block=LAG_BLOCK):
+    """
+    detect_pitch_batch evaluating d(tau) and d'(tau) block by block.
+
+    d(tau) of a block comes from time-domain products (one sliding window
+    per lag) and the CMNDF sum is carried across blocks. Lags not computed
+    yet hold d' = inf, so absolute_threshold on the partial d' either
+    finds a dip whose bottom has a computed successor (confirmed: the frame
+    leaves the active set) or ends at the last computed lag. Frames without
+    a dip run to W and fall back to the global minimum as before.
+
+    Returns (f0, confidence, tau_estimate, tau_refined, lags), where lags is
+    the number of lags evaluated for each frame.
+    """
+    x = np.asarray(frames, dtype=np.float64)
+    n, N = x.shape
+    if W is None:
+        W = N // 2
+
+    energy = np.zeros((n, N + 1))
+    np.cumsum(x * x, axis=-1, out=energy[:, 1:])
+    padded = np.zeros((n, N + W))
+    padded[:, :N] = x
+
+    d_prime = np.full((n, W), np.inf)
+    d_prime[:, 0] = 1
+    running = np.zeros(n)
+    lags = np.full(n, W)
+    active = np.arange(n)
+    for start in range(1, W, block):
+        stop = min(start + block, W)
+        tau = np.arange(start, stop)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            padded[active, start:stop + N - 1], N, axis=-1)
+        r = np.einsum('nkj,nj->nk', windows, x[active])
+        rows = active[:, np.newaxis]
+        d = energy[rows, N - tau] + energy[rows, N] - energy[rows, tau] - 2 * r
+        np.maximum(d, 0, out=d)
+
+        cumulative = running[active, np.newaxis] + np.cumsum(d, axis=1)
+        running[active] = cumulative[:, -1]
+        block_prime = np.ones_like(d)
+        np.divide(d * tau, cumulative, out=block_prime, where=cumulative > 0)
+        d_prime[active, start:stop] = block_prime
+
+        if stop == W:
+            break
+        partial = d_prime[active, :stop]
+        confirmed = (partial[:, MIN_TAU:] < threshold).any(axis=1)
+        confirmed &= absolute_threshold(partial, threshold) < stop - 1
+        lags[active[confirmed]] = stop
+        active = active[~confirmed]
+        if len(active) == 0:
+            break
+
+    tau_estimate = absolute_threshold(d_prime, threshold)
+    tau_refined, _ = parabolic_interpolation(d_prime, tau_estimate)
+    confidence = 1 - np.take_along_axis(d_prime, tau_estimate[:, np.newaxis], axis=-1)[:, 0]
+    return fs / tau_refined, confidence, tau_estimate, tau_refined, lags
+
+
+# ============================================================================
+#  BATCHED MULTI-FRAME TRACKING
+# ============================================================================
+
+def frame_signal(signal, frame_length, hop):
+    """
+    Overlapping frames of a 1-D signal as a zero-copy strided view.
+
+    Returns a read-only array of shape (n_frames, frame_length); trailing
+    samples that do not fill a whole frame are dropped.
+    """
+    signal = np.asarray(signal)
+    if len(signal) < frame_length:
+        return np.empty((0, frame_length), dtype=signal.dtype)
+    windows = np.lib.stride_tricks.sliding_window_view(signal, frame_length)
+    return windows[::hop]
+
+
+@stage_timer.timed('YIN Pitch Detection')
+def detect_pitch_batch(frames, fs, threshold=DEFAULT_THRESHOLD, W=None, decimation=1,
+                       early_exit=False):
+    """
+    Run all four YIN stages on a (n_frames, N) stack as 2-D array operations.
+
+    Returns (f0, confidence, tau_estimate, tau_refined), one entry per frame.
+    decimation > 1 selects the coarse-to-fine lag search, early_exit the
+    blocked search that stops at the first confirmed dip.
+    """
+    if decimation > 1:
+        return detect_pitch_coarse_to_fine(frames, fs, threshold, W, decimation)
+    if early_exit:
+        return detect_pitch_early_exit(frames, fs, threshold, W)[:4]
+    d = difference_function(frames, W)
+    d_prime = cumulative_mean_normalized_difference(d)
+    tau_estimate = absolute_threshold(d_prime, threshold)
+    tau_refined, _ = parabolic_interpolation(d_prime, tau_estimate)
+
+    confidence = 1 - np.take_along_axis(d_prime, tau_estimate[:, np.newaxis], axis=-1)[:, 0]
+    return fs / tau_refined, confidence, tau_estimate, tau_refined
+
+
+def track_pitch(signal, fs, frame_length=1024, hop=512, threshold=DEFAULT_THRESHOLD,
+                W=None, block_frames=2048, decimation=1, early_exit=False):
+    """
+    Frame a long recording and run batched YIN over every frame.
+
+    `signal` is a 1-D array or an audio_reader.AudioReader, whose frames are
+    decoded from the mapped file one block at a time. Frames are processed
+    block_frames at a time to bound the size of the FFT scratch arrays;
+    within a block everything is a 2-D array operation. times holds the
+    start of each frame in seconds.
+    """
+    n_frames = audio_reader.count_frames(len(signal), frame_length, hop)
+
+    f0 = np.empty(n_frames)
+    confidence = np.empty(n_frames)
+    tau = np.empty(n_frames)
+    for start, frames in audio_reader.frame_blocks(signal, frame_length, hop, block_frames):
+        block = slice(start, start + len(frames))
+        f0[block], confidence[block], _, tau[block] = detect_pitch_batch(
+            frames, fs, threshold, W, decimation, early_exit)
+
+    times = np.arange(n_frames) * hop / fs
+    return PitchTrack(f0=f0, confidence=confidence, tau=tau, times=times)
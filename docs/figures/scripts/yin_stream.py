@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Streaming YIN Engine
+Python counterpart of the accumulation buffer in js/pitch-worklet.js
+Mambo Whistle Technical Report
+
+Audio arrives in chunks of any size (128-sample render quanta in the
+worklet) and a pitch estimate is emitted every `hop` samples once a full
+frame is buffered. Between overlapping frames the energy prefix sums and
+the lag products r(tau) are updated incrementally:
+
+    r_{s+h}(tau) = r_s(tau) - sum_{j=s}^{s+h-1} x[j] x[j+tau]
+                            + sum_{k=s+N}^{s+N+h-1} x[k] x[k-tau]
+
+which costs O(h*W) per hop instead of a full FFT per frame.
+
+Usage:
+    python yin_stream.py [--quantum 128] [--hops 128 256 512 1024]
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+import yin
+
+
+class StreamResult(NamedTuple):
+    """Pitch estimate for one frame of the stream."""
+    frame_end: int          # Absolute index (exclusive) of the frame's last sample
+    f0: float
+    confidence: float
+    tau: float
+    compute_time: float     # Seconds of CPU time spent on this frame
+
+
+class StreamingYin:
+    """
+    Incremental YIN over a ring buffer.
+
+    The ring buffer is mirrored (every sample is written twice, `capacity`
+    apart) so any window of up to `capacity` samples is a contiguous view.
+    A full FFT recomputation every `refresh_interval` frames bounds the
+    round-off accumulated by the incremental updates.
+    """
+
+    def __init__(self, fs, frame_length=1024, hop=512, threshold=yin.DEFAULT_THRESHOLD,
+                 W=None, refresh_interval=64, incremental=True):
+        self.fs = fs
+        self.N = frame_length
+        self.W = frame_length // 2 if W is None else W
+        self.hop = hop
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        # Overlapping frames share N - hop samples; the update needs hop <= N - W
+        self.incremental = incremental and hop <= self.N - self.W
+
+        self.capacity = self.N + hop
+        self._samples = np.zeros(2 * self.capacity)
+        # _energy[i % cap] = sum(x[:i] ** 2), one extra slot for the frame start
+        self._energy_capacity = self.capacity + 1
+        self._energy = np.zeros(2 * self._energy_capacity)
+        self.reset()
+
+    def reset(self):
+        self.total = 0                  # Samples written so far
+        self.next_frame_start = 0
+        self._r = None                  # Lag products of the previous frame
+        self._frames_since_refresh = 0
+        self._samples[:] = 0
+        self._energy[:] = 0
+
+    # ------------------------------------------------------------------------
+    #  Ring buffer
+    # ------------------------------------------------------------------------
+
+    def _window(self, start, stop):
+        """Contiguous view of samples [start, stop) (absolute indices)."""
+        offset = start % self.capacity
+        return self._samples[offset:offset + (stop - start)]
+
+    def _energy_window(self, start, stop):
+        """Contiguous view of energy prefix sums for indices [start, stop]."""
+        offset = start % self._energy_capacity
+        return self._energy[offset:offset + (stop - start) + 1]
+
+    def _write(self, piece):
+        L = len(piece)
+        idx = (self.total + np.arange(L)) % self.capacity
+        self._samples[idx] = piece
+        self._samples[idx + self.capacity] = piece
+
+        last = self._energy[self.total % self._energy_capacity]
+        prefix = last + np.cumsum(piece * piece)
+        idx = (self.total + 1 + np.arange(L)) % self._energy_capacity
+        self._energy[idx] = prefix
+        self._energy[idx + self._energy_capacity] = prefix
+
+        self.total += L
+
+    # ------------------------------------------------------------------------
+    #  Lag products
+    # ------------------------------------------------------------------------
+
+    def _update_lags(self, s):
+        """r for the frame at s from r of the frame at s - hop (already in self._r)."""
+        N, W, h = self.N, self.W, self.hop
+        prev = s - h
+
+        # Products leaving with samples [prev, prev + h)
+        old = self._window(prev, prev + h + W - 1)
+        removed = np.correlate(old, old[:h], mode='valid')
+
+        # Products entering with samples [prev + N, prev + N + h)
+        new = self._window(prev + N - W + 1, prev + N + h)
+        added = np.correlate(new, new[W - 1:], mode='valid')
+
+        self._r += added[::-1] - removed
+
+    def _process_frame(self, s):
+        start = time.process_time()
+        N, W = self.N, self.W
+
+        if (self.incremental and self._r is not None
+                and self._frames_since_refresh < self.refresh_interval):
+            self._update_lags(s)
+            self._frames_since_refresh += 1
+        else:
+            self._r = yin.autocorrelation(self._window(s, s + N), W)
+            self._frames_since_refresh = 0
+
+        energy = self._energy_window(s, s + N)
+        tau = np.arange(W)
+        d = (energy[N - tau] - energy[0]) + (energy[N] - energy[tau]) - 2 * self._r
+        d[0] = 0
+        np.maximum(d, 0, out=d)
+
+        d_prime = yin.cumulative_mean_normalized_difference(d)
+        tau_estimate = yin.absolute_threshold(d_prime, self.threshold)
+        tau_refined, _ = yin.parabolic_interpolation(d_prime, tau_estimate)
+
+        return StreamResult(
+            frame_end=s + N,
+            f0=self.fs / tau_refined,
+            confidence=1 - d_prime[tau_estimate],
+            tau=tau_refined,
+            compute_time=time.process_time() - start,
+        )
+
+    # ------------------------------------------------------------------------
+    #  Public API
+    # ------------------------------------------------------------------------
+
+    def push(self, chunk):
+        """Feed a chunk of any size; returns the results of completed frames."""
+        chunk = np.asarray(chunk, dtype=np.float64)
+        results = []
+        pos = 0
+        while pos < len(chunk):
+            # Never write past the end of the next frame, so the ring buffer
+            # still holds everything that frame (and its update) needs
+            frame_end = self.next_frame_start + self.N
+            take = min(len(chunk) - pos, frame_end - self.total)
+            self._write(chunk[pos:pos + take])
+            pos += take
+
+            if self.total == frame_end:
+                results.append(self._process_frame(self.next_frame_start))
+                self.next_frame_start += self.hop
+        return results
+
+
+# ============================================================================
+#  HOP SIZE STUDY
+# ============================================================================
+
+def step_signal(fs, f_before=220.0, f_after=330.0, duration=2.0, seed=0):
+    """Harmonic tone that jumps from f_before to f_after halfway through."""
+    rng = np.random.default_rng(seed)
+    n = int(duration * fs)
+    f = np.where(np.arange(n) < n // 2, f_before, f_after)
+    phase = 2 * np.pi * np.cumsum(f) / fs
+    signal = sum(np.sin(h * phase) / h ** 0.8 for h in range(1, 9))
+    signal += 0.02 * rng.standard_normal(n)
+    return signal / np.max(np.abs(signal)) * 0.9, n // 2
+
+
+def run_stream(detector, signal, quantum):
+    results = []
+    for start in range(0, len(signal), quantum):
+        results.extend(detector.push(signal[start:start + quantum]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fs', type=int, default=44100)
+    parser.add_argument('--frame', type=int, default=1024)
+    parser.add_argument('--quantum', type=int, default=128,
+                        help='chunk size fed to the detector (AudioWorklet render quantum)')
+    parser.add_argument('--hops', type=int, nargs='+', default=[128, 256, 512, 1024])
+    args = parser.parse_args()
+
+    fs = args.fs
+    signal, step_at = step_signal(fs)
+    f_after = 330.0
+    print(f'{"hop":>6} {"mode":>12} {"frames":>7} {"CPU/frame (us)":>15} '
+          f'{"RT load (%)":>12} {"step latency (ms)":>18}')
+
+    for hop in args.hops:
+        for incremental in (True, False):
+            detector = StreamingYin(fs, args.frame, hop, incremental=incremental)
+            results = run_stream(detector, signal, args.quantum)
+
+            cpu = np.array([r.compute_time for r in results])
+            load = cpu.sum() / (len(signal) / fs) * 100
+
+            # Latency: first frame ending after the step that reports the new pitch
+            ends = np.array([r.frame_end for r in results])
+            f0 = np.array([r.f0 for r in results])
+            cents = np.abs(1200 * np.log2(f0 / f_after))
+            hit = np.flatnonzero((ends > step_at) & (cents < 50))
+            latency = (ends[hit[0]] - step_at) / fs * 1000 if len(hit) else float('nan')
+
+            mode = 'incremental' if detector.incremental else 'full FFT'
+            print(f'{hop:>6} {mode:>12} {len(results):>7} {cpu.mean() * 1e6:>15.1f} '
+                  f'{load:>12.2f} {latency:>18.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+YIN Parameter Sweep
+Threshold x frequency-range sweep that computes d'(tau) once per frame
+Mambo Whistle Technical Report
+
+The threshold and lag range only affect step 3 (absolute threshold) of YIN,
+so the difference function and CMNDF are computed once per frame and every
+setting is answered from them:
+
+    - for each lag range [lo, hi), the running minimum of d' from lo is
+      non-increasing, so the first lag below *every* threshold is one
+      binary search per threshold (one searchsorted call for all frames);
+    - the end of the descent from any start lag ("walk down to the bottom
+      of the dip") is precomputed once per frame as a suffix minimum over
+      the lags where d' stops decreasing.
+
+Ranges with the same upper frequency share the running minimum and argmin,
+so a sweep of T thresholds x L ranges costs one detection pass, a few O(W)
+passes per distinct upper frequency and O(L x T) lookups per frame (240
+settings run in about 1.5x the time of a single pass). Each lag range
+also implies a minimum analysis window of 2 * tau_max samples, which is
+reported as its buffering latency.
+
+Usage:
+    python yin_sweep.py [--clips 64] [--thresholds 0.05:0.5:20]
+    python yin_sweep.py --corpus ../data/corpus --min-freq 60 80 100 --max-freq 800 1200
+
+Author: Mambo Whistle Team
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+import corpus
+import pitch_metrics
+import yin
+
+FS = 44100
+DEFAULT_OUTPUT = Path(__file__).parent.parent / 'data' / 'yin_sweep.json'
+
+# Worklet settings (js/pitch-worklet.js)
+WORKLET_THRESHOLD = 0.15
+WORKLET_RANGE = (80.0, 800.0)
+
+D_PRIME_CAP = 4.0               # Thresholds must lie below this
+
+
+class SweepResult(NamedTuple):
+    """Per-frame results for every setting, shaped (n_frames, n_ranges, n_thresholds)."""
+    f0: np.ndarray              # 0 where unvoiced
+    confidence: np.ndarray
+    tau: np.ndarray
+    tau_refined: np.ndarray
+    has_dip: np.ndarray         # False where tau is the in-range minimum fallback
+
+
+def lag_bounds(fs, min_freq, max_freq, W):
+    """Lag search interval [lo, hi) for a frequency range."""
+    lo = max(yin.MIN_TAU, int(np.floor(fs / max_freq)))
+    hi = min(W, int(np.ceil(fs / min_freq)) + 1)
+    if lo >= hi - 1:
+        raise ValueError(f'range {min_freq}-{max_freq} Hz does not fit W = {W} lags')
+    return lo, hi
+
+
+def window_latency_ms(fs, min_freq):
+    """Shortest YIN window (W = N / 2) able to see min_freq, in ms."""
+    return 2 * np.ceil(fs / min_freq) / fs * 1000
+
+
+# ============================================================================
+#  SHARED-CMNDF THRESHOLD SEARCH
+# ============================================================================
+
+def descent_ends(d_prime):
+    """For every lag t, the first lag s >= t at which d' stops decreasing."""
+    W = d_prime.shape[-1]
+    stop = np.ones(d_prime.shape, dtype=bool)
+    stop[..., :-1] = ~(d_prime[..., 1:] < d_prime[..., :-1])
+    index = np.where(stop, np.arange(W), W - 1)
+    return np.minimum.accumulate(index[..., ::-1], axis=-1)[..., ::-1]
+
+
+def first_below(running_min, thresholds):
+    """
+    First index where each row of a non-increasing array drops below each
+    threshold (row length when it never does). One searchsorted call for
+    all rows: rows are shifted into disjoint, ascending value bands.
+    """
+    n_rows, n_cols = running_min.shape
+    band = D_PRIME_CAP + 1
+    offsets = np.arange(n_rows)[:, np.newaxis] * band
+    keys = (offsets - np.minimum(running_min, D_PRIME_CAP)).ravel()
+    queries = offsets - np.asarray(thresholds)[np.newaxis, :]
+    index = np.searchsorted(keys, queries.ravel(), side='right').reshape(queries.shape)
+    return index - np.arange(n_rows)[:, np.newaxis] * n_cols
+
+
+def sweep_cmndf(d_prime, fs, thresholds, ranges):
+    """
+    Threshold search, interpolation and voicing for every (range, threshold)
+    setting from one d' per frame. Frames with no dip in range are unvoiced.
+    """
+    d_prime = np.atleast_2d(d_prime)
+    n_frames, W = d_prime.shape
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if thresholds.max() >= D_PRIME_CAP:
+        raise ValueError(f'thresholds must be below {D_PRIME_CAP}')
+
+    descent = descent_ends(d_prime)
+    bounds = [lag_bounds(fs, min_freq, max_freq, W) for min_freq, max_freq in ranges]
+    tau = np.empty((n_frames, len(ranges), len(thresholds)), dtype=np.int64)
+    has_dip = np.empty(tau.shape, dtype=bool)
+
+    # Ranges that share a lower lag bound (same max_freq) share all the
+    # running statistics; the upper bound only truncates them
+    for lo in sorted({lo for lo, _ in bounds}):
+        window = d_prime[:, lo:]
+        running_min = np.minimum.accumulate(window, axis=1)
+        new_min = np.ones(window.shape, dtype=bool)
+        new_min[:, 1:] = window[:, 1:] < running_min[:, :-1]
+        running_argmin = np.maximum.accumulate(
+            np.where(new_min, np.arange(window.shape[1]), 0), axis=1)
+        first = first_below(running_min, thresholds)
+
+        for k, (_, hi) in enumerate(bounds):
+            if bounds[k][0] != lo:
+                continue
+            has_dip[:, k] = first < hi - lo
+            start = lo + np.minimum(first, hi - lo - 1)
+            end = np.minimum(np.take_along_axis(descent, start, axis=1), hi - 1)
+            fallback = lo + running_argmin[:, hi - lo - 1]
+            tau[:, k] = np.where(has_dip[:, k], end, fallback[:, np.newaxis])
+
+    flat_tau = tau.reshape(n_frames, -1)
+    # One d' row serves every setting of its frame (broadcast over settings)
+    tau_refined, _ = yin.parabolic_interpolation(d_prime[:, np.newaxis], flat_tau)
+    confidence = 1 - np.take_along_axis(d_prime, flat_tau, axis=1)
+
+    voiced = has_dip & (confidence.reshape(tau.shape) >= yin.MIN_CONFIDENCE)
+    f0 = np.where(voiced, fs / tau_refined.reshape(tau.shape), 0.0)
+    return SweepResult(f0=f0, confidence=confidence.reshape(tau.shape), tau=tau,
+                       tau_refined=tau_refined.reshape(tau.shape), has_dip=has_dip)
+
+
+def sweep_frames(frames, fs, thresholds, ranges, W=None):
+    """Compute d' once for a (n_frames, N) stack and sweep all settings."""
+    d = yin.difference_function(frames, W)
+    d_prime = yin.cumulative_mean_normalized_difference(d)
+    result = sweep_cmndf(d_prime, fs, thresholds, ranges)
+
+    rms = np.sqrt(np.mean(np.square(frames), axis=-1))
+    gate = (rms >= yin.MIN_VOLUME)[:, np.newaxis, np.newaxis]
+    return result._replace(f0=np.where(gate, result.f0, 0.0))
+
+
+# ============================================================================
+#  LABELLED FRAMES
+# ============================================================================
+
+def labelled_frames(audio, f0, frame_length, hop):
+    """All frames (voiced or not) of a block of clips, with frame-centre truth."""
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_length, axis=1)[:, ::hop]
+    truth = np.lib.stride_tricks.sliding_window_view(f0, frame_length, axis=1)[:, ::hop]
+    return (np.asarray(frames, dtype=np.float64).reshape(-1, frame_length),
+            np.asarray(truth[..., frame_length // 2], dtype=np.float64).ravel())
+
+
+def load_frames(corpus_path, n_clips, duration, frame_length, hop, seed=0):
+    if corpus_path:
+        data = corpus.Corpus(corpus_path)
+        audio, f0 = data.audio[:n_clips], data.f0[:n_clips]
+        fs = data.fs
+    else:
+        rng = np.random.default_rng(seed)
+        audio, f0, _ = corpus.synthesize_batch(rng, n_clips, int(duration * FS), FS,
+                                               np.array([10.0, 20.0, 30.0]))
+        fs = FS
+    frames, truth = labelled_frames(audio, f0, frame_length, hop)
+    return frames, truth, fs
+
+
+def parse_range(spec):
+    """'start:stop:count' -> np.linspace, otherwise a comma-separated list."""
+    if ':' in spec:
+        start, stop, count = spec.split(':')
+        return np.linspace(float(start), float(stop), int(count))
+    return np.array([float(v) for v in spec.split(',')])
+
+
+def run_sweep(thresholds, ranges, corpus_path=None, clips=64, duration=1.0, hop=512,
+              block=1024):
+    """
+    Sweep every (range, threshold) setting over a labelled corpus and time
+    it against one ordinary detection pass. Returns a JSON-ready report.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    # One window long enough for the lowest frequency in the sweep
+    W = int(np.ceil(FS / min(lo for lo, _ in ranges))) + 2
+    frames, truth, fs = load_frames(corpus_path, clips, duration, 2 * W, hop)
+
+    # Reference cost: a single ordinary detection pass
+    start = time.perf_counter()
+    for b in range(0, len(frames), block):
+        yin.detect_pitch_batch(frames[b:b + block], fs, WORKLET_THRESHOLD)
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = np.zeros((len(ranges), len(thresholds), len(pitch_metrics.COUNTS)), dtype=np.int64)
+    for b in range(0, len(frames), block):
+        result = sweep_frames(frames[b:b + block], fs, thresholds, ranges)
+        # (ranges, thresholds, frames) -> counts for all settings in one call
+        counts += pitch_metrics.frame_counts(np.moveaxis(result.f0, 0, -1), truth[b:b + block])
+    sweep_time = time.perf_counter() - start
+
+    grid = {name: [[pitch_metrics.metrics(counts[k, j])[name] for j in range(len(thresholds))]
+                   for k in range(len(ranges))]
+            for name in ('RPA', 'RCA', 'GPE', 'VR', 'VFA', 'OA')}
+
+    return {
+        'fs': fs,
+        'frames': len(frames),
+        'frame_length': 2 * W,
+        'hop': hop,
+        'corpus': str(corpus_path) if corpus_path else f'in-memory ({clips} clips)',
+        'thresholds': np.round(thresholds, 4).tolist(),
+        'ranges': [{'min_freq': lo, 'max_freq': hi,
+                    'window_ms': round(float(window_latency_ms(fs, lo)), 3)}
+                   for lo, hi in ranges],
+        'worklet': {'threshold': WORKLET_THRESHOLD, 'min_freq': WORKLET_RANGE[0],
+                    'max_freq': WORKLET_RANGE[1]},
+        'timing': {'single_pass_s': round(single_time, 4), 'sweep_s': round(sweep_time, 4)},
+        'metrics': grid,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', type=Path, help='generated corpus (default: in-memory clips)')
+    parser.add_argument('--clips', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=1.0, help='in-memory clip length (s)')
+    parser.add_argument('--hop', type=int, default=512)
+    parser.add_argument('--thresholds', default='0.05:0.5:19', help='start:stop:count or list')
+    parser.add_argument('--min-freq', type=float, nargs='+', default=[60, 70, 80, 100, 120, 150])
+    parser.add_argument('--max-freq', type=float, nargs='+', default=[800, 2000])
+    parser.add_argument('--block', type=int, default=1024, help='frames per d\' block')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    thresholds = np.unique(np.round(np.append(parse_range(args.thresholds), WORKLET_THRESHOLD), 6))
+    ranges = [(lo, hi) for hi in args.max_freq for lo in args.min_freq]
+    if WORKLET_RANGE not in ranges:
+        ranges.append(WORKLET_RANGE)
+    report = run_sweep(thresholds, ranges, args.corpus, args.clips, args.duration, args.hop,
+                       args.block)
+
+    timing = report['timing']
+    print(f'{report["frames"]} frames x {report["frame_length"]} samples, {len(ranges)} ranges x '
+          f'{len(thresholds)} thresholds = {len(ranges) * len(thresholds)} settings')
+    print(f'One detection pass: {timing["single_pass_s"]:.2f} s; full sweep: '
+          f'{timing["sweep_s"]:.2f} s ({timing["sweep_s"] / timing["single_pass_s"]:.2f}x)')
+
+    print(f'{"Range (Hz)":<14} {"window":>8}  best OA (threshold)')
+    for k, (lo, hi) in enumerate(ranges):
+        j = int(np.argmax(report['metrics']['OA'][k]))
+        print(f'{f"{lo:g}-{hi:g}":<14} {report["ranges"][k]["window_ms"]:>6.1f}ms  '
+              f'{report["metrics"]["OA"][k][j]:.2f} % ({thresholds[j]:.3f})')
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=1) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
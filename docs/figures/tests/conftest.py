@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The figure scripts import their sibling modules flat
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
@@ -0,0 +1,39 @@
+import numpy as np
+
+import benchmark_history
+
+
+def test_parse_params_keeps_integer_params():
+    params = benchmark_history.parse_params(['threshold=0.1', 'decimation=4', 'early_exit=True'])
+    assert params == {'threshold': 0.1, 'decimation': 4, 'early_exit': True}
+    assert isinstance(params['decimation'], int)
+
+
+def test_fingerprint_ignores_software(monkeypatch):
+    import benchmark_pitch_detectors
+
+    before = benchmark_history.machine_fingerprint()
+    monkeypatch.setattr(benchmark_pitch_detectors, 'machine_info',
+                        lambda: {'platform': 'Linux-9.9', 'processor': 'x', 'python': '3.99',
+                                 'numpy': '9.0'})
+    assert benchmark_history.machine_fingerprint() == before
+    assert benchmark_history.software_info() == {'python': '3.99', 'numpy': '9.0',
+                                                 'platform': 'Linux-9.9'}
+
+
+def test_numpy_upgrade_is_compared_against_earlier_runs(tmp_path):
+    rng = np.random.default_rng(0)
+    history = benchmark_history.History(tmp_path / 'history.npz')
+    software = {'python': '3.12', 'numpy': '1.26', 'platform': 'Linux'}
+    for k, (commit, numpy, latency) in enumerate([('a', '1.26', 1.0), ('b', '1.26', 1.0),
+                                                  ('c', '2.0', 1.5)]):
+        metrics = {'latency_ms': latency + 0.01 * rng.standard_normal(200),
+                   'rpa': np.full(200, 100.0)}
+        history.append(commit, 'm', 'YIN', {}, metrics, timestamp=k,
+                       software={**software, 'numpy': numpy})
+    history.save()
+
+    rows = benchmark_history.compare_latest(benchmark_history.History(history.path))
+    latency = next(row for row in rows if row['metric'] == 'latency_ms')
+    assert latency['commit'] == 'c' and latency['regression']
+    assert latency['software_changes'] == {'numpy': (['1.26'], ['2.0'])}
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import detectors
+
+
+def naive_hamming(frames):
+    """d(tau) = number of differing sign bits between x[0:W] and x[tau:tau+W]."""
+    W = 64 * (frames.shape[1] // 128)
+    bits = frames >= 0
+    return np.array([[np.count_nonzero(frame[:W] != frame[tau:tau + W]) for tau in range(W)]
+                     for frame in bits], dtype=np.float64)
+
+
+@pytest.mark.parametrize('N', [128, 200, 1000, 1024, 2047])
+def test_one_bit_difference_matches_naive(N):
+    rng = np.random.default_rng(N)
+    t = np.arange(N) / 16000
+    frames = np.sin(2 * np.pi * 220 * t) + 0.3 * rng.standard_normal((3, N))
+    d = detectors.create('OneBitPitch').difference(frames)
+    np.testing.assert_array_equal(d, naive_hamming(frames))
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import pytest
+
+import latency_trace
+
+STAGES = latency_trace.STAGE_NAMES
+
+
+def write_lines(path, records):
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records))
+
+
+def test_mixed_formats_in_one_chunk(tmp_path):
+    durations = np.arange(1, len(STAGES) + 1, dtype=np.float64)
+    ts = np.concatenate([[0], np.cumsum(durations)]).tolist()
+    trace = tmp_path / 'trace.jsonl'
+    write_lines(trace, [
+        {'frame': 0, 'ts': ts},
+        {'frame': 1, 'stages': dict(zip(STAGES, durations.tolist()))},
+        {'frame': 2, 'ts': ts},
+    ])
+    chunks = list(latency_trace.iter_trace_chunks(trace))
+    assert len(chunks) == 1
+    np.testing.assert_allclose(chunks[0], np.tile(durations, (3, 1)))
+
+
+def test_bad_record_names_its_line(tmp_path):
+    trace = tmp_path / 'trace.jsonl'
+    write_lines(trace, [{'frame': 0, 'stages': {}}, {'frame': 1, 'ts': [0, 1]}])
+    with pytest.raises(ValueError, match=r'trace.jsonl:2: "ts"'):
+        list(latency_trace.iter_trace_chunks(trace))
+    write_lines(trace, [{'frame': 0, 'stages': {}}, {'frame': 1}])
+    with pytest.raises(ValueError, match=r'trace.jsonl:2: .*neither'):
+        list(latency_trace.iter_trace_chunks(trace))
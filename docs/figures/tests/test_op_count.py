@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import op_count
+import yin
+
+
+def traced(fn, *arrays):
+    with op_count.Tracer() as tracer:
+        fn(*(np.asarray(a, dtype=np.float64).view(op_count.Counted) for a in arrays))
+    return tracer.counts
+
+
+def test_products_count_one_madd_per_term():
+    a, b = np.ones((3, 5, 7)), np.ones((3, 7))
+    assert traced(lambda a, b: np.einsum('nkj,nj->nk', a, b), a, b)['madds'] == 3 * 5 * 7
+    assert traced(lambda a, b: np.einsum('...kj,...j->...k', a, b), a, b)['madds'] == 3 * 5 * 7
+    assert traced(lambda a, b: np.matmul(a, b[..., np.newaxis]), a, b)['madds'] == 3 * 5 * 7
+    assert traced(lambda a: np.dot(a[0], a[0].T), a)['madds'] == 5 * 7 * 5
+
+
+def test_gather_counts_traffic_only():
+    counts = traced(lambda a: np.take_along_axis(a, np.zeros((4, 1), dtype=np.intp), axis=-1),
+                    np.ones((4, 8)))
+    assert counts['madds'] == 0 and counts['bytes'] > 0
+
+
+def test_unknown_function_warns():
+    op_count._warned.discard('trapezoid')
+    with pytest.warns(UserWarning, match='numpy.trapezoid'):
+        traced(np.trapezoid, np.ones(8))
+
+
+def test_early_exit_yin_frame_matches_analytic_count():
+    # Noise has no dip below the threshold, so all W - 1 lags are computed;
+    # each lag of d(tau) is one N-term inner product
+    N, W = 1024, 512
+    frame = np.random.default_rng(0).standard_normal((1, N))
+    madds = traced(lambda x: yin.detect_pitch_early_exit(x, 44100, W=W), frame)['madds']
+    assert (W - 1) * N <= madds <= (W - 1) * N + 16 * (N + W)
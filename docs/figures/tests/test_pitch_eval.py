@@ -0,0 +1,29 @@
+import pitch_eval
+
+
+def test_parse_grid_keeps_integer_params():
+    grid = pitch_eval.parse_grid(['decimation=2,4', 'threshold=0.1'])
+    assert grid == [{'decimation': 2, 'threshold': 0.1}, {'decimation': 4, 'threshold': 0.1}]
+    assert all(isinstance(params['decimation'], int) for params in grid)
+
+
+def test_parse_value_falls_back_to_string():
+    assert pitch_eval.parse_value('hann') == 'hann'
+    assert pitch_eval.parse_value('True') is True
+
+
+def test_cache_key_changes_with_detector_code(tmp_path, monkeypatch):
+    import detectors
+
+    (tmp_path / 'detectors.py').write_text('import yin\n')
+    (tmp_path / 'yin.py').write_text('THRESHOLD = 0.1\n')
+    monkeypatch.setattr(detectors, '__file__', str(tmp_path / 'detectors.py'))
+    pitch_eval.detector_code_hash.cache_clear()
+    before = pitch_eval.cache_key('YIN', {}, 1024, 512, 16000, 'clip')
+
+    # A transitive import of detectors.py changes
+    (tmp_path / 'yin.py').write_text('THRESHOLD = 0.2\n')
+    pitch_eval.detector_code_hash.cache_clear()
+    after = pitch_eval.cache_key('YIN', {}, 1024, 512, 16000, 'clip')
+    pitch_eval.detector_code_hash.cache_clear()
+    assert before != after
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+import build_figures
+import render_server
+
+FIGURE = '''
+from pathlib import Path
+import probe_middle
+Path(__file__).with_suffix('.out').write_text(str(probe_middle.value()))
+'''
+
+
+@pytest.fixture
+def scripts(tmp_path, monkeypatch):
+    """A figures tree: figure1_probe -> probe_middle -> probe_leaf."""
+    scripts = tmp_path / 'scripts'
+    scripts.mkdir()
+    (scripts / 'figure1_probe.py').write_text(FIGURE)
+    (scripts / 'probe_middle.py').write_text('import probe_leaf\n\n'
+                                             'def value():\n    return probe_leaf.VALUE\n')
+    (scripts / 'probe_leaf.py').write_text('VALUE = 1\n')
+    monkeypatch.setattr(build_figures, 'SCRIPTS_PATH', scripts)
+    monkeypatch.setattr(build_figures, 'FIGURES_PATH', tmp_path)
+    monkeypatch.setattr(build_figures, 'OUTPUT_PATH', tmp_path / 'output')
+    monkeypatch.setattr(build_figures, 'CACHE_FILE', tmp_path / 'output' / '.build-cache.json')
+    monkeypatch.syspath_prepend(str(scripts))
+    yield scripts
+    for name in ('probe_middle', 'probe_leaf'):
+        sys.modules.pop(name, None)
+
+
+def test_transitive_edit_is_rendered_and_cached(scripts):
+    server = render_server.RenderServer()
+    server.render(server.scripts)
+    assert (scripts / 'figure1_probe.out').read_text() == '1'
+
+    leaf = scripts / 'probe_leaf.py'
+    mtime = leaf.stat().st_mtime_ns
+    leaf.write_text('VALUE = 2\n')
+    os.utime(leaf, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+    assert server.poll() == [scripts / 'figure1_probe.py']
+    assert (scripts / 'figure1_probe.out').read_text() == '2'
+    cache = build_figures.load_cache()
+    assert cache['figure1_probe'] == build_figures.fingerprint(scripts / 'figure1_probe.py')
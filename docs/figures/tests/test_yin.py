@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+import yin
+
+FS = 44100
+
+
+@pytest.mark.parametrize('factor', [2, 4, 8])
+def test_coarse_to_fine_matches_full_rate_near_w(factor):
+    # 80-90 Hz on 1024-sample frames: the coarse dip sits close to W = 512
+    rng = np.random.default_rng(factor)
+    f0 = np.repeat(np.linspace(80, 90, 21), 4)
+    t = np.arange(1024) / FS
+    phase = rng.uniform(0, 2 * np.pi, (len(f0), 1))
+    frames = sum(np.sin(2 * np.pi * k * f0[:, np.newaxis] * t + k * phase) / k for k in (1, 2, 3))
+    frames += 0.01 * rng.standard_normal(frames.shape)
+
+    _, _, tau_full, refined_full = yin.detect_pitch_batch(frames, FS)
+    _, _, tau, refined = yin.detect_pitch_batch(frames, FS, decimation=factor)
+    np.testing.assert_array_equal(tau, tau_full)
+    np.testing.assert_allclose(refined, refined_full, rtol=1e-9)
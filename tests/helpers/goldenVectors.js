@@ -0,0 +1,47 @@
+import { readFileSync } from 'node:fs';
+
+/**
+ * Read a golden-vector container written by docs/figures/scripts/golden_vectors.py.
+ *
+ * Layout (little-endian): 'MWGV' magic, uint32 version, uint32 header length,
+ * JSON header, then float32 arrays on 64-byte boundaries. Arrays are returned
+ * as Float32Array views of the file buffer, so nothing is parsed or copied.
+ *
+ * @param {string | URL} path
+ * @returns {{ attrs: object, arrays: Record<string, { shape: number[], data: Float32Array }> }}
+ */
+export const readGoldenVectors = (path) => {
+  const file = readFileSync(path);
+  // Float32Array views need a 4-byte aligned offset into the underlying buffer
+  const bytes = file.byteOffset % 4 === 0 ? file : Buffer.from(file);
+
+  const magic = bytes.toString('latin1', 0, 4);
+  if (magic !== 'MWGV') {
+    throw new Error(`${path} is not a golden-vector container`);
+  }
+  const version = bytes.readUInt32LE(4);
+  if (version !== 1) {
+    throw new Error(`${path}: unsupported container version ${version}`);
+  }
+  const headerLength = bytes.readUInt32LE(8);
+  const header = JSON.parse(bytes.toString('utf8', 12, 12 + headerLength));
+  const dataStart = bytes.byteOffset + 12 + headerLength;
+
+  const arrays = {};
+  for (const [name, { shape, offset }] of Object.entries(header.arrays)) {
+    const length = shape.reduce((a, b) => a * b, 1);
+    arrays[name] = {
+      shape,
+      data: new Float32Array(bytes.buffer, dataStart + offset, length)
+    };
+  }
+  return { attrs: header.attrs, arrays };
+};
+
+/**
+ * Row `index` of a 2-D golden array, as a Float32Array view.
+ */
+export const goldenRow = (array, index) => {
+  const width = array.shape[1];
+  return array.data.subarray(index * width, (index + 1) * width);
+};
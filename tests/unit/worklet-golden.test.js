@@ -0,0 +1,95 @@
+/**
+ * pitch-worklet.js golden-vector parity tests
+ *
+ * Runs the worklet's YIN detector and FastFFT features on the frames in
+ * tests/fixtures/worklet-golden.bin and compares them with the Python
+ * reference outputs stored alongside (docs/figures/scripts/golden_vectors.py).
+ */
+
+import { describe, it, expect, beforeAll } from 'vitest';
+import { readFileSync } from 'node:fs';
+import vm from 'node:vm';
+import { readGoldenVectors, goldenRow } from '../helpers/goldenVectors.js';
+
+const WORKLET_URL = new URL('../../js/pitch-worklet.js', import.meta.url);
+const GOLDEN_URL = new URL('../fixtures/worklet-golden.bin', import.meta.url);
+
+// Load the worklet classes with the AudioWorkletGlobalScope stubbed out
+const loadWorklet = (sampleRate) => {
+  const context = vm.createContext({
+    console,
+    AudioWorkletProcessor: class {
+      constructor() {
+        this.port = { postMessage() {} };
+      }
+    },
+    registerProcessor() {},
+    sampleRate,
+    currentTime: 0
+  });
+  vm.runInContext(
+    `${readFileSync(WORKLET_URL, 'utf8')}
+    globalThis.worklet = { FastFFT, PitchDetectorWorklet };`,
+    context
+  );
+  return context.worklet;
+};
+
+describe('pitch-worklet golden vectors', () => {
+  let attrs;
+  let arrays;
+  let worklet;
+  let frameCount;
+
+  beforeAll(() => {
+    ({ attrs, arrays } = readGoldenVectors(GOLDEN_URL));
+    worklet = loadWorklet(attrs.fs);
+    frameCount = arrays.frames.shape[0];
+  });
+
+  it('has consistent array shapes', () => {
+    expect(arrays.frames.shape).toEqual([frameCount, attrs.frame_length]);
+    expect(arrays.d_prime.shape).toEqual([frameCount, attrs.frame_length / 2]);
+    for (const name of ['tau', 'f0', 'centroid', 'flatness', 'brightness', 'breathiness']) {
+      expect(arrays[name].shape).toEqual([frameCount]);
+    }
+  });
+
+  it('matches the reference F0 and voicing of the YIN detector', () => {
+    const detect = worklet.PitchDetectorWorklet.prototype._createYINDetector({
+      threshold: attrs.threshold,
+      sampleRate: attrs.fs
+    });
+
+    for (let i = 0; i < frameCount; i++) {
+      const expected = arrays.f0.data[i];
+      const frequency = detect(goldenRow(arrays.frames, i));
+      if (expected === 0) {
+        expect(frequency, `frame ${i}`).toBeNull();
+      } else {
+        const cents = Math.abs(1200 * Math.log2(frequency / expected));
+        expect(cents, `frame ${i}`).toBeLessThan(0.01);
+      }
+    }
+  });
+
+  it('matches the reference FastFFT centroid and flatness', () => {
+    const fft = new worklet.FastFFT(attrs.fft_size);
+
+    for (let i = 0; i < frameCount; i++) {
+      const power = fft.computePowerSpectrum(goldenRow(arrays.frames, i));
+      const centroid = fft.computeSpectralCentroid(power, attrs.fs);
+      const flatness = fft.computeSpectralFlatness(power);
+      expect(centroid).toBeCloseTo(arrays.centroid.data[i], 1);
+      expect(flatness).toBeCloseTo(arrays.flatness.data[i], 5);
+    }
+  });
+
+  it('matches the reference brightness normalization', () => {
+    const normalize = worklet.PitchDetectorWorklet.prototype._normalizeBrightness;
+
+    for (let i = 0; i < frameCount; i++) {
+      expect(normalize(arrays.centroid.data[i])).toBeCloseTo(arrays.brightness.data[i], 5);
+    }
+  });
+});